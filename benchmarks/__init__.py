@@ -0,0 +1,3 @@
+from .corpus import PLANTED_VALUES, CorpusSpec, generate_corpus
+
+__all__ = ["CorpusSpec", "PLANTED_VALUES", "generate_corpus"]
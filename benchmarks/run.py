@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import asdict
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from markdown_redactor import RedactionConfig, __version__, create_default_engine, default_rules
+
+from .corpus import CorpusSpec, generate_corpus
+
+
+def _best_seconds(func: Callable[[], object], repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _entry(name: str, seconds: float, size: int, **extra: object) -> dict[str, Any]:
+    return {
+        "name": name,
+        "seconds": seconds,
+        "mb_per_s": size / seconds / 1_000_000 if seconds else 0.0,
+        **extra,
+    }
+
+
+def run_benchmarks(spec: CorpusSpec, *, repeat: int, per_rule: bool, cli: bool) -> dict[str, Any]:
+    corpus = generate_corpus(spec)
+    size = len(corpus.encode("utf-8"))
+    engine = create_default_engine()
+    results: list[dict[str, Any]] = []
+
+    for name, config in (
+        ("redact", RedactionConfig()),
+        ("redact_audit", RedactionConfig(collect_audit_log=True)),
+        ("redact_whole_lines", RedactionConfig(skip_inline_code=False)),
+        ("redact_spans", RedactionConfig(detection_mode="spans")),
+    ):
+        engine.redact(corpus, config=config)
+        seconds = _best_seconds(partial(engine.redact, corpus, config=config), repeat)
+        results.append(_entry(name, seconds, size))
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = Path(directory) / "corpus.md"
+        output_path = Path(directory) / "out.md"
+        input_path.write_text(corpus, encoding="utf-8")
+
+        seconds = _best_seconds(lambda: engine.redact_file(input_path), repeat)
+        results.append(_entry("redact_file", seconds, size))
+        seconds = _best_seconds(lambda: engine.redact_to_file(input_path, output_path), repeat)
+        results.append(_entry("redact_to_file", seconds, size))
+
+        if cli:
+            command = [
+                sys.executable,
+                "-m",
+                "markdown_redactor.cli",
+                str(input_path),
+                "-o",
+                str(output_path),
+            ]
+            seconds = _best_seconds(lambda: subprocess.run(command, check=True), repeat)
+            results.append(_entry("cli", seconds, size))
+
+    rules: list[dict[str, Any]] = []
+    if per_rule:
+        for rule in default_rules():
+            config = RedactionConfig(enabled_rule_names=(rule.name,))
+            result = engine.redact(corpus, config=config)
+            seconds = _best_seconds(partial(engine.redact, corpus, config=config), repeat)
+            rules.append(_entry(rule.name, seconds, size, matches=result.stats.total_matches))
+        rules.sort(key=lambda entry: -entry["seconds"])
+
+    return {
+        "meta": {
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": asdict(spec),
+            "corpus_bytes": size,
+            "repeat": repeat,
+        },
+        "results": results,
+        "rules": rules,
+    }
+
+
+def _compare(current: dict[str, Any], baseline_path: Path) -> list[str]:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    lines: list[str] = []
+    for section in ("results", "rules"):
+        previous = {entry["name"]: entry for entry in baseline.get(section, [])}
+        for entry in current[section]:
+            before = previous.get(entry["name"])
+            if before is None or not before["seconds"]:
+                continue
+            change = (entry["seconds"] / before["seconds"] - 1) * 100
+            lines.append(f"{section}/{entry['name']}: {change:+.1f}% time")
+    return lines
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--size-mb", type=float, default=1.0, help="Corpus size in MB")
+    parser.add_argument("--seed", type=int, default=1234, help="Corpus generator seed")
+    parser.add_argument("--fence-density", type=float, default=0.05)
+    parser.add_argument("--inline-code-density", type=float, default=0.2)
+    parser.add_argument("--pii-density", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; best is kept")
+    parser.add_argument("--no-per-rule", action="store_true", help="Skip per-rule timings")
+    parser.add_argument("--no-cli", action="store_true", help="Skip the CLI subprocess run")
+    parser.add_argument("-o", "--output", default=None, help="Write results JSON to this path")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare with")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = _parse_args(argv)
+    spec = CorpusSpec(
+        size_bytes=int(args.size_mb * 1_000_000),
+        seed=args.seed,
+        fence_density=args.fence_density,
+        inline_code_density=args.inline_code_density,
+        pii_density=args.pii_density,
+    )
+    report = run_benchmarks(
+        spec, repeat=args.repeat, per_rule=not args.no_per_rule, cli=not args.no_cli
+    )
+
+    for section in ("results", "rules"):
+        for entry in report[section]:
+            milliseconds = entry["seconds"] * 1000
+            print(
+                f"{section}/{entry['name']}: {entry['mb_per_s']:.2f} MB/s ({milliseconds:.1f} ms)"
+            )
+    if args.compare is not None:
+        for line in _compare(report, Path(args.compare)):
+            print(line)
+    if args.output is not None:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
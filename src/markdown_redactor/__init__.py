@@ -1,6 +1,11 @@
+from .audit import AuditLog, AuditSink, BinaryAuditSink, JsonlAuditSink, read_binary_audit
+from .backends import Re2Backend, RegexBackend
+from .cache import ResultCache
 from .engine import RedactionEngine
 from .factory import create_default_engine, create_tenant_engine
-from .ner import NERRule
+from .ner import EntityCache, NERModelManager, NERRule
+from .plan import RedactionPlan
+from .prefilter import RulePrefilter
 from .registry import RuleRegistry
 from .rules import (
     CredentialUriRule,
@@ -11,37 +16,62 @@ from .rules import (
     SecretAssignmentRule,
     default_rules,
 )
+from .stream import AsyncRedactionStream, RedactionStream
 from .types import (
     AuditEntry,
+    BatchRedactionResult,
+    BatchSpanRedactionRule,
     RedactionConfig,
     RedactionResult,
     RedactionRule,
+    RedactionSpan,
     RedactionStats,
     RuleContext,
     RuleMetadata,
+    RuleTiming,
+    SpanRedactionRule,
 )
 
 __version__ = "0.1.4"
 
 __all__ = [
     "RedactionEngine",
+    "ResultCache",
     "create_default_engine",
     "create_tenant_engine",
     "RuleRegistry",
     "NERRule",
+    "NERModelManager",
+    "EntityCache",
+    "RegexBackend",
+    "Re2Backend",
     "default_rules",
     "CreditCardRule",
     "CredentialUriRule",
     "LabelValueRule",
     "PhoneRule",
     "RegexRule",
+    "RulePrefilter",
     "SecretAssignmentRule",
     "RedactionConfig",
+    "RedactionPlan",
     "RedactionResult",
     "RedactionStats",
+    "RuleTiming",
+    "RedactionStream",
+    "AsyncRedactionStream",
     "RuleContext",
     "RuleMetadata",
     "AuditEntry",
+    "AuditLog",
+    "AuditSink",
+    "BinaryAuditSink",
+    "JsonlAuditSink",
+    "read_binary_audit",
+    "BatchRedactionResult",
     "RedactionRule",
+    "RedactionSpan",
+    "SpanRedactionRule",
+    "BatchSpanRedactionRule",
     "__version__",
 ]
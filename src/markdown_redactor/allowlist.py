@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+
+from .rules import _replacement_value
+from .types import RedactionConfig, RedactionSpan
+
+_TrieNode = dict[str, "_TrieNode"]
+_TERMINAL = ""
+
+
+def _trie_pattern(values: Iterable[str]) -> str:
+    root: _TrieNode = {}
+    for value in values:
+        node = root
+        for char in value:
+            node = node.setdefault(char, {})
+        node[_TERMINAL] = {}
+    return _node_pattern(root)
+
+
+def _node_pattern(node: _TrieNode) -> str:
+    terminal = _TERMINAL in node
+    branches = []
+    for char in sorted(key for key in node if key != _TERMINAL):
+        literal = re.escape(char)
+        child = node[char]
+        while len(child) == 1 and _TERMINAL not in child:
+            ((next_char, child),) = child.items()
+            literal += re.escape(next_char)
+        rest = _node_pattern(child)
+        branches.append(literal + rest)
+
+    if not branches:
+        return ""
+    if len(branches) == 1:
+        body = branches[0]
+    elif all(node[key] == {_TERMINAL: {}} for key in node if key != _TERMINAL):
+        body = "[" + "".join(branches) + "]"
+    else:
+        body = "(?:" + "|".join(branches) + ")"
+    if terminal:
+        return f"(?:{body})?"
+    return body
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledAllowlist:
+    values: tuple[str, ...]
+    literal_pattern: re.Pattern[str] | None
+    patterns: tuple[re.Pattern[str], ...]
+
+    def protected_ranges(self, content: str) -> list[tuple[int, int]]:
+        ranges: list[tuple[int, int]] = []
+        if self.literal_pattern is not None:
+            ranges.extend(match.span() for match in self.literal_pattern.finditer(content))
+        for pattern in self.patterns:
+            ranges.extend(
+                match.span() for match in pattern.finditer(content) if match.end() > match.start()
+            )
+        if not ranges:
+            return ranges
+        if self.patterns:
+            ranges.sort()
+
+        merged = [ranges[0]]
+        for start, end in ranges[1:]:
+            last_start, last_end = merged[-1]
+            if start <= last_end:
+                if end > last_end:
+                    merged[-1] = (last_start, end)
+                continue
+            merged.append((start, end))
+        return merged
+
+
+def unprotected_spans(
+    spans: Sequence[RedactionSpan],
+    protected: Sequence[tuple[int, int]],
+    content: str,
+    config: RedactionConfig,
+) -> list[RedactionSpan]:
+    # Rules match on the unsplit text. A match inside a protected range is dropped; a
+    # match overlapping one is redacted on either side of it, each part as a match of
+    # its own, with its replacement recomputed when the rule renders the matched value.
+    if not protected:
+        return list(spans)
+    ends = [end for _, end in protected]
+    kept: list[RedactionSpan] = []
+    for span in spans:
+        index = bisect_right(ends, span.start)
+        if index == len(protected) or protected[index][0] >= span.end:
+            kept.append(span)
+            continue
+        rendered = span.replacement == _replacement_value(content[span.start : span.end], config)
+        parts: list[tuple[int, int]] = []
+        position = span.start
+        while index < len(protected) and protected[index][0] < span.end:
+            range_start, range_end = protected[index]
+            if range_start > position:
+                parts.append((position, range_start))
+            position = max(position, range_end)
+            index += 1
+        if position < span.end:
+            parts.append((position, span.end))
+        kept.extend(
+            RedactionSpan(
+                start,
+                end,
+                _replacement_value(content[start:end], config) if rendered else span.replacement,
+                span.rule_name,
+            )
+            for start, end in parts
+        )
+    return kept
+
+
+def shifted_ranges(
+    protected: Sequence[tuple[int, int]], spans: Sequence[RedactionSpan]
+) -> list[tuple[int, int]]:
+    # Positions of the protected ranges once sorted spans that lie outside all of them
+    # have been applied.
+    shifted: list[tuple[int, int]] = []
+    delta = index = 0
+    for start, end in protected:
+        while index < len(spans) and spans[index].start < start:
+            span = spans[index]
+            delta += len(span.replacement) - (span.end - span.start)
+            index += 1
+        shifted.append((start + delta, end + delta))
+    return shifted
+
+
+@lru_cache(maxsize=64)
+def compile_allowlist(
+    values: tuple[str, ...],
+    patterns: tuple[str, ...] = (),
+) -> CompiledAllowlist | None:
+    unique_values = tuple(sorted({value for value in values if value}, key=len, reverse=True))
+    compiled_patterns: list[re.Pattern[str]] = []
+    for pattern in dict.fromkeys(patterns):
+        try:
+            compiled_patterns.append(re.compile(pattern))
+        except re.error as exc:
+            raise ValueError(f"Invalid allowlist pattern {pattern!r}: {exc}") from exc
+
+    if not unique_values and not compiled_patterns:
+        return None
+
+    return CompiledAllowlist(
+        values=unique_values,
+        literal_pattern=re.compile(_trie_pattern(unique_values)) if unique_values else None,
+        patterns=tuple(compiled_patterns),
+    )
@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import json
+import struct
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Protocol, TypeVar, cast, overload
+
+from .offsets import OffsetMap, net_edits
+from .types import AuditEntry, RedactionSpan, _hash_value
+
+_SINK_BUFFER_BYTES = 1 << 20
+_BINARY_MAGIC = b"MRAUDIT\x01"
+_LENGTH = struct.Struct("<I")
+_OFFSETS = struct.Struct("<qq")
+_NO_SOURCE = 0xFFFFFFFF
+
+_SinkT = TypeVar("_SinkT", bound="_FileAuditSink")
+_AuditState = tuple[
+    "array[int]",
+    "array[int]",
+    "array[int]",
+    "array[int]",
+    "array[int]",
+    list[str],
+    list[str],
+    list[str],
+]
+
+
+class AuditLog(Sequence[AuditEntry]):
+    __slots__ = (
+        "_starts",
+        "_ends",
+        "_rules",
+        "_replacements",
+        "_values",
+        "_rule_names",
+        "_rule_ids",
+        "_replacement_texts",
+        "_replacement_ids",
+        "_hashes",
+        "_originals",
+        "_hash_ids",
+        "_pending",
+    )
+
+    def __init__(self, entries: Iterable[AuditEntry] = ()) -> None:
+        self._starts = array("q")
+        self._ends = array("q")
+        self._rules = array("l")
+        self._replacements = array("l")
+        self._values = array("l")
+        self._rule_names: list[str] = []
+        self._rule_ids: dict[str, int] = {}
+        self._replacement_texts: list[str] = []
+        self._replacement_ids: dict[str, int] = {}
+        self._hashes: list[str | None] = []
+        self._originals: list[str | None] = []
+        self._hash_ids: dict[str, int] = {}
+        self._pending: dict[str, int] = {}
+        self.extend(entries)
+
+    def record(self, rule_name: str, start: int, end: int, original: str, replacement: str) -> None:
+        self._add(rule_name, start, end, self._pending_id(original), replacement)
+
+    def record_spans(self, content: str, spans: Iterable[RedactionSpan], offset: int = 0) -> None:
+        rule_ids = self._rule_ids
+        replacement_ids = self._replacement_ids
+        pending = self._pending
+        for span in spans:
+            original = content[span.start : span.end]
+            rule = rule_ids.get(span.rule_name)
+            replacement = replacement_ids.get(span.replacement)
+            value = pending.get(original)
+            self._starts.append(offset + span.start)
+            self._ends.append(offset + span.end)
+            self._rules.append(rule if rule is not None else self._rule_id(span.rule_name))
+            self._replacements.append(
+                replacement if replacement is not None else self._replacement_id(span.replacement)
+            )
+            self._values.append(value if value is not None else self._pending_id(original))
+
+    def append(self, entry: AuditEntry) -> None:
+        self._add(
+            entry.rule_name,
+            entry.start,
+            entry.end,
+            self._hash_id(entry.original_hash),
+            entry.replacement,
+        )
+
+    def extend(self, entries: Iterable[AuditEntry]) -> None:
+        if isinstance(entries, AuditLog):
+            self.merge(entries)
+            return
+        for entry in entries:
+            self.append(entry)
+
+    def merge(self, other: AuditLog, offset: int = 0) -> None:
+        rules = [self._rule_id(name) for name in other._rule_names]
+        replacements = [self._replacement_id(text) for text in other._replacement_texts]
+        values = [
+            self._hash_id(digest) if digest is not None else self._pending_id(original)
+            for digest, original in zip(other._hashes, other._originals, strict=True)
+        ]
+        if offset:
+            self._starts.extend(start + offset for start in other._starts)
+            self._ends.extend(end + offset for end in other._ends)
+        else:
+            self._starts.extend(other._starts)
+            self._ends.extend(other._ends)
+        self._rules.extend(rules[rule] for rule in other._rules)
+        self._replacements.extend(replacements[text] for text in other._replacements)
+        self._values.extend(values[value] for value in other._values)
+
+    def track(self, first: int, base: int, offsets: OffsetMap, before: str, after: str) -> None:
+        # Entries from `first` on were recorded at `base` plus offsets in `before`, a
+        # text that earlier passes rewrote from an original that `offsets` maps back
+        # to. They are moved to offsets in that original, and the pass that turned
+        # `before` into `after` is folded into `offsets` for the passes that follow.
+        starts = self._starts
+        ends = self._ends
+        if len(starts) == first and len(before) == len(after):
+            return
+        texts = self._replacement_texts
+        edits = [
+            (starts[index] - base, ends[index] - base, len(texts[self._replacements[index]]))
+            for index in range(first, len(starts))
+        ]
+        if offsets.starts:
+            for index, (start, end, _) in enumerate(edits, first):
+                origin_start, origin_end = offsets.origin(start, end)
+                starts[index] = base + origin_start
+                ends[index] = base + origin_end
+        offsets.apply(net_edits(edits, before, after))
+
+    def take(self, order: Iterable[int]) -> AuditLog:
+        order = list(order)
+        taken = AuditLog()
+        taken._rule_names = list(self._rule_names)
+        taken._rule_ids = dict(self._rule_ids)
+        taken._replacement_texts = list(self._replacement_texts)
+        taken._replacement_ids = dict(self._replacement_ids)
+        taken._hashes = list(self._hashes)
+        taken._originals = list(self._originals)
+        taken._hash_ids = dict(self._hash_ids)
+        taken._pending = dict(self._pending)
+        for source, target in (
+            (self._starts, taken._starts),
+            (self._ends, taken._ends),
+            (self._rules, taken._rules),
+            (self._replacements, taken._replacements),
+            (self._values, taken._values),
+        ):
+            target.extend(source[index] for index in order)
+        return taken
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    @overload
+    def __getitem__(self, index: int) -> AuditEntry: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> tuple[AuditEntry, ...]: ...
+
+    def __getitem__(self, index: int | slice) -> AuditEntry | tuple[AuditEntry, ...]:
+        if isinstance(index, slice):
+            return tuple(self[position] for position in range(*index.indices(len(self))))
+        self._resolve()
+        return AuditEntry(
+            rule_name=self._rule_names[self._rules[index]],
+            start=self._starts[index],
+            end=self._ends[index],
+            original_hash=self._digest(self._values[index]),
+            replacement=self._replacement_texts[self._replacements[index]],
+        )
+
+    def __iter__(self) -> Iterator[AuditEntry]:
+        self._resolve()
+        rule_names = self._rule_names
+        replacement_texts = self._replacement_texts
+        for start, end, rule, replacement, value in zip(
+            self._starts, self._ends, self._rules, self._replacements, self._values, strict=True
+        ):
+            yield AuditEntry(
+                rule_name=rule_names[rule],
+                start=start,
+                end=end,
+                original_hash=self._digest(value),
+                replacement=replacement_texts[replacement],
+            )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            entry == expected for entry, expected in zip(self, other, strict=True)
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"AuditLog({list(self)!r})"
+
+    def __reduce__(self) -> tuple[type[AuditLog], tuple[()], _AuditState]:
+        # Originals are only kept until they are hashed; a pickled log must never
+        # carry them, so it is resolved first and only the digests are written.
+        self._resolve()
+        return (
+            AuditLog,
+            (),
+            (
+                self._starts,
+                self._ends,
+                self._rules,
+                self._replacements,
+                self._values,
+                self._rule_names,
+                self._replacement_texts,
+                cast(list[str], self._hashes),
+            ),
+        )
+
+    def __setstate__(self, state: _AuditState) -> None:
+        (
+            self._starts,
+            self._ends,
+            self._rules,
+            self._replacements,
+            self._values,
+            self._rule_names,
+            self._replacement_texts,
+            hashes,
+        ) = state
+        self._rule_ids = {name: rule for rule, name in enumerate(self._rule_names)}
+        self._replacement_ids = {
+            text: replacement for replacement, text in enumerate(self._replacement_texts)
+        }
+        self._hashes = list(hashes)
+        self._originals = [None] * len(hashes)
+        self._hash_ids = {}
+        self._pending = {}
+        for value, digest in enumerate(hashes):
+            self._hash_ids.setdefault(digest, value)
+
+    def _add(self, rule_name: str, start: int, end: int, value: int, replacement: str) -> None:
+        self._starts.append(start)
+        self._ends.append(end)
+        self._rules.append(self._rule_id(rule_name))
+        self._replacements.append(self._replacement_id(replacement))
+        self._values.append(value)
+
+    def _rule_id(self, name: str) -> int:
+        rule = self._rule_ids.get(name)
+        if rule is None:
+            rule = self._rule_ids[name] = len(self._rule_names)
+            self._rule_names.append(name)
+        return rule
+
+    def _replacement_id(self, text: str) -> int:
+        replacement = self._replacement_ids.get(text)
+        if replacement is None:
+            replacement = self._replacement_ids[text] = len(self._replacement_texts)
+            self._replacement_texts.append(text)
+        return replacement
+
+    def _hash_id(self, digest: str) -> int:
+        value = self._hash_ids.get(digest)
+        if value is None:
+            value = self._hash_ids[digest] = len(self._hashes)
+            self._hashes.append(digest)
+            self._originals.append(None)
+        return value
+
+    def _pending_id(self, original: str | None) -> int:
+        assert original is not None
+        value = self._pending.get(original)
+        if value is None:
+            value = self._pending[original] = len(self._hashes)
+            self._hashes.append(None)
+            self._originals.append(original)
+        return value
+
+    def _digest(self, value: int) -> str:
+        digest = self._hashes[value]
+        assert digest is not None
+        return digest
+
+    def _resolve(self) -> None:
+        if not self._pending:
+            return
+        for original, value in self._pending.items():
+            digest = _hash_value(original)
+            self._hashes[value] = digest
+            self._originals[value] = None
+            self._hash_ids.setdefault(digest, value)
+        self._pending.clear()
+
+
+class AuditSink(Protocol):
+    def write(self, entries: Sequence[AuditEntry], source: str | None) -> None: ...
+
+
+class _FileAuditSink:
+    def __init__(self, handle: IO[bytes]) -> None:
+        self._handle = handle
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self: _SinkT) -> _SinkT:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class JsonlAuditSink(_FileAuditSink):
+    def __init__(self, path: str | Path, *, buffer_size: int = _SINK_BUFFER_BYTES) -> None:
+        super().__init__(Path(path).open("wb", buffering=buffer_size))
+
+    def write(self, entries: Sequence[AuditEntry], source: str | None) -> None:
+        lines: list[str] = []
+        for entry in entries:
+            record: dict[str, object] = {
+                "rule_name": entry.rule_name,
+                "start": entry.start,
+                "end": entry.end,
+                "original_hash": entry.original_hash,
+                "replacement": entry.replacement,
+            }
+            if source is not None:
+                record["source"] = source
+            lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+        self._handle.write("".join(lines).encode("utf-8"))
+
+
+class BinaryAuditSink(_FileAuditSink):
+    def __init__(self, path: str | Path, *, buffer_size: int = _SINK_BUFFER_BYTES) -> None:
+        super().__init__(Path(path).open("wb", buffering=buffer_size))
+        self._handle.write(_BINARY_MAGIC)
+
+    def write(self, entries: Sequence[AuditEntry], source: str | None) -> None:
+        encoded_source = source.encode("utf-8") if source is not None else None
+        buffer = bytearray()
+        for entry in entries:
+            payload = bytearray(_OFFSETS.pack(entry.start, entry.end))
+            for text in (entry.rule_name, entry.original_hash, entry.replacement):
+                encoded = text.encode("utf-8")
+                payload += _LENGTH.pack(len(encoded))
+                payload += encoded
+            if encoded_source is None:
+                payload += _LENGTH.pack(_NO_SOURCE)
+            else:
+                payload += _LENGTH.pack(len(encoded_source))
+                payload += encoded_source
+            buffer += _LENGTH.pack(len(payload))
+            buffer += payload
+        self._handle.write(buffer)
+
+
+def read_binary_audit(path: str | Path) -> Iterator[tuple[str | None, AuditEntry]]:
+    with Path(path).open("rb") as handle:
+        if handle.read(len(_BINARY_MAGIC)) != _BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary audit file")
+        while header := handle.read(_LENGTH.size):
+            if len(header) < _LENGTH.size:
+                raise ValueError(f"{path} ends with a truncated audit record")
+            (size,) = _LENGTH.unpack(header)
+            payload = handle.read(size)
+            if len(payload) < size:
+                raise ValueError(f"{path} ends with a truncated audit record")
+            yield _decode_record(payload)
+
+
+def _decode_record(payload: bytes) -> tuple[str | None, AuditEntry]:
+    start, end = _OFFSETS.unpack_from(payload)
+    cursor = _OFFSETS.size
+    texts: list[str | None] = []
+    for _ in range(4):
+        (length,) = _LENGTH.unpack_from(payload, cursor)
+        cursor += _LENGTH.size
+        if length == _NO_SOURCE:
+            texts.append(None)
+            continue
+        texts.append(payload[cursor : cursor + length].decode("utf-8"))
+        cursor += length
+    rule_name, original_hash, replacement, source = texts
+    assert rule_name is not None and original_hash is not None and replacement is not None
+    return source, AuditEntry(rule_name, start, end, original_hash, replacement)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import functools
+import re
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Protocol, cast
+
+STDLIB_BACKEND = "re"
+
+_RE2_FLAGS = re.UNICODE | re.ASCII | re.IGNORECASE | re.MULTILINE | re.DOTALL
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+
+
+class RegexBackend(Protocol):
+    @property
+    def name(self) -> str: ...
+
+    def compile(self, pattern: re.Pattern[str]) -> re.Pattern[str] | None: ...
+
+
+@functools.cache
+def _import_re2() -> ModuleType | None:
+    try:
+        import re2
+    except ImportError:
+        return None
+    return cast(ModuleType, re2)
+
+
+@dataclass(frozen=True, slots=True)
+class Re2Backend:
+    name: str = "re2"
+
+    def compile(self, pattern: re.Pattern[str]) -> re.Pattern[str] | None:
+        re2 = _import_re2()
+        if re2 is None or pattern.flags & ~_RE2_FLAGS:
+            return None
+        flags = "".join(letter for flag, letter in _INLINE_FLAGS if pattern.flags & flag)
+        source = f"(?{flags}){pattern.pattern}" if flags else pattern.pattern
+        try:
+            return cast(re.Pattern[str], re2.compile(source))
+        except re2.error:
+            return None
+
+
+_NAMED_BACKENDS: dict[str, RegexBackend] = {"re2": Re2Backend()}
+
+
+def resolve_regex_backend(backend: str | RegexBackend) -> RegexBackend | None:
+    if not isinstance(backend, str):
+        return backend
+    if backend == STDLIB_BACKEND:
+        return None
+    if backend not in _NAMED_BACKENDS:
+        raise ValueError(f"Unknown regex backend {backend!r}")
+    return _NAMED_BACKENDS[backend]
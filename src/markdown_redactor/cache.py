@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+from .audit import AuditLog
+from .types import AuditEntry, RedactionResult, RedactionStats
+
+_ENTRY_OVERHEAD = 200
+_AUDIT_ENTRY_SIZE = 120
+_UNCACHED_STATS = frozenset({"rule_timings", "segmentation_ms", "allowlist_ms"})
+
+
+@dataclass(frozen=True, slots=True)
+class CachedSegment:
+    content: str
+    rule_counts: tuple[tuple[str, int], ...]
+    skipped_rule_invocations: int
+    audit_log: AuditLog
+
+    @property
+    def size(self) -> int:
+        return (
+            sys.getsizeof(self.content)
+            + _ENTRY_OVERHEAD
+            + _AUDIT_ENTRY_SIZE * (len(self.audit_log) + len(self.rule_counts))
+        )
+
+
+class SegmentCache:
+    def __init__(self, max_bytes: int) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, str], tuple[CachedSegment, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, fingerprint: str, text: str) -> CachedSegment | None:
+        key = (fingerprint, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, fingerprint: str, text: str, segment: CachedSegment) -> None:
+        size = segment.size + sys.getsizeof(text)
+        if size > self._max_bytes:
+            return
+        key = (fingerprint, text)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (segment, size)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class ResultCache:
+    def __init__(self, directory: str | Path, *, max_bytes: int = 256 * 1024 * 1024) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._bytes: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def key(self, fingerprint: str, data: bytes) -> str:
+        digest = hashlib.sha256(fingerprint.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> RedactionResult | None:
+        path = self._path(key)
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            stats = payload["stats"]
+            stats["regex_fallbacks"] = tuple(stats.get("regex_fallbacks", ()))
+            result = RedactionResult(
+                content=payload["content"],
+                stats=RedactionStats(**stats),
+                audit_log=AuditLog(AuditEntry(*entry) for entry in payload["audit_log"]),
+            )
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return result
+
+    def put(self, key: str, result: RedactionResult) -> None:
+        payload = {
+            "content": result.content,
+            "stats": {
+                stat.name: getattr(result.stats, stat.name)
+                for stat in fields(result.stats)
+                if stat.name not in _UNCACHED_STATS
+            },
+            "audit_log": [
+                [entry.rule_name, entry.start, entry.end, entry.original_hash, entry.replacement]
+                for entry in result.audit_log
+            ],
+        }
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        if len(data) > self._max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(temp_name, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(temp_name)
+            raise
+
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += len(data)
+            if self._bytes is None or self._bytes > self._max_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self._directory.glob("*/*.json"):
+                with contextlib.suppress(OSError):
+                    path.unlink()
+            self._bytes = 0
+
+    def _path(self, key: str) -> Path:
+        return self._directory / key[:2] / f"{key[2:]}.json"
+
+    def _evict(self) -> None:
+        entries: list[tuple[float, int, Path]] = []
+        for path in self._directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                path.unlink()
+            total -= size
+        self._bytes = total
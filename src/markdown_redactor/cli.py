@@ -1,13 +1,24 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import json
+import math
+import os
 import sys
-from collections.abc import Sequence
+import tempfile
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from .audit import AuditSink, BinaryAuditSink, JsonlAuditSink
+from .cache import ResultCache
+from .engine import RedactionEngine, merge_stats
 from .factory import create_default_engine
-from .types import RedactionConfig
+from .types import AuditEntry, RedactionConfig, RedactionStats
+
+_worker_engine: RedactionEngine | None = None
 
 
 def _expand_multi_values(values: Sequence[str] | None) -> tuple[str, ...]:
@@ -23,8 +34,30 @@ def _expand_multi_values(values: Sequence[str] | None) -> tuple[str, ...]:
 
 def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(prog="markdown-redactor")
-    parser.add_argument("input", nargs="?", default="-", help="Input markdown file or - for stdin")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="Input markdown file, directory, or - for stdin",
+    )
     parser.add_argument("-o", "--output", default="-", help="Output file or - for stdout")
+    parser.add_argument(
+        "--out-dir",
+        default=None,
+        help="Output directory when input is a directory; the input tree is mirrored",
+    )
+    parser.add_argument(
+        "--glob",
+        default="**/*.md",
+        help="File pattern to redact when input is a directory",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for directory mode",
+    )
     parser.add_argument("--mask", default="[REDACTED]", help="Replacement mask")
     parser.add_argument(
         "--replacement-mode",
@@ -47,6 +80,11 @@ def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
         action="append",
         help="Exact value to preserve; repeat or use comma-separated values",
     )
+    parser.add_argument(
+        "--allowlist-pattern",
+        action="append",
+        help="Regular expression whose matches are preserved; repeat for multiple patterns",
+    )
     parser.add_argument(
         "--enable-rule",
         action="append",
@@ -63,33 +101,209 @@ def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
         default=None,
         help="Only run rules at or above this risk level",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the persistent result cache; unchanged files are not redacted again",
+    )
+    parser.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=256 * 1024 * 1024,
+        help="Size limit of the result cache before least recently used entries are evicted",
+    )
+    parser.add_argument(
+        "--audit-out",
+        default=None,
+        help="Write an audit entry for every redaction to this file while redacting",
+    )
+    parser.add_argument(
+        "--audit-format",
+        choices=("jsonl", "binary"),
+        default="jsonl",
+        help="Format of the --audit-out file",
+    )
+    parser.add_argument(
+        "--regex-backend",
+        choices=("re", "re2"),
+        default="re",
+        help="Regex engine for rule patterns; patterns it cannot compile fall back to re",
+    )
     parser.add_argument("--stats", action="store_true", help="Print stats as JSON to stderr")
     return parser.parse_args(argv)
 
 
+def _create_engine(
+    cache_dir: str | None, cache_max_bytes: int, regex_backend: str
+) -> RedactionEngine:
+    cache = ResultCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir is not None else None
+    return create_default_engine(result_cache=cache, regex_backend=regex_backend)
+
+
+def _init_worker(cache_dir: str | None, cache_max_bytes: int, regex_backend: str) -> None:
+    global _worker_engine
+    _worker_engine = _create_engine(cache_dir, cache_max_bytes, regex_backend)
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as handle:
+            handle.write(content)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def _open_audit_sink(
+    path: str | None, audit_format: str
+) -> contextlib.AbstractContextManager[AuditSink | None]:
+    if path is None:
+        return contextlib.nullcontext()
+    if audit_format == "binary":
+        return BinaryAuditSink(path)
+    return JsonlAuditSink(path)
+
+
+def _redact_path(
+    source: Path, target: Path, config: RedactionConfig
+) -> tuple[RedactionStats, Sequence[AuditEntry]]:
+    assert _worker_engine is not None
+    result = _worker_engine.redact_file(source, config=config)
+    _write_atomic(target, result.content)
+    return result.stats, result.audit_log
+
+
+def _collect_stats(
+    outcomes: Iterable[tuple[RedactionStats, Sequence[AuditEntry]]],
+    sources: Sequence[Path],
+    audit_sink: AuditSink | None,
+) -> list[RedactionStats]:
+    stats: list[RedactionStats] = []
+    for (file_stats, audit_log), source in zip(outcomes, sources, strict=True):
+        if audit_sink is not None and audit_log:
+            audit_sink.write(audit_log, str(source))
+        stats.append(file_stats)
+    return stats
+
+
+def _percentile(values: Sequence[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * percent / 100))
+    return ordered[rank - 1]
+
+
+def _redact_directory(
+    input_dir: Path,
+    out_dir: Path,
+    pattern: str,
+    jobs: int,
+    config: RedactionConfig,
+    cache_dir: str | None,
+    cache_max_bytes: int,
+    regex_backend: str,
+    audit_sink: AuditSink | None,
+) -> tuple[int, RedactionStats, list[float]]:
+    start = time.perf_counter()
+    sources = sorted(
+        (path for path in input_dir.glob(pattern) if path.is_file()),
+        key=lambda path: -path.stat().st_size,
+    )
+    targets = [out_dir / path.relative_to(input_dir) for path in sources]
+    configs = [config] * len(sources)
+
+    if jobs > 1 and len(sources) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(sources)),
+            initializer=_init_worker,
+            initargs=(cache_dir, cache_max_bytes, regex_backend),
+        ) as executor:
+            chunksize = max(1, len(sources) // (jobs * 8))
+            outcomes = executor.map(_redact_path, sources, targets, configs, chunksize=chunksize)
+            stats = _collect_stats(outcomes, sources, audit_sink)
+    else:
+        _init_worker(cache_dir, cache_max_bytes, regex_backend)
+        stats = _collect_stats(map(_redact_path, sources, targets, configs), sources, audit_sink)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return (
+        len(sources),
+        merge_stats(stats, elapsed_ms=elapsed_ms),
+        [item.elapsed_ms for item in stats],
+    )
+
+
+def _stats_payload(stats: RedactionStats) -> dict[str, object]:
+    return {
+        "total_matches": stats.total_matches,
+        "rule_matches": stats.rule_matches,
+        "elapsed_ms": stats.elapsed_ms,
+        "source_bytes": stats.source_bytes,
+        "output_bytes": stats.output_bytes,
+        "regex_backend": stats.regex_backend,
+        "regex_fallbacks": list(stats.regex_fallbacks),
+    }
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     args = _parse_args(argv)
 
     try:
-        if args.input == "-":
-            source = sys.stdin.read()
-        else:
-            source = Path(args.input).read_text(encoding="utf-8")
-
-        engine = create_default_engine()
         config = RedactionConfig(
             mask=args.mask,
             replacement_mode=args.replacement_mode,
             skip_fenced_code_blocks=not args.redact_fenced_code_blocks,
             skip_inline_code=not args.redact_inline_code,
             allowlist=_expand_multi_values(args.allowlist),
+            allowlist_patterns=tuple(args.allowlist_pattern or ()),
             enabled_rule_names=(
                 _expand_multi_values(args.enable_rule) if args.enable_rule is not None else None
             ),
             disabled_rule_names=_expand_multi_values(args.disable_rule),
             min_risk_level=args.min_risk_level,
+            collect_audit_log=args.audit_out is not None,
         )
-        result = engine.redact(source, config=config)
+
+        if args.input != "-" and Path(args.input).is_dir():
+            if args.out_dir is None:
+                raise ValueError("--out-dir is required when input is a directory")
+            if args.output != "-":
+                raise ValueError("-o/--output cannot be used when input is a directory")
+            with _open_audit_sink(args.audit_out, args.audit_format) as audit_sink:
+                files, stats, file_ms = _redact_directory(
+                    Path(args.input),
+                    Path(args.out_dir),
+                    args.glob,
+                    args.jobs,
+                    config,
+                    args.cache_dir,
+                    args.cache_max_bytes,
+                    args.regex_backend,
+                    audit_sink,
+                )
+            if args.stats:
+                payload = {
+                    "files": files,
+                    **_stats_payload(stats),
+                    "file_ms_p50": _percentile(file_ms, 50),
+                    "file_ms_p99": _percentile(file_ms, 99),
+                }
+                sys.stderr.write(json.dumps(payload, separators=(",", ":")) + "\n")
+            return 0
+
+        if args.out_dir is not None:
+            raise ValueError("--out-dir can only be used when input is a directory")
+
+        engine = _create_engine(args.cache_dir, args.cache_max_bytes, args.regex_backend)
+        with _open_audit_sink(args.audit_out, args.audit_format) as audit_sink:
+            if args.input == "-":
+                result = engine.redact(sys.stdin.read(), config=config, audit_sink=audit_sink)
+            else:
+                result = engine.redact_file(args.input, config=config, audit_sink=audit_sink)
 
         if args.output == "-":
             sys.stdout.write(result.content)
@@ -97,13 +311,7 @@ def main(argv: Sequence[str] | None = None) -> int:
             Path(args.output).write_text(result.content, encoding="utf-8")
 
         if args.stats:
-            payload = {
-                "total_matches": result.stats.total_matches,
-                "rule_matches": result.stats.rule_matches,
-                "elapsed_ms": result.stats.elapsed_ms,
-                "source_bytes": result.stats.source_bytes,
-                "output_bytes": result.stats.output_bytes,
-            }
+            payload = _stats_payload(result.stats)
             sys.stderr.write(json.dumps(payload, separators=(",", ":")) + "\n")
 
         return 0
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from .allowlist import shifted_ranges
+from .types import RedactionSpan
+
+_SEPARATOR = "\n"
+
+
+@dataclass(slots=True)
+class DocumentText:
+    text: str
+    starts: list[int]
+    origins: list[int]
+    gaps: list[str]
+    protected: list[tuple[int, int]] = field(default_factory=list)
+
+    @classmethod
+    def build(
+        cls,
+        content: str,
+        ranges: Sequence[tuple[int, int]],
+        protected: Sequence[tuple[int, int]] = (),
+    ) -> DocumentText:
+        gaps: list[str] = []
+        starts: list[int] = []
+        position = 0
+        start = 0
+        for range_start, range_end in ranges:
+            gaps.append(content[position:range_start])
+            starts.append(start)
+            start += range_end - range_start + len(_SEPARATOR)
+            position = range_end
+        gaps.append(content[position:])
+        origins = [begin for begin, _ in ranges]
+        located: list[tuple[int, int]] = []
+        for protected_start, protected_end in protected:
+            index = bisect_right(origins, protected_start) - 1
+            shift = starts[index] - origins[index]
+            located.append((protected_start + shift, protected_end + shift))
+        return cls(
+            text=_SEPARATOR.join(content[begin:end] for begin, end in ranges),
+            starts=starts,
+            origins=origins,
+            gaps=gaps,
+            protected=located,
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def end(self, index: int) -> int:
+        if index + 1 < len(self.starts):
+            return self.starts[index + 1] - len(_SEPARATOR)
+        return len(self.text)
+
+    def piece(self, index: int) -> str:
+        return self.text[self.starts[index] : self.end(index)]
+
+    def piece_protected(self, index: int) -> list[tuple[int, int]]:
+        if not self.protected:
+            return []
+        protected = self.protected
+        start = self.starts[index]
+        end = self.end(index)
+        ranges: list[tuple[int, int]] = []
+        position = bisect_left(protected, (start, start))
+        while position < len(protected) and protected[position][0] < end:
+            protected_start, protected_end = protected[position]
+            ranges.append((protected_start - start, protected_end - start))
+            position += 1
+        return ranges
+
+    def locate(self, spans: Sequence[RedactionSpan]) -> list[int] | None:
+        starts = self.starts
+        last = len(starts) - 1
+        text_end = len(self.text)
+        separator = len(_SEPARATOR)
+        indices: list[int] = []
+        for span in spans:
+            index = bisect_right(starts, span.start) - 1
+            end = starts[index + 1] - separator if index < last else text_end
+            if index < 0 or span.end > end:
+                return None
+            indices.append(index)
+        return indices
+
+    def apply(self, spans: Sequence[RedactionSpan], indices: Sequence[int]) -> None:
+        if not spans:
+            return
+        parts: list[str] = []
+        deltas = dict.fromkeys(indices, 0)
+        position = 0
+        for span, index in zip(spans, indices, strict=True):
+            parts.append(self.text[position : span.start])
+            parts.append(span.replacement)
+            position = span.end
+            deltas[index] += len(span.replacement) - (span.end - span.start)
+        parts.append(self.text[position:])
+        self.text = "".join(parts)
+        if self.protected:
+            self.protected = shifted_ranges(self.protected, spans)
+
+        shift = 0
+        starts = self.starts
+        for index in range(indices[0], len(starts)):
+            starts[index] += shift
+            shift += deltas.get(index, 0)
+
+    def replace(
+        self,
+        pieces: Sequence[str],
+        protected: Sequence[Sequence[tuple[int, int]]] = (),
+    ) -> None:
+        starts: list[int] = []
+        start = 0
+        for piece in pieces:
+            starts.append(start)
+            start += len(piece) + len(_SEPARATOR)
+        self.text = _SEPARATOR.join(pieces)
+        self.starts = starts
+        self.protected = [
+            (starts[index] + protected_start, starts[index] + protected_end)
+            for index, ranges in enumerate(protected)
+            for protected_start, protected_end in ranges
+        ]
+
+    def render(self) -> str:
+        parts = [self.gaps[0]]
+        for index, gap in enumerate(self.gaps[1:]):
+            parts.append(self.piece(index))
+            parts.append(gap)
+        return "".join(parts)
@@ -1,88 +1,940 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import io
+import os
+import re
+import threading
 import time
-from collections import defaultdict
+import weakref
+from collections import OrderedDict, defaultdict
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from itertools import pairwise
 from pathlib import Path
+from typing import TypeVar, cast
 
-from .markdown import segment_markdown
+from .allowlist import shifted_ranges, unprotected_spans
+from .audit import AuditLog, AuditSink
+from .backends import STDLIB_BACKEND, RegexBackend, resolve_regex_backend
+from .cache import CachedSegment, ResultCache, SegmentCache
+from .document import DocumentText
+from .markdown import Segment, iter_segments, segment_markdown
+from .offsets import Edit, OffsetMap
+from .plan import PlannedRegexRule, PlanStep, RedactionPlan, build_plan
+from .prefilter import RulePrefilter, segment_features
 from .registry import RuleRegistry
+from .rules import (
+    _DOCUMENT_SAFE_PATTERNS,
+    _PRIVATE_KEY_PATTERN,
+    CredentialUriRule,
+    CreditCardRule,
+    LabelValueRule,
+    PhoneRule,
+    RegexRule,
+    SecretAssignmentRule,
+)
+from .scanner import FusedRegexScanner
+from .spans import apply_spans, resolve_overlaps
+from .stream import (
+    _LINE_BREAKS,
+    AsyncRedactionStream,
+    ChunkBridge,
+    Readable,
+    RedactionStream,
+    Writable,
+    iter_chunks,
+    iter_lines,
+    iter_mapped_chunks,
+    take_chunks,
+)
 from .types import (
     _RISK_RANK,
-    AuditEntry,
+    BatchRedactionResult,
+    BatchSpanRedactionRule,
     RedactionConfig,
     RedactionResult,
     RedactionRule,
+    RedactionSpan,
     RedactionStats,
     RuleContext,
+    RuleTiming,
+    SpanRedactionRule,
+)
+
+_PLAN_CACHE_SIZE = 32
+_STREAM_BUFFER_CHARS = 1 << 20
+_PARALLEL_MIN_CHARS = 1 << 20
+_ASYNC_SLICE_CHARS = 1 << 16
+_AUDIT_FLUSH_ENTRIES = 4096
+_FENCE_AHEAD = re.compile(r"\s*(?:```|~~~)")
+
+_DocumentRunner = (
+    FusedRegexScanner
+    | RegexRule
+    | CreditCardRule
+    | CredentialUriRule
+    | LabelValueRule
+    | PhoneRule
+    | SecretAssignmentRule
 )
+_DOCUMENT_RULE_TYPES: frozenset[type] = frozenset(
+    {RegexRule, CreditCardRule, CredentialUriRule, LabelValueRule, PhoneRule, SecretAssignmentRule}
+)
+
+_T = TypeVar("_T")
+
+
+@dataclass(slots=True)
+class _Timings:
+    rules: dict[str, list[int]] = field(default_factory=dict)
+    segmentation_ns: int = 0
+    allowlist_ns: int = 0
+
+    def record(self, name: str, elapsed_ns: int, chars: int, matches: int) -> None:
+        entry = self.rules.get(name)
+        if entry is None:
+            entry = self.rules[name] = [0, 0, 0, 0]
+        entry[0] += 1
+        entry[1] += elapsed_ns
+        entry[2] += chars
+        entry[3] += matches
+
+    def merge(self, other: _Timings) -> None:
+        for name, (invocations, elapsed_ns, chars, matches) in other.rules.items():
+            entry = self.rules.setdefault(name, [0, 0, 0, 0])
+            entry[0] += invocations
+            entry[1] += elapsed_ns
+            entry[2] += chars
+            entry[3] += matches
+        self.segmentation_ns += other.segmentation_ns
+        self.allowlist_ns += other.allowlist_ns
+
+    def rule_timings(self) -> dict[str, RuleTiming]:
+        return {
+            name: RuleTiming(
+                invocations=invocations,
+                elapsed_ms=elapsed_ns / 1_000_000,
+                chars_scanned=chars,
+                matches=matches,
+            )
+            for name, (invocations, elapsed_ns, chars, matches) in self.rules.items()
+        }
+
+
+def _timed_segments(segments: Iterable[Segment], timings: _Timings | None) -> Iterator[Segment]:
+    if timings is None:
+        yield from segments
+        return
+    iterator = iter(segments)
+    while True:
+        started = time.perf_counter_ns()
+        segment = next(iterator, None)
+        timings.segmentation_ns += time.perf_counter_ns() - started
+        if segment is None:
+            return
+        yield segment
+
+
+def _step_name(step: PlanStep) -> str:
+    if isinstance(step, FusedRegexScanner):
+        return "+".join(rule.name for rule in step.rules)
+    return step.name
+
+
+def _step_size(step: PlanStep) -> int:
+    if isinstance(step, FusedRegexScanner):
+        return len(step.rules)
+    return 1
+
+
+def _step_rules(step: object) -> tuple[object, ...]:
+    if isinstance(step, FusedRegexScanner):
+        return step.rules
+    if isinstance(step, PlannedRegexRule):
+        return (step.rule,)
+    return (step,)
+
+
+def _prefilter_probe(rules: Sequence[object], content: str, features: int) -> tuple[int, int]:
+    # The document's features before a step plus a bit per rule of the step whose
+    # anchors it contains. OR-ing the probes of all shards gives the probe of the whole
+    # document, so shards can report the skips a sequential run would count.
+    anchored = 0
+    for index, rule in enumerate(rules):
+        prefilter: RulePrefilter | None = getattr(rule, "prefilter", None)
+        if prefilter is None or prefilter.has_anchor(content):
+            anchored |= 1 << index
+    return features, anchored
+
+
+def _probed_skips(plan: RedactionPlan, shards: Sequence[Sequence[tuple[int, int]]]) -> int:
+    probed = [shard for shard in shards if shard]
+    if not probed:
+        return 0
+    skipped = 0
+    for index, step in enumerate(plan.steps):
+        features = anchored = 0
+        for shard in probed:
+            features |= shard[index][0]
+            anchored |= shard[index][1]
+        for position, rule in enumerate(_step_rules(step)):
+            prefilter: RulePrefilter | None = getattr(rule, "prefilter", None)
+            if prefilter is not None and not (
+                anchored >> position & 1 and prefilter.has_classes(features)
+            ):
+                skipped += 1
+    return skipped
+
+
+def _context_key(context: RuleContext) -> str:
+    return f"{context.file_path!r}:{sorted(context.metadata.items())!r}"
+
+
+def _result_fingerprint(plan: RedactionPlan, encoding: str, context: RuleContext) -> str:
+    # Rules may read the context, so its file path and metadata are part of the key.
+    return f"{plan.fingerprint}:{encoding}:{_context_key(context)}"
+
+
+def _segment_fingerprint(plan: RedactionPlan, context: RuleContext) -> str:
+    # Built-in rules never read the context (replacement callables only receive the
+    # match), so their segments are shared across files and metadata. Any other
+    # rule may, and then the context is part of the key.
+    if all(type(rule) in _DOCUMENT_RULE_TYPES for rule in plan.rules):
+        return plan.fingerprint
+    return f"{plan.fingerprint}:{_context_key(context)}"
+
+
+def _prefiltered(rule: object, pieces: Sequence[str]) -> list[int]:
+    prefilter: RulePrefilter | None = getattr(rule, "prefilter", None)
+    if prefilter is None:
+        return list(range(len(pieces)))
+    return [
+        index
+        for index, piece in enumerate(pieces)
+        if prefilter.may_match(piece, segment_features(piece))
+    ]
+
+
+def _piece_context(context: RuleContext, audit: _DocumentAudit | None, start: int) -> RuleContext:
+    return RuleContext(
+        file_path=context.file_path,
+        metadata=context.metadata,
+        audit_entries=audit.log if audit is not None else None,
+        segment_start=start,
+    )
+
+
+def _document_runner(step: object, origin: object) -> _DocumentRunner | None:
+    # `origin` is the step before the regex backend recompiled it; built-in patterns
+    # are recognised by identity, so safety is checked on it.
+    if isinstance(step, PlannedRegexRule):
+        step = step.rule
+    if isinstance(step, FusedRegexScanner):
+        if all(_document_safe(rule) for rule in step.rules):
+            return step
+        return None
+    if isinstance(
+        step,
+        RegexRule
+        | CreditCardRule
+        | CredentialUriRule
+        | LabelValueRule
+        | PhoneRule
+        | SecretAssignmentRule,
+    ) and _document_safe(origin):
+        return step
+    return None
+
+
+def _document_safe(rule: object) -> bool:
+    if type(rule) not in _DOCUMENT_RULE_TYPES:
+        return False
+    if isinstance(rule, RegexRule) and callable(rule.replacement):
+        return False
+    return getattr(rule, "pattern", None) in _DOCUMENT_SAFE_PATTERNS
+
+
+def _redact_guarded(
+    step: PlanStep,
+    content: str,
+    protected: list[tuple[int, int]],
+    config: RedactionConfig,
+    context: RuleContext,
+) -> tuple[str, dict[str, int]]:
+    # Runs a step on text holding allowlisted ranges and moves the ranges along with
+    # the replacements.
+    counts: dict[str, int] = {}
+    if isinstance(step, FusedRegexScanner):
+        found = step.find_spans(content, config, context)
+        if found is None:
+            log = context.audit_entries if isinstance(context.audit_entries, AuditLog) else None
+            offsets = OffsetMap()
+            for rule in step.rules:
+                recorded = len(log) if log is not None else 0
+                before = content
+                content, rule_counts = _redact_guarded(
+                    cast(RedactionRule, rule), content, protected, config, context
+                )
+                if log is not None:
+                    log.track(recorded, context.segment_start, offsets, before, content)
+                for name, count in rule_counts.items():
+                    counts[name] = counts.get(name, 0) + count
+            return content, counts
+    else:
+        find_spans = getattr(
+            step.rule if isinstance(step, PlannedRegexRule) else step, "find_spans", None
+        )
+        if find_spans is None:
+            content, count = _redact_gaps(step, content, protected, config, context)
+            return content, {step.name: count} if count else counts
+        found = find_spans(content, config, context)
+    spans = unprotected_spans(found, protected, content, config)
+    for span in spans:
+        counts[span.rule_name] = counts.get(span.rule_name, 0) + 1
+    protected[:] = shifted_ranges(protected, spans)
+    return apply_spans(content, spans, context), counts
+
+
+def _redact_gaps(
+    rule: RedactionRule | PlannedRegexRule,
+    content: str,
+    protected: list[tuple[int, int]],
+    config: RedactionConfig,
+    context: RuleContext,
+) -> tuple[str, int]:
+    # Rules without find_spans only rewrite text, so they run on the text between
+    # protected ranges.
+    parts: list[str] = []
+    ranges: list[tuple[int, int]] = []
+    length = position = total = 0
+    for start, end in [*protected, (len(content), len(content))]:
+        if start > position:
+            gap, count = rule.redact(
+                content[position:start],
+                config,
+                replace(context, segment_start=context.segment_start + position),
+            )
+            parts.append(gap)
+            length += len(gap)
+            total += count
+        if end > start:
+            parts.append(content[start:end])
+            ranges.append((length, length + end - start))
+            length += end - start
+        position = end
+    protected[:] = ranges
+    return "".join(parts), total
+
+
+@dataclass(slots=True)
+class _DocumentAudit:
+    log: AuditLog = field(default_factory=AuditLog)
+    pieces: list[int] = field(default_factory=list)
+    offsets: defaultdict[int, OffsetMap] = field(default_factory=lambda: defaultdict(OffsetMap))
+
+    def record(
+        self,
+        document: DocumentText,
+        spans: Sequence[RedactionSpan],
+        indices: Sequence[int],
+        base: int,
+    ) -> None:
+        edits: defaultdict[int, list[Edit]] = defaultdict(list)
+        for span, index in zip(spans, indices, strict=True):
+            start = span.start - document.starts[index]
+            end = start + span.end - span.start
+            origin_start, origin_end = self.offsets[index].origin(start, end)
+            origin = base + document.origins[index]
+            self.log.record(
+                span.rule_name,
+                origin + origin_start,
+                origin + origin_end,
+                document.text[span.start : span.end],
+                span.replacement,
+            )
+            edits[index].append((start, end, len(span.replacement)))
+        for index, piece_edits in edits.items():
+            self.offsets[index].apply(piece_edits)
+        self.pieces.extend(indices)
+
+    def track(self, index: int, recorded: int, base: int, before: str, after: str) -> None:
+        self.log.track(recorded, base, self.offsets[index], before, after)
+        self.pieces.extend([index] * (len(self.log) - recorded))
+
+    def ordered(self) -> AuditLog:
+        pieces = self.pieces
+        if all(left <= right for left, right in pairwise(pieces)):
+            return self.log
+        return self.log.take(sorted(range(len(pieces)), key=pieces.__getitem__))
+
+
+def _new_timings(
+    plan: RedactionPlan, profile_hook: Callable[[RedactionStats], None] | None
+) -> _Timings | None:
+    if plan.config.collect_rule_timings or profile_hook is not None:
+        return _Timings()
+    return None
+
+
+def _checked_sink(plan: RedactionPlan, audit_sink: AuditSink | None) -> AuditSink | None:
+    if audit_sink is not None and not plan.config.collect_audit_log:
+        raise ValueError("audit_sink requires collect_audit_log=True")
+    return audit_sink
+
+
+@dataclass(slots=True)
+class _RunState:
+    rule_counts: defaultdict[str, int] = field(default_factory=lambda: defaultdict(int))
+    audit_log: AuditLog = field(default_factory=AuditLog)
+    skipped_rule_invocations: int = 0
+    offset: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    timings: _Timings | None = None
+    audit_sink: AuditSink | None = None
+    audit_source: str | None = None
+    prefilter_probes: list[tuple[int, int]] | None = None
+
+    def flush_audit(self, *, final: bool = False) -> None:
+        sink = self.audit_sink
+        if sink is None or not (final or len(self.audit_log) >= _AUDIT_FLUSH_ENTRIES):
+            return
+        if self.audit_log:
+            sink.write(self.audit_log, self.audit_source)
+            self.audit_log = AuditLog()
+
+    def absorb(self, cached: CachedSegment, offset: int) -> None:
+        for name, count in cached.rule_counts:
+            self.rule_counts[name] += count
+        self.skipped_rule_invocations += cached.skipped_rule_invocations
+        self.audit_log.merge(cached.audit_log, offset)
+
+    def stats(
+        self, start: float, plan: RedactionPlan, *, source_bytes: int, output_bytes: int
+    ) -> RedactionStats:
+        return RedactionStats(
+            total_matches=sum(self.rule_counts.values()),
+            rule_matches=dict(self.rule_counts),
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            source_bytes=source_bytes,
+            output_bytes=output_bytes,
+            skipped_rule_invocations=self.skipped_rule_invocations,
+            cache_hits=self.cache_hits,
+            cache_misses=self.cache_misses,
+            rule_timings=self.timings.rule_timings() if self.timings is not None else {},
+            segmentation_ms=(
+                self.timings.segmentation_ns / 1_000_000 if self.timings is not None else 0.0
+            ),
+            allowlist_ms=self.timings.allowlist_ns / 1_000_000 if self.timings is not None else 0.0,
+            regex_backend=plan.regex_backend,
+            regex_fallbacks=plan.regex_fallbacks,
+        )
+
+
+def merge_stats(stats: Iterable[RedactionStats], *, elapsed_ms: float) -> RedactionStats:
+    rule_counts: defaultdict[str, int] = defaultdict(int)
+    total_matches = source_bytes = output_bytes = skipped = cache_hits = cache_misses = 0
+    segmentation_ms = allowlist_ms = 0.0
+    rule_timings: dict[str, RuleTiming] = {}
+    regex_backend = STDLIB_BACKEND
+    regex_fallbacks: dict[str, None] = {}
+    for item in stats:
+        regex_backend = item.regex_backend
+        regex_fallbacks.update(dict.fromkeys(item.regex_fallbacks))
+        total_matches += item.total_matches
+        source_bytes += item.source_bytes
+        output_bytes += item.output_bytes
+        skipped += item.skipped_rule_invocations
+        cache_hits += item.cache_hits
+        cache_misses += item.cache_misses
+        segmentation_ms += item.segmentation_ms
+        allowlist_ms += item.allowlist_ms
+        for name, count in item.rule_matches.items():
+            rule_counts[name] += count
+        for name, timing in item.rule_timings.items():
+            previous = rule_timings.get(name)
+            rule_timings[name] = (
+                timing
+                if previous is None
+                else RuleTiming(
+                    invocations=previous.invocations + timing.invocations,
+                    elapsed_ms=previous.elapsed_ms + timing.elapsed_ms,
+                    chars_scanned=previous.chars_scanned + timing.chars_scanned,
+                    matches=previous.matches + timing.matches,
+                )
+            )
+    return RedactionStats(
+        total_matches=total_matches,
+        rule_matches=dict(rule_counts),
+        elapsed_ms=elapsed_ms,
+        source_bytes=source_bytes,
+        output_bytes=output_bytes,
+        skipped_rule_invocations=skipped,
+        cache_hits=cache_hits,
+        cache_misses=cache_misses,
+        rule_timings=rule_timings,
+        segmentation_ms=segmentation_ms,
+        allowlist_ms=allowlist_ms,
+        regex_backend=regex_backend,
+        regex_fallbacks=tuple(regex_fallbacks),
+    )
+
+
+_worker_engine: RedactionEngine | None = None
+
+
+def _init_worker(
+    rules: tuple[RedactionRule, ...],
+    config: RedactionConfig | None,
+    regex_backend: RegexBackend | None,
+) -> None:
+    global _worker_engine
+    registry = RuleRegistry()
+    registry.extend(rules)
+    _worker_engine = RedactionEngine(
+        registry=registry, regex_backend=regex_backend or STDLIB_BACKEND
+    )
+    _worker_engine.warm(config)
+
+
+def _redact_task(
+    index: int,
+    content: str,
+    config: RedactionConfig | None,
+    context: RuleContext | None,
+) -> tuple[int, RedactionResult]:
+    assert _worker_engine is not None
+    return index, _worker_engine.redact(content, config=config, context=context)
+
+
+@dataclass(slots=True)
+class _ShardResult:
+    text: str
+    rule_counts: dict[str, int]
+    skipped_rule_invocations: int
+    audit_log: AuditLog
+    timings: _Timings | None
+    # Prefilter probes stand in for skip counts a shard cannot know on its own: those
+    # of the whole document in document scope, else those of the segments a bound
+    # cuts in two, at the shard's head and tail. `within` marks a shard lying inside
+    # one cut segment.
+    probes: list[tuple[int, int]] | None = None
+    head_probes: list[tuple[int, int]] | None = None
+    tail_probes: list[tuple[int, int]] | None = None
+    within: bool = False
+
+
+def _redact_shard_task(
+    content: str,
+    offset: int,
+    config: RedactionConfig,
+    context: RuleContext,
+    timed: bool,
+    edges: tuple[bool, bool],
+) -> _ShardResult:
+    assert _worker_engine is not None
+    engine = _worker_engine
+    plan = engine._resolve_plan(config, None)
+    state = _RunState(offset=offset, timings=_Timings() if timed else None)
+    head, tail = edges
+    if config.rule_scope == "document" or plan.batched or not (head or tail):
+        if config.rule_scope == "document":
+            state.prefilter_probes = []
+        text = engine._redact_text(content, plan, context, state)
+        return _ShardResult(
+            text=text,
+            rule_counts=dict(state.rule_counts),
+            skipped_rule_invocations=state.skipped_rule_invocations,
+            audit_log=state.audit_log,
+            timings=state.timings,
+            probes=state.prefilter_probes,
+        )
+
+    segments = list(
+        segment_markdown(
+            content,
+            skip_fenced_code_blocks=config.skip_fenced_code_blocks,
+            skip_inline_code=config.skip_inline_code,
+            merge_lines=_merge_lines(plan),
+        )
+    )
+    result = _ShardResult(
+        text="",
+        rule_counts={},
+        skipped_rule_invocations=0,
+        audit_log=state.audit_log,
+        timings=state.timings,
+        within=head and tail and len(segments) == 1,
+    )
+    output: list[str] = []
+    last = len(segments) - 1
+    for index, segment in enumerate(_timed_segments(iter(segments), state.timings)):
+        if not (head and index == 0 or tail and index == last):
+            engine._redact_segment(segment, plan, context, state, output)
+            continue
+        skipped = state.skipped_rule_invocations
+        state.prefilter_probes = []
+        engine._redact_segment(segment, plan, context, state, output)
+        if head and index == 0:
+            result.head_probes = state.prefilter_probes
+        if tail and index == last:
+            result.tail_probes = state.prefilter_probes
+        state.prefilter_probes = None
+        state.skipped_rule_invocations = skipped
+    result.text = "".join(output)
+    result.rule_counts = dict(state.rule_counts)
+    result.skipped_rule_invocations = state.skipped_rule_invocations
+    return result
+
+
+def _line_cuts_allowed(plan: RedactionPlan) -> bool:
+    # Built-in patterns other than private_key never reach across a line break, so a
+    # segment can be cut at any line start outside a private key when no other rule or
+    # allowlist entry might.
+    allowlist = plan.allowlist
+    if allowlist is not None and (
+        allowlist.patterns or any("\n" in value for value in allowlist.values)
+    ):
+        return False
+    return all(_document_safe(rule) for rule in plan.rules)
+
+
+def _merge_lines(plan: RedactionPlan) -> bool:
+    # Inline-code skipping used to yield one segment per line; adjacent lines are only
+    # merged when no rule or allowlist entry could tell the difference.
+    return not plan.config.skip_inline_code or _line_cuts_allowed(plan)
+
+
+def _shard_bounds(content: str, plan: RedactionPlan, shards: int) -> tuple[list[int], list[bool]]:
+    # Returns the bounds and, for each, whether it cuts a segment in two.
+    config = plan.config
+    target = len(content) // shards
+    bounds = [0]
+    cuts = [False]
+    offset = 0
+    keys = (
+        [match.span() for match in _PRIVATE_KEY_PATTERN.finditer(content)]
+        if _line_cuts_allowed(plan)
+        else None
+    )
+    for segment in segment_markdown(
+        content,
+        skip_fenced_code_blocks=config.skip_fenced_code_blocks,
+        skip_inline_code=config.skip_inline_code,
+        merge_lines=_merge_lines(plan),
+    ):
+        start = offset
+        offset += len(segment.text)
+        if keys is not None and segment.redactable:
+            position = start
+            while offset - bounds[-1] > target:
+                line_end = content.find("\n", max(position, bounds[-1] + target - 1), offset - 1)
+                if line_end < 0:
+                    break
+                cut = line_end + 1
+                inside = [end for key_start, end in keys if key_start < cut < end]
+                if inside:
+                    position = inside[0]
+                    continue
+                bounds.append(cut)
+                cuts.append(True)
+                position = cut
+        if (
+            offset - bounds[-1] >= target
+            and offset < len(content)
+            and (content[offset - 1] in _LINE_BREAKS or _FENCE_AHEAD.match(content, offset) is None)
+        ):
+            bounds.append(offset)
+            cuts.append(False)
+    bounds.append(len(content))
+    cuts.append(False)
+    return bounds, cuts
 
 
 class RedactionEngine:
-    def __init__(self, registry: RuleRegistry | None = None) -> None:
+    def __init__(
+        self,
+        registry: RuleRegistry | None = None,
+        *,
+        executor: Executor | None = None,
+        max_concurrency: int | None = None,
+        segment_cache_bytes: int | None = None,
+        result_cache: ResultCache | None = None,
+        regex_backend: str | RegexBackend = STDLIB_BACKEND,
+    ) -> None:
         self._registry = registry if registry is not None else RuleRegistry()
+        self._regex_backend = resolve_regex_backend(regex_backend)
+        self._plan_cache: OrderedDict[RedactionConfig, RedactionPlan] = OrderedDict()
+        self._plan_cache_version = self._registry.version
+        self._plan_lock = threading.Lock()
+        self._executor = executor
+        self._result_cache = result_cache
+        self._segment_cache = (
+            SegmentCache(segment_cache_bytes) if segment_cache_bytes is not None else None
+        )
+        self._max_concurrency = max_concurrency
+        self._async_limits: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
 
     @property
     def registry(self) -> RuleRegistry:
         return self._registry
 
+    @property
+    def segment_cache(self) -> SegmentCache | None:
+        return self._segment_cache
+
+    @property
+    def result_cache(self) -> ResultCache | None:
+        return self._result_cache
+
+    def compile(self, config: RedactionConfig | None = None) -> RedactionPlan:
+        active_config = config if config is not None else RedactionConfig()
+        return build_plan(self._active_rules(active_config), active_config, self._regex_backend)
+
+    def warm(self, config: RedactionConfig | None = None) -> None:
+        for rule in self._resolve_plan(config, None).rules:
+            warm: Callable[[], None] | None = getattr(rule, "warm", None)
+            if warm is not None:
+                warm()
+
     def redact(
         self,
         content: str,
         *,
         config: RedactionConfig | None = None,
         context: RuleContext | None = None,
+        plan: RedactionPlan | None = None,
+        workers: int = 1,
+        profile_hook: Callable[[RedactionStats], None] | None = None,
+        audit_sink: AuditSink | None = None,
     ) -> RedactionResult:
-        active_config = config if config is not None else RedactionConfig()
+        start = time.perf_counter()
+        active_plan = self._resolve_plan(config, plan)
         active_context = context if context is not None else RuleContext()
+        state = _RunState(
+            timings=_new_timings(active_plan, profile_hook),
+            audit_sink=_checked_sink(active_plan, audit_sink),
+            audit_source=active_context.file_path,
+        )
 
-        start = time.perf_counter()
-        rule_counts: defaultdict[str, int] = defaultdict(int)
-        output: list[str] = []
-        active_rules = self._active_rules(active_config)
-        all_audit: list[AuditEntry] = []
-        content_offset = 0
+        if workers > 1 and len(content) >= _PARALLEL_MIN_CHARS:
+            redacted_content = self._redact_sharded(
+                content, active_plan, active_context, state, workers
+            )
+        else:
+            redacted_content = self._redact_text(content, active_plan, active_context, state)
+        state.flush_audit(final=True)
 
-        for segment in segment_markdown(
-            content,
-            skip_fenced_code_blocks=active_config.skip_fenced_code_blocks,
-            skip_inline_code=active_config.skip_inline_code,
-        ):
-            if not segment.redactable:
-                content_offset += len(segment.text)
-                output.append(segment.text)
-                continue
+        stats = state.stats(
+            start,
+            active_plan,
+            source_bytes=len(content.encode("utf-8")),
+            output_bytes=len(redacted_content.encode("utf-8")),
+        )
+        if profile_hook is not None:
+            profile_hook(stats)
+        return RedactionResult(
+            content=redacted_content,
+            stats=stats,
+            audit_log=state.audit_log,
+        )
 
-            seg_context = RuleContext(
-                file_path=active_context.file_path,
-                metadata=active_context.metadata,
-                audit_entries=all_audit if active_config.collect_audit_log else None,
-                segment_start=content_offset,
-            )
-            updated, placeholders = self._protect_allowlist(segment.text, active_config)
-            for rule in active_rules:
-                updated, count = rule.redact(updated, active_config, seg_context)
-                if count:
-                    rule_counts[rule.name] += count
-            updated = self._restore_allowlist(updated, placeholders)
-            output.append(updated)
-            content_offset += len(segment.text)
+    def iter_redact(
+        self,
+        source: Readable | Iterable[str],
+        *,
+        config: RedactionConfig | None = None,
+        context: RuleContext | None = None,
+        plan: RedactionPlan | None = None,
+        max_buffer_chars: int = _STREAM_BUFFER_CHARS,
+        audit_sink: AuditSink | None = None,
+    ) -> RedactionStream:
+        active_plan = self._resolve_plan(config, plan)
+        active_context = context if context is not None else RuleContext()
+        return self._stream(
+            iter_lines(iter_chunks(source)),
+            active_plan,
+            active_context,
+            max_buffer_chars=max_buffer_chars,
+            audit_sink=_checked_sink(active_plan, audit_sink),
+        )
 
-        redacted_content = "".join(output)
-        elapsed_ms = (time.perf_counter() - start) * 1000
-        total_matches = sum(rule_counts.values())
+    def redact_stream(
+        self,
+        source: Readable | Iterable[str],
+        sink: Writable,
+        *,
+        config: RedactionConfig | None = None,
+        context: RuleContext | None = None,
+        plan: RedactionPlan | None = None,
+        max_buffer_chars: int = _STREAM_BUFFER_CHARS,
+        audit_sink: AuditSink | None = None,
+    ) -> RedactionStats:
+        stream = self.iter_redact(
+            source,
+            config=config,
+            context=context,
+            plan=plan,
+            max_buffer_chars=max_buffer_chars,
+            audit_sink=audit_sink,
+        )
+        for chunk in stream:
+            sink.write(chunk)
+        assert stream.stats is not None
+        return stream.stats
 
+    async def aredact(
+        self,
+        content: str,
+        *,
+        config: RedactionConfig | None = None,
+        context: RuleContext | None = None,
+        plan: RedactionPlan | None = None,
+    ) -> RedactionResult:
+        async with self._async_slot():
+            start = time.perf_counter()
+            active_plan = self._resolve_plan(config, plan)
+            active_context = context if context is not None else RuleContext()
+            state = _RunState(timings=_new_timings(active_plan, None))
+            output: list[str] = []
+            segments = _timed_segments(
+                segment_markdown(
+                    content,
+                    skip_fenced_code_blocks=active_plan.config.skip_fenced_code_blocks,
+                    skip_inline_code=active_plan.config.skip_inline_code,
+                    merge_lines=_merge_lines(active_plan),
+                ),
+                state.timings,
+            )
+            while not await self._in_executor(
+                self._redact_slice, segments, active_plan, active_context, state, output
+            ):
+                pass
+
+        redacted_content = "".join(output)
         return RedactionResult(
             content=redacted_content,
-            stats=RedactionStats(
-                total_matches=total_matches,
-                rule_matches=dict(rule_counts),
-                elapsed_ms=elapsed_ms,
+            stats=state.stats(
+                start,
+                active_plan,
                 source_bytes=len(content.encode("utf-8")),
                 output_bytes=len(redacted_content.encode("utf-8")),
             ),
-            audit_log=tuple(all_audit),
+            audit_log=state.audit_log,
         )
 
+    async def aredact_file(
+        self,
+        file_path: str | Path,
+        *,
+        config: RedactionConfig | None = None,
+        context: RuleContext | None = None,
+        encoding: str = "utf-8",
+        plan: RedactionPlan | None = None,
+    ) -> RedactionResult:
+        path = Path(file_path)
+        source = await asyncio.to_thread(path.read_text, encoding=encoding)
+        active_context = self._context_with_file_path(context, str(path))
+        return await self.aredact(source, config=config, context=active_context, plan=plan)
+
+    def aiter_redact(
+        self,
+        source: Readable | Iterable[str] | AsyncIterable[str],
+        *,
+        config: RedactionConfig | None = None,
+        context: RuleContext | None = None,
+        plan: RedactionPlan | None = None,
+        max_buffer_chars: int = _STREAM_BUFFER_CHARS,
+    ) -> AsyncRedactionStream:
+        active_plan = self._resolve_plan(config, plan)
+        active_context = context if context is not None else RuleContext()
+        bridge = ChunkBridge() if isinstance(source, AsyncIterable) else None
+        chunks = iter(bridge) if bridge is not None else iter_chunks(source)  # type: ignore[arg-type]
+        stream = self._stream(
+            iter_lines(chunks),
+            active_plan,
+            active_context,
+            max_buffer_chars=max_buffer_chars,
+        )
+
+        async def generate() -> AsyncIterator[str]:
+            pump = (
+                asyncio.ensure_future(bridge.pump(source))  # type: ignore[arg-type]
+                if bridge is not None
+                else None
+            )
+            try:
+                async with self._async_slot():
+                    while batch := await self._in_executor(take_chunks, stream, _ASYNC_SLICE_CHARS):
+                        for chunk in batch:
+                            yield chunk
+            finally:
+                if pump is not None:
+                    pump.cancel()
+
+        return AsyncRedactionStream(generate(), stream)
+
+    def redact_many(
+        self,
+        documents: Iterable[str],
+        *,
+        config: RedactionConfig | None = None,
+        context: RuleContext | None = None,
+        workers: int | None = None,
+    ) -> BatchRedactionResult:
+        start = time.perf_counter()
+        documents = list(documents)
+        results: list[RedactionResult | None] = [None] * len(documents)
+        for index, result in self.iter_redact_many(
+            documents, config=config, context=context, workers=workers
+        ):
+            results[index] = result
+        completed = tuple(result for result in results if result is not None)
+        return BatchRedactionResult(
+            results=completed,
+            stats=merge_stats(
+                (result.stats for result in completed),
+                elapsed_ms=(time.perf_counter() - start) * 1000,
+            ),
+        )
+
+    def iter_redact_many(
+        self,
+        documents: Iterable[str],
+        *,
+        config: RedactionConfig | None = None,
+        context: RuleContext | None = None,
+        workers: int | None = None,
+    ) -> Iterator[tuple[int, RedactionResult]]:
+        documents = list(documents)
+        max_workers = min(workers or os.cpu_count() or 1, len(documents))
+        if max_workers <= 1:
+            for index, content in enumerate(documents):
+                yield index, self.redact(content, config=config, context=context)
+            return
+
+        order = sorted(range(len(documents)), key=lambda index: -len(documents[index]))
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(self._registry.list_rules(), config, self._regex_backend),
+        )
+        try:
+            futures = [
+                executor.submit(_redact_task, index, documents[index], config, context)
+                for index in order
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def redact_file(
         self,
         file_path: str | Path,
@@ -90,11 +942,59 @@ class RedactionEngine:
         config: RedactionConfig | None = None,
         context: RuleContext | None = None,
         encoding: str = "utf-8",
+        plan: RedactionPlan | None = None,
+        mmap: bool = False,
+        workers: int = 1,
+        profile_hook: Callable[[RedactionStats], None] | None = None,
+        audit_sink: AuditSink | None = None,
     ) -> RedactionResult:
         path = Path(file_path)
-        source = path.read_text(encoding=encoding)
+        if mmap:
+            return self._redact_mapped(
+                path,
+                None,
+                config=config,
+                context=context,
+                encoding=encoding,
+                plan=plan,
+                profile_hook=profile_hook,
+                audit_sink=audit_sink,
+            )
         active_context = self._context_with_file_path(context, str(path))
-        return self.redact(source, config=config, context=active_context)
+        cache = self._result_cache
+        if cache is None or audit_sink is not None:
+            source = path.read_text(encoding=encoding)
+            return self.redact(
+                source,
+                config=config,
+                context=active_context,
+                plan=plan,
+                workers=workers,
+                profile_hook=profile_hook,
+                audit_sink=audit_sink,
+            )
+
+        start = time.perf_counter()
+        data = path.read_bytes()
+        active_plan = self._resolve_plan(config, plan)
+        key = cache.key(_result_fingerprint(active_plan, encoding, active_context), data)
+        cached = cache.get(key)
+        if cached is not None:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            result = replace(cached, stats=replace(cached.stats, elapsed_ms=elapsed_ms))
+            if profile_hook is not None:
+                profile_hook(result.stats)
+            return result
+        source = io.TextIOWrapper(io.BytesIO(data), encoding=encoding).read()
+        result = self.redact(
+            source,
+            context=active_context,
+            plan=active_plan,
+            workers=workers,
+            profile_hook=profile_hook,
+        )
+        cache.put(key, result)
+        return result
 
     def redact_to_file(
         self,
@@ -104,16 +1004,853 @@ class RedactionEngine:
         config: RedactionConfig | None = None,
         context: RuleContext | None = None,
         encoding: str = "utf-8",
+        plan: RedactionPlan | None = None,
+        mmap: bool = False,
+        workers: int = 1,
+        profile_hook: Callable[[RedactionStats], None] | None = None,
+        audit_sink: AuditSink | None = None,
     ) -> RedactionResult:
+        if mmap:
+            return self._redact_mapped(
+                Path(input_path),
+                Path(output_path),
+                config=config,
+                context=context,
+                encoding=encoding,
+                plan=plan,
+                profile_hook=profile_hook,
+                audit_sink=audit_sink,
+            )
         result = self.redact_file(
             input_path,
             config=config,
             context=context,
             encoding=encoding,
+            plan=plan,
+            workers=workers,
+            profile_hook=profile_hook,
+            audit_sink=audit_sink,
         )
         Path(output_path).write_text(result.content, encoding=encoding)
         return result
 
+    def _stream(
+        self,
+        lines: Iterable[str],
+        plan: RedactionPlan,
+        context: RuleContext,
+        *,
+        max_buffer_chars: int = _STREAM_BUFFER_CHARS,
+        measure: bool = True,
+        timed: bool = False,
+        audit_sink: AuditSink | None = None,
+    ) -> RedactionStream:
+        config = plan.config
+
+        def generate() -> Iterator[str]:
+            start = time.perf_counter()
+            state = _RunState(
+                timings=_Timings() if timed or config.collect_rule_timings else None,
+                audit_sink=audit_sink,
+                audit_source=context.file_path,
+            )
+            source_bytes = 0
+            output_bytes = 0
+            segments = iter_segments(
+                lines,
+                skip_fenced_code_blocks=config.skip_fenced_code_blocks,
+                skip_inline_code=config.skip_inline_code,
+                streaming=True,
+                max_buffer_chars=max_buffer_chars,
+                merge_lines=_merge_lines(plan),
+            )
+            for segment in _timed_segments(segments, state.timings):
+                output: list[str] = []
+                self._redact_segment(segment, plan, context, state, output)
+                state.flush_audit()
+                chunk = "".join(output)
+                if measure:
+                    source_bytes += len(segment.text.encode("utf-8"))
+                    output_bytes += len(chunk.encode("utf-8"))
+                if chunk:
+                    yield chunk
+            state.flush_audit(final=True)
+            stream.stats = state.stats(
+                start, plan, source_bytes=source_bytes, output_bytes=output_bytes
+            )
+            stream.audit_log = state.audit_log
+
+        stream = RedactionStream(generate())
+        return stream
+
+    def _redact_mapped(
+        self,
+        input_path: Path,
+        output_path: Path | None,
+        *,
+        config: RedactionConfig | None,
+        context: RuleContext | None,
+        encoding: str,
+        plan: RedactionPlan | None,
+        profile_hook: Callable[[RedactionStats], None] | None,
+        audit_sink: AuditSink | None,
+    ) -> RedactionResult:
+        active_plan = self._resolve_plan(config, plan)
+        active_context = self._context_with_file_path(context, str(input_path))
+        stream = self._stream(
+            iter_lines(iter_mapped_chunks(input_path, encoding=encoding)),
+            active_plan,
+            active_context,
+            measure=False,
+            timed=profile_hook is not None,
+            audit_sink=_checked_sink(active_plan, audit_sink),
+        )
+        content = ""
+        output_bytes = 0
+        if output_path is None:
+            chunks: list[str] = []
+            for chunk in stream:
+                chunks.append(chunk)
+                output_bytes += len(chunk.encode(encoding))
+            content = "".join(chunks)
+        else:
+            with output_path.open("wb") as handle:
+                for chunk in stream:
+                    output_bytes += handle.write(chunk.encode(encoding))
+        assert stream.stats is not None
+        stats = replace(
+            stream.stats,
+            source_bytes=input_path.stat().st_size,
+            output_bytes=output_bytes,
+        )
+        if profile_hook is not None:
+            profile_hook(stats)
+        return RedactionResult(content=content, stats=stats, audit_log=stream.audit_log)
+
+    def _resolve_plan(
+        self,
+        config: RedactionConfig | None,
+        plan: RedactionPlan | None,
+    ) -> RedactionPlan:
+        if plan is not None:
+            if config is not None and config != plan.config:
+                raise ValueError("config does not match the config the plan was compiled for")
+            return plan
+
+        active_config = config if config is not None else RedactionConfig()
+        with self._plan_lock:
+            if self._plan_cache_version != self._registry.version:
+                self._plan_cache.clear()
+                self._plan_cache_version = self._registry.version
+            version = self._plan_cache_version
+            try:
+                cached = self._plan_cache.get(active_config)
+            except TypeError:
+                cached, version = None, -1
+            if cached is not None:
+                self._plan_cache.move_to_end(active_config)
+                return cached
+
+        compiled = self.compile(active_config)
+        with self._plan_lock:
+            if version == self._plan_cache_version == self._registry.version:
+                self._plan_cache[active_config] = compiled
+                if len(self._plan_cache) > _PLAN_CACHE_SIZE:
+                    self._plan_cache.popitem(last=False)
+        return compiled
+
+    def _async_slot(self) -> contextlib.AbstractAsyncContextManager[object]:
+        # A semaphore binds to the loop that first waits on it, so each running loop
+        # gets its own.
+        if self._max_concurrency is None:
+            return contextlib.nullcontext()
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            limit = self._async_limits.get(loop)
+            if limit is None:
+                limit = self._async_limits[loop] = asyncio.Semaphore(self._max_concurrency)
+        return limit
+
+    async def _in_executor(self, func: Callable[..., _T], *args: object) -> _T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _redact_slice(
+        self,
+        segments: Iterator[Segment],
+        plan: RedactionPlan,
+        context: RuleContext,
+        state: _RunState,
+        output: list[str],
+    ) -> bool:
+        budget = _ASYNC_SLICE_CHARS
+        for segment in segments:
+            self._redact_segment(segment, plan, context, state, output)
+            budget -= len(segment.text)
+            if budget <= 0:
+                return False
+        return True
+
+    def _redact_text(
+        self,
+        content: str,
+        plan: RedactionPlan,
+        context: RuleContext,
+        state: _RunState,
+    ) -> str:
+        if plan.config.rule_scope == "document" or plan.batched:
+            return self._redact_document(content, plan, context, state)
+        output: list[str] = []
+        segments = segment_markdown(
+            content,
+            skip_fenced_code_blocks=plan.config.skip_fenced_code_blocks,
+            skip_inline_code=plan.config.skip_inline_code,
+            merge_lines=_merge_lines(plan),
+        )
+        for segment in _timed_segments(segments, state.timings):
+            self._redact_segment(segment, plan, context, state, output)
+            state.flush_audit()
+        return "".join(output)
+
+    def _redact_sharded(
+        self,
+        content: str,
+        plan: RedactionPlan,
+        context: RuleContext,
+        state: _RunState,
+        workers: int,
+    ) -> str:
+        bounds, cuts = _shard_bounds(content, plan, workers)
+        if len(bounds) <= 2:
+            return self._redact_text(content, plan, context, state)
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(bounds) - 1),
+            initializer=_init_worker,
+            initargs=(self._registry.list_rules(), plan.config, self._regex_backend),
+        ) as executor:
+            shards = executor.map(
+                _redact_shard_task,
+                [content[begin:end] for begin, end in pairwise(bounds)],
+                bounds[:-1],
+                [plan.config] * (len(bounds) - 1),
+                [context] * (len(bounds) - 1),
+                [state.timings is not None] * (len(bounds) - 1),
+                pairwise(cuts),
+            )
+            output: list[str] = []
+            probes: list[list[tuple[int, int]]] = []
+            cut_segment: list[list[tuple[int, int]]] = []
+            for shard in shards:
+                output.append(shard.text)
+                for name, count in shard.rule_counts.items():
+                    state.rule_counts[name] += count
+                if shard.probes is None:
+                    state.skipped_rule_invocations += shard.skipped_rule_invocations
+                else:
+                    probes.append(shard.probes)
+                # A rule is skipped only when the whole document (in document scope) or
+                # the whole segment cannot match it, which no single shard can tell.
+                if shard.head_probes is not None:
+                    cut_segment.append(shard.head_probes)
+                    if not shard.within:
+                        state.skipped_rule_invocations += _probed_skips(plan, cut_segment)
+                        cut_segment = []
+                if shard.tail_probes is not None and not shard.within:
+                    cut_segment.append(shard.tail_probes)
+                state.audit_log.merge(shard.audit_log)
+                state.flush_audit()
+                if state.timings is not None and shard.timings is not None:
+                    state.timings.merge(shard.timings)
+        state.skipped_rule_invocations += _probed_skips(plan, probes)
+        state.offset = len(content)
+        return "".join(output)
+
+    def _redact_segment(
+        self,
+        segment: Segment,
+        plan: RedactionPlan,
+        context: RuleContext,
+        state: _RunState,
+        output: list[str],
+    ) -> None:
+        text = segment.text
+        offset = state.offset
+        state.offset += len(text)
+        if not segment.redactable:
+            output.append(text)
+            return
+
+        cache = self._segment_cache
+        if cache is None or state.prefilter_probes is not None:
+            self._redact_pieces(text, offset, plan, context, state, output)
+            return
+
+        fingerprint = _segment_fingerprint(plan, context)
+        cached = cache.get(fingerprint, text)
+        if cached is None:
+            state.cache_misses += 1
+            scratch = _RunState(timings=state.timings)
+            pieces: list[str] = []
+            self._redact_pieces(text, 0, plan, context, scratch, pieces)
+            cached = CachedSegment(
+                content="".join(pieces),
+                rule_counts=tuple(scratch.rule_counts.items()),
+                skipped_rule_invocations=scratch.skipped_rule_invocations,
+                audit_log=scratch.audit_log,
+            )
+            cache.put(fingerprint, text, cached)
+        else:
+            state.cache_hits += 1
+        output.append(cached.content)
+        state.absorb(cached, offset)
+
+    def _redact_pieces(
+        self,
+        text: str,
+        offset: int,
+        plan: RedactionPlan,
+        context: RuleContext,
+        state: _RunState,
+        output: list[str],
+    ) -> None:
+        protected = self._protected_ranges(text, plan, state.timings)
+        output.append(self._redact_piece(text, offset, plan, context, state, protected))
+
+    def _protected_ranges(
+        self,
+        text: str,
+        plan: RedactionPlan,
+        timings: _Timings | None,
+    ) -> list[tuple[int, int]]:
+        allowlist = plan.allowlist
+        if allowlist is None:
+            return []
+        if timings is None:
+            return allowlist.protected_ranges(text)
+        started = time.perf_counter_ns()
+        protected = allowlist.protected_ranges(text)
+        timings.allowlist_ns += time.perf_counter_ns() - started
+        return protected
+
+    def _redact_piece(
+        self,
+        text: str,
+        offset: int,
+        plan: RedactionPlan,
+        context: RuleContext,
+        state: _RunState,
+        protected: list[tuple[int, int]] | None = None,
+    ) -> str:
+        piece_context = RuleContext(
+            file_path=context.file_path,
+            metadata=context.metadata,
+            audit_entries=state.audit_log if plan.config.collect_audit_log else None,
+            segment_start=offset,
+        )
+        if plan.config.detection_mode == "spans":
+            updated, skipped = self._run_span_steps(
+                text,
+                plan,
+                piece_context,
+                state.rule_counts,
+                state.timings,
+                protected,
+                state.prefilter_probes,
+            )
+        else:
+            updated, skipped = self._run_steps(
+                text,
+                plan,
+                piece_context,
+                state.rule_counts,
+                state.timings,
+                protected,
+                state.prefilter_probes,
+            )
+        state.skipped_rule_invocations += skipped
+        return updated
+
+    def _run_steps(
+        self,
+        content: str,
+        plan: RedactionPlan,
+        context: RuleContext,
+        rule_counts: defaultdict[str, int],
+        timings: _Timings | None = None,
+        protected: list[tuple[int, int]] | None = None,
+        probes: list[tuple[int, int]] | None = None,
+    ) -> tuple[str, int]:
+        updated = content
+        features = segment_features(updated)
+        skipped = 0
+        log = context.audit_entries if isinstance(context.audit_entries, AuditLog) else None
+        offsets = OffsetMap()
+        for step in plan.steps:
+            if probes is not None:
+                probes.append(_prefilter_probe(_step_rules(step), updated, features))
+            recorded = len(log) if log is not None else 0
+            before = updated
+            updated, matches, step_skipped = self._apply_step(
+                step, updated, features, plan.config, context, rule_counts, timings, protected
+            )
+            if log is not None:
+                log.track(recorded, context.segment_start, offsets, before, updated)
+            skipped += step_skipped
+            if matches:
+                features = segment_features(updated)
+        return updated, skipped
+
+    def _apply_step(
+        self,
+        step: PlanStep,
+        content: str,
+        features: int,
+        config: RedactionConfig,
+        context: RuleContext,
+        rule_counts: defaultdict[str, int],
+        timings: _Timings | None,
+        protected: list[tuple[int, int]] | None = None,
+    ) -> tuple[str, int, int]:
+        if isinstance(step, FusedRegexScanner):
+            scanner = step.narrow(content, features)
+            skipped = len(step.rules) - (len(scanner.rules) if scanner is not None else 0)
+            if scanner is None:
+                return content, 0, skipped
+            started = time.perf_counter_ns() if timings is not None else 0
+            if protected:
+                updated, counts = _redact_guarded(scanner, content, protected, config, context)
+            else:
+                updated, counts = scanner.redact(content, config, context)
+            matches = sum(counts.values())
+            if timings is not None:
+                timings.record(
+                    _step_name(step), time.perf_counter_ns() - started, len(content), matches
+                )
+            for name, count in counts.items():
+                rule_counts[name] += count
+            return updated, matches, skipped
+
+        prefilter: RulePrefilter | None = getattr(step, "prefilter", None)
+        if prefilter is not None and not prefilter.may_match(content, features):
+            return content, 0, 1
+        started = time.perf_counter_ns() if timings is not None else 0
+        if protected:
+            updated, counts = _redact_guarded(step, content, protected, config, context)
+            count = sum(counts.values())
+        else:
+            updated, count = step.redact(content, config, context)
+        if timings is not None:
+            timings.record(step.name, time.perf_counter_ns() - started, len(content), count)
+        if count:
+            rule_counts[step.name] += count
+        return updated, count, 0
+
+    def _run_span_steps(
+        self,
+        content: str,
+        plan: RedactionPlan,
+        context: RuleContext,
+        rule_counts: defaultdict[str, int],
+        timings: _Timings | None = None,
+        protected: list[tuple[int, int]] | None = None,
+        probes: list[tuple[int, int]] | None = None,
+    ) -> tuple[str, int]:
+        config = plan.config
+        updated = content
+        features = segment_features(updated)
+        skipped = 0
+        pending: list[RedactionSpan] = []
+        log = context.audit_entries if isinstance(context.audit_entries, AuditLog) else None
+        offsets = OffsetMap()
+
+        def splice() -> str:
+            if not pending:
+                return updated
+            spans = resolve_overlaps(
+                pending, policy=config.overlap_policy, priorities=plan.priorities
+            )
+            pending.clear()
+            for span in spans:
+                rule_counts[span.rule_name] += 1
+            if protected:
+                protected[:] = shifted_ranges(protected, spans)
+            recorded = len(log) if log is not None else 0
+            spliced = apply_spans(updated, spans, context)
+            if log is not None:
+                log.track(recorded, context.segment_start, offsets, updated, spliced)
+            return spliced
+
+        for rule in cast(tuple[RedactionRule, ...], plan.steps):
+            if probes is not None:
+                probes.append(_prefilter_probe((rule,), updated, features))
+            prefilter: RulePrefilter | None = getattr(rule, "prefilter", None)
+            if prefilter is not None and not prefilter.may_match(updated, features):
+                skipped += 1
+                continue
+            find_spans = getattr(rule, "find_spans", None)
+            if find_spans is not None:
+                started = time.perf_counter_ns() if timings is not None else 0
+                spans = find_spans(updated, config, context)
+                if protected:
+                    spans = unprotected_spans(spans, protected, updated, config)
+                if timings is not None:
+                    timings.record(
+                        rule.name, time.perf_counter_ns() - started, len(updated), len(spans)
+                    )
+                pending.extend(spans)
+                continue
+            updated = splice()
+            started = time.perf_counter_ns() if timings is not None else 0
+            scanned = len(updated)
+            recorded = len(log) if log is not None else 0
+            before = updated
+            if protected:
+                updated, count = _redact_gaps(rule, updated, protected, config, context)
+            else:
+                updated, count = rule.redact(updated, config, context)
+            if log is not None:
+                log.track(recorded, context.segment_start, offsets, before, updated)
+            if timings is not None:
+                timings.record(rule.name, time.perf_counter_ns() - started, scanned, count)
+            if count:
+                rule_counts[rule.name] += count
+            features = segment_features(updated)
+        return splice(), skipped
+
+    def _redact_document(
+        self,
+        content: str,
+        plan: RedactionPlan,
+        context: RuleContext,
+        state: _RunState,
+    ) -> str:
+        config = plan.config
+        timings = state.timings
+        base = state.offset
+        state.offset += len(content)
+
+        ranges: list[tuple[int, int]] = []
+        protected: list[tuple[int, int]] = []
+        position = 0
+        segments = segment_markdown(
+            content,
+            skip_fenced_code_blocks=config.skip_fenced_code_blocks,
+            skip_inline_code=config.skip_inline_code,
+            merge_lines=_merge_lines(plan),
+        )
+        for segment in _timed_segments(segments, timings):
+            text = segment.text
+            if segment.redactable and text:
+                ranges.append((position, position + len(text)))
+                protected.extend(
+                    (position + protected_start, position + protected_end)
+                    for protected_start, protected_end in self._protected_ranges(
+                        text, plan, timings
+                    )
+                )
+            position += len(text)
+        if not ranges:
+            return content
+
+        document = DocumentText.build(content, ranges, protected)
+        audit = _DocumentAudit() if config.collect_audit_log else None
+        whole = config.rule_scope == "document"
+        if config.detection_mode == "spans":
+            skipped = self._run_document_span_steps(
+                document,
+                plan,
+                context,
+                state.rule_counts,
+                timings,
+                audit,
+                base,
+                whole,
+                state.prefilter_probes,
+            )
+        else:
+            skipped = self._run_document_steps(
+                document,
+                plan,
+                context,
+                state.rule_counts,
+                timings,
+                audit,
+                base,
+                whole,
+                state.prefilter_probes,
+            )
+        state.skipped_rule_invocations += skipped
+        if audit is not None:
+            state.audit_log.merge(audit.ordered())
+            state.flush_audit()
+        return document.render()
+
+    def _run_document_steps(
+        self,
+        document: DocumentText,
+        plan: RedactionPlan,
+        context: RuleContext,
+        rule_counts: defaultdict[str, int],
+        timings: _Timings | None,
+        audit: _DocumentAudit | None,
+        base: int,
+        whole: bool,
+        probes: list[tuple[int, int]] | None = None,
+    ) -> int:
+        config = plan.config
+        document_context = RuleContext(file_path=context.file_path, metadata=context.metadata)
+        features = segment_features(document.text)
+        skipped = 0
+        for step, origin in zip(plan.steps, plan.origins, strict=True):
+            if not whole:
+                started = time.perf_counter_ns() if timings is not None else 0
+                scanned = len(document.text)
+                matches, step_skipped = self._run_step_per_piece(
+                    step, document, plan, context, rule_counts, audit, base
+                )
+                skipped += step_skipped
+                if timings is not None and step_skipped < _step_size(step) * len(document):
+                    timings.record(
+                        _step_name(step), time.perf_counter_ns() - started, scanned, matches
+                    )
+                continue
+            if probes is not None:
+                probes.append(_prefilter_probe(_step_rules(step), document.text, features))
+            runner: PlanStep | None = step
+            if isinstance(step, FusedRegexScanner):
+                runner = step.narrow(document.text, features)
+                skipped += len(step.rules) - (len(runner.rules) if runner is not None else 0)
+            else:
+                prefilter: RulePrefilter | None = getattr(step, "prefilter", None)
+                if prefilter is not None and not prefilter.may_match(document.text, features):
+                    skipped += 1
+                    runner = None
+            if runner is None:
+                continue
+
+            started = time.perf_counter_ns() if timings is not None else 0
+            scanned = len(document.text)
+            spanner = _document_runner(runner, origin)
+            spans = (
+                spanner.find_spans(document.text, config, document_context)
+                if spanner is not None
+                else None
+            )
+            if spans is not None and document.protected:
+                spans = unprotected_spans(spans, document.protected, document.text, config)
+            indices = document.locate(spans) if spans is not None else None
+            if spans is None or indices is None:
+                matches, _ = self._run_step_per_piece(
+                    step, document, plan, context, rule_counts, audit, base
+                )
+            else:
+                matches = len(spans)
+                for span in spans:
+                    rule_counts[span.rule_name] += 1
+                if audit is not None:
+                    audit.record(document, spans, indices, base)
+                document.apply(spans, indices)
+            if timings is not None:
+                timings.record(_step_name(step), time.perf_counter_ns() - started, scanned, matches)
+            if matches:
+                features = segment_features(document.text)
+        return skipped
+
+    def _run_document_span_steps(
+        self,
+        document: DocumentText,
+        plan: RedactionPlan,
+        context: RuleContext,
+        rule_counts: defaultdict[str, int],
+        timings: _Timings | None,
+        audit: _DocumentAudit | None,
+        base: int,
+        whole: bool,
+        probes: list[tuple[int, int]] | None = None,
+    ) -> int:
+        config = plan.config
+        document_context = RuleContext(file_path=context.file_path, metadata=context.metadata)
+        features = segment_features(document.text)
+        skipped = 0
+        pending: list[RedactionSpan] = []
+
+        def splice() -> None:
+            if not pending:
+                return
+            located = document.locate(pending)
+            assert located is not None
+            by_piece: defaultdict[int, list[RedactionSpan]] = defaultdict(list)
+            for span, index in zip(pending, located, strict=True):
+                by_piece[index].append(span)
+            pending.clear()
+            spans: list[RedactionSpan] = []
+            indices: list[int] = []
+            for index in sorted(by_piece):
+                resolved = resolve_overlaps(
+                    by_piece[index], policy=config.overlap_policy, priorities=plan.priorities
+                )
+                spans.extend(resolved)
+                indices.extend([index] * len(resolved))
+            for span in spans:
+                rule_counts[span.rule_name] += 1
+            if audit is not None:
+                audit.record(document, spans, indices, base)
+            document.apply(spans, indices)
+
+        steps = cast(tuple[RedactionRule, ...], plan.steps)
+        for rule, origin in zip(steps, plan.origins, strict=True):
+            if whole and probes is not None:
+                probes.append(_prefilter_probe((rule,), document.text, features))
+            prefilter: RulePrefilter | None = getattr(rule, "prefilter", None)
+            if whole and prefilter is not None and not prefilter.may_match(document.text, features):
+                skipped += 1
+                continue
+            started = time.perf_counter_ns() if timings is not None else 0
+            scanned = len(document.text)
+            if getattr(rule, "find_spans", None) is not None:
+                spanner = _document_runner(rule, origin) if whole else None
+                spans = (
+                    spanner.find_spans(document.text, config, document_context)
+                    if spanner is not None
+                    else None
+                )
+                rule_skipped = 0
+                if spans is None or document.locate(spans) is None:
+                    spans, rule_skipped = self._find_spans_per_piece(
+                        rule, document, config, context, base
+                    )
+                if document.protected:
+                    spans = unprotected_spans(spans, document.protected, document.text, config)
+                pending.extend(spans)
+                matches = len(spans)
+            else:
+                splice()
+                matches, rule_skipped = self._run_step_per_piece(
+                    rule, document, plan, context, rule_counts, audit, base
+                )
+                features = segment_features(document.text)
+            if not whole:
+                skipped += rule_skipped
+            if timings is not None and rule_skipped < len(document):
+                timings.record(rule.name, time.perf_counter_ns() - started, scanned, matches)
+        splice()
+        return skipped
+
+    def _run_step_per_piece(
+        self,
+        step: PlanStep,
+        document: DocumentText,
+        plan: RedactionPlan,
+        context: RuleContext,
+        rule_counts: defaultdict[str, int],
+        audit: _DocumentAudit | None,
+        base: int,
+    ) -> tuple[int, int]:
+        if getattr(step, "find_spans_batch", None) is not None:
+            return self._run_batch_step(
+                cast(BatchSpanRedactionRule, step),
+                document,
+                plan,
+                context,
+                rule_counts,
+                audit,
+                base,
+            )
+        pieces: list[str] = []
+        protected: list[list[tuple[int, int]]] = []
+        matches = 0
+        skipped = 0
+        for index in range(len(document)):
+            recorded = len(audit.log) if audit is not None else 0
+            text = document.piece(index)
+            protected.append(document.piece_protected(index))
+            updated, count, piece_skipped = self._apply_step(
+                step,
+                text,
+                segment_features(text),
+                plan.config,
+                _piece_context(context, audit, base + document.origins[index]),
+                rule_counts,
+                None,
+                protected[-1],
+            )
+            pieces.append(updated)
+            matches += count
+            skipped += piece_skipped
+            if audit is not None:
+                audit.track(index, recorded, base + document.origins[index], text, updated)
+        document.replace(pieces, protected)
+        return matches, skipped
+
+    def _run_batch_step(
+        self,
+        rule: BatchSpanRedactionRule,
+        document: DocumentText,
+        plan: RedactionPlan,
+        context: RuleContext,
+        rule_counts: defaultdict[str, int],
+        audit: _DocumentAudit | None,
+        base: int,
+    ) -> tuple[int, int]:
+        pieces = [document.piece(index) for index in range(len(document))]
+        protected = [document.piece_protected(index) for index in range(len(document))]
+        selected = _prefiltered(rule, pieces)
+        contexts = [
+            _piece_context(context, audit, base + document.origins[index]) for index in selected
+        ]
+        found = rule.find_spans_batch([pieces[index] for index in selected], plan.config, contexts)
+        matches = 0
+        for index, piece_context, spans in zip(selected, contexts, found, strict=True):
+            if protected[index]:
+                spans = unprotected_spans(spans, protected[index], pieces[index], plan.config)
+                protected[index] = shifted_ranges(protected[index], spans)
+            if not spans:
+                continue
+            recorded = len(audit.log) if audit is not None else 0
+            before = pieces[index]
+            pieces[index] = apply_spans(before, spans, piece_context)
+            rule_counts[rule.name] += len(spans)
+            matches += len(spans)
+            if audit is not None:
+                audit.track(index, recorded, piece_context.segment_start, before, pieces[index])
+        if matches:
+            document.replace(pieces, protected)
+        return matches, len(pieces) - len(selected)
+
+    def _find_spans_per_piece(
+        self,
+        rule: RedactionRule,
+        document: DocumentText,
+        config: RedactionConfig,
+        context: RuleContext,
+        base: int,
+    ) -> tuple[list[RedactionSpan], int]:
+        pieces = [document.piece(index) for index in range(len(document))]
+        selected = _prefiltered(rule, pieces)
+        contexts = [
+            _piece_context(context, None, base + document.origins[index]) for index in selected
+        ]
+        texts = [pieces[index] for index in selected]
+        if getattr(rule, "find_spans_batch", None) is not None:
+            found = cast(BatchSpanRedactionRule, rule).find_spans_batch(texts, config, contexts)
+        else:
+            find_spans = cast(SpanRedactionRule, rule).find_spans
+            found = [
+                find_spans(text, config, piece_context)
+                for text, piece_context in zip(texts, contexts, strict=True)
+            ]
+        spans: list[RedactionSpan] = []
+        for index, piece_spans in zip(selected, found, strict=True):
+            offset = document.starts[index]
+            spans.extend(
+                RedactionSpan(
+                    span.start + offset, span.end + offset, span.replacement, span.rule_name
+                )
+                for span in piece_spans
+            )
+        return spans, len(pieces) - len(selected)
+
     def _active_rules(self, config: RedactionConfig) -> tuple[RedactionRule, ...]:
         rules = self._registry.list_rules()
         enabled = set(config.enabled_rule_names) if config.enabled_rule_names is not None else None
@@ -132,30 +1869,6 @@ class RedactionEngine:
             )
         )
 
-    def _protect_allowlist(
-        self,
-        content: str,
-        config: RedactionConfig,
-    ) -> tuple[str, dict[str, str]]:
-        if not config.allowlist:
-            return content, {}
-
-        placeholders: dict[str, str] = {}
-        updated = content
-        for index, value in enumerate(sorted(set(config.allowlist), key=len, reverse=True)):
-            if not value or value not in updated:
-                continue
-            placeholder = f"\x00MR_ALLOWLIST_{index}\x00"
-            updated = updated.replace(value, placeholder)
-            placeholders[placeholder] = value
-        return updated, placeholders
-
-    def _restore_allowlist(self, content: str, placeholders: dict[str, str]) -> str:
-        updated = content
-        for placeholder, value in placeholders.items():
-            updated = updated.replace(placeholder, value)
-        return updated
-
     def _context_with_file_path(self, context: RuleContext | None, file_path: str) -> RuleContext:
         if context is None:
             return RuleContext(file_path=file_path)
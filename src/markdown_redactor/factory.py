@@ -1,17 +1,34 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
+from concurrent.futures import Executor
 
+from .backends import STDLIB_BACKEND, RegexBackend
+from .cache import ResultCache
 from .engine import RedactionEngine
 from .registry import RuleRegistry
 from .rules import default_rules
 from .types import RedactionRule
 
 
-def create_default_engine() -> RedactionEngine:
+def create_default_engine(
+    *,
+    executor: Executor | None = None,
+    max_concurrency: int | None = None,
+    segment_cache_bytes: int | None = None,
+    result_cache: ResultCache | None = None,
+    regex_backend: str | RegexBackend = STDLIB_BACKEND,
+) -> RedactionEngine:
     registry = RuleRegistry()
     registry.extend(default_rules())
-    return RedactionEngine(registry=registry)
+    return RedactionEngine(
+        registry=registry,
+        executor=executor,
+        max_concurrency=max_concurrency,
+        segment_cache_bytes=segment_cache_bytes,
+        result_cache=result_cache,
+        regex_backend=regex_backend,
+    )
 
 
 def create_tenant_engine(
@@ -19,6 +36,11 @@ def create_tenant_engine(
     *,
     include_default_rules: bool = True,
     tenant_rules_first: bool = False,
+    executor: Executor | None = None,
+    max_concurrency: int | None = None,
+    segment_cache_bytes: int | None = None,
+    result_cache: ResultCache | None = None,
+    regex_backend: str | RegexBackend = STDLIB_BACKEND,
 ) -> RedactionEngine:
     registry = RuleRegistry()
     tenant_list = list(tenant_rules)
@@ -32,4 +54,11 @@ def create_tenant_engine(
     if include_default_rules and tenant_rules_first:
         registry.extend(rule for rule in default_rules() if rule.name not in tenant_names)
 
-    return RedactionEngine(registry=registry)
+    return RedactionEngine(
+        registry=registry,
+        executor=executor,
+        max_concurrency=max_concurrency,
+        segment_cache_bytes=segment_cache_bytes,
+        result_cache=result_cache,
+        regex_backend=regex_backend,
+    )
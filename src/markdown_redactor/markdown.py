@@ -1,8 +1,18 @@
 from __future__ import annotations
 
-from collections.abc import Iterator
+import re
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 
+_BLOCK_OPEN = "-----BEGIN "
+_BLOCK_CLOSE = "-----END "
+_MAX_BLOCK_CHARS = 1 << 16
+_FENCE_MARKER = re.compile(r"```|~~~")
+_BACKTICKS = re.compile(r"`+")
+_IRREGULAR_LINE_BREAKS = "\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+
+_Range = tuple[int, int, bool]
+
 
 @dataclass(frozen=True, slots=True)
 class Segment:
@@ -15,21 +25,68 @@ def segment_markdown(
     *,
     skip_fenced_code_blocks: bool,
     skip_inline_code: bool,
+    merge_lines: bool = True,
+) -> Iterator[Segment]:
+    if _has_irregular_line_breaks(content):
+        return iter_segments(
+            content.splitlines(keepends=True),
+            skip_fenced_code_blocks=skip_fenced_code_blocks,
+            skip_inline_code=skip_inline_code,
+            merge_lines=merge_lines,
+        )
+    return _coalesce(
+        content,
+        _document_ranges(
+            content,
+            skip_fenced_code_blocks=skip_fenced_code_blocks,
+            skip_inline_code=skip_inline_code,
+        ),
+        merge_lines,
+    )
+
+
+def iter_segments(
+    lines: Iterable[str],
+    *,
+    skip_fenced_code_blocks: bool,
+    skip_inline_code: bool,
+    streaming: bool = False,
+    max_buffer_chars: int = 1 << 20,
+    merge_lines: bool = True,
 ) -> Iterator[Segment]:
     in_fence = False
     fence_marker = ""
     buffer: list[str] = []
+    buffered_chars = 0
     buffer_redactable = True
+    open_block = False
+    block_chars = 0
 
     def flush_buffer() -> Iterator[Segment]:
-        nonlocal buffer
+        nonlocal buffer, buffered_chars
         if not buffer:
             return
         segment = "".join(buffer)
         buffer = []
-        yield Segment(text=segment, redactable=buffer_redactable)
-
-    lines = content.splitlines(keepends=True)
+        buffered_chars = 0
+        yield from _segments(segment, buffer_redactable, merge_lines)
+
+    def flush_before_block() -> Iterator[Segment]:
+        # The open block stays buffered so it is matched as a whole with its end line.
+        nonlocal buffer, buffered_chars
+        text = "".join(buffer)
+        cut = len(text) - block_chars
+        buffer = [text[cut:]]
+        buffered_chars = block_chars
+        yield from _segments(text[:cut], buffer_redactable, merge_lines)
+
+    def append(text: str, redactable: bool) -> Iterator[Segment]:
+        nonlocal buffered_chars, buffer_redactable
+        if buffer and buffer_redactable != redactable:
+            yield from flush_buffer()
+        buffer_redactable = redactable
+        buffer.append(text)
+        buffered_chars += len(text)
 
     for line in lines:
         stripped = line.lstrip()
@@ -38,55 +95,150 @@ def segment_markdown(
         if skip_fenced_code_blocks and fence:
             current_marker = stripped[:3]
             if not in_fence:
-                yield from flush_buffer()
+                open_block = False
                 in_fence = True
                 fence_marker = current_marker
-                buffer_redactable = False
-                buffer.append(line)
+                yield from append(line, False)
+                if streaming:
+                    yield from flush_buffer()
                 continue
 
-            if in_fence and current_marker == fence_marker:
-                buffer.append(line)
-                yield from flush_buffer()
+            if current_marker == fence_marker:
+                yield from append(line, False)
+                if streaming:
+                    yield from flush_buffer()
                 in_fence = False
                 fence_marker = ""
-                buffer_redactable = True
                 continue
 
         if in_fence and skip_fenced_code_blocks:
-            buffer.append(line)
+            yield from append(line, False)
+            if streaming:
+                yield from flush_buffer()
             continue
 
         if skip_inline_code:
-            yield from flush_buffer()
-            yield from _split_inline_code(line)
+            for start, end, redactable in _inline_code_ranges(line, 0, len(line)):
+                yield from append(line[start:end], redactable)
+        else:
+            yield from append(line, True)
+        if not streaming:
             continue
-
-        if not buffer:
-            buffer_redactable = True
-        buffer.append(line)
+        if _BLOCK_OPEN in line or _BLOCK_CLOSE in line:
+            opened = line.rfind(_BLOCK_OPEN) > line.rfind(_BLOCK_CLOSE)
+            if opened and not open_block:
+                block_chars = 0
+            open_block = opened
+        if open_block:
+            block_chars += len(line)
+        if not stripped and not open_block:
+            yield from flush_buffer()
+        elif buffered_chars >= max_buffer_chars:
+            # A forced cut never splits an open block unless it outgrows any real key,
+            # in which case it is treated as unterminated.
+            if not open_block or block_chars >= max(max_buffer_chars, _MAX_BLOCK_CHARS):
+                open_block = False
+                yield from flush_buffer()
+            elif block_chars < buffered_chars:
+                yield from flush_before_block()
 
     yield from flush_buffer()
 
 
-def _split_inline_code(line: str) -> Iterator[Segment]:
-    start = 0
-    in_code = False
-    i = 0
-
-    while i < len(line):
-        if line[i] == "`":
-            if i > start:
-                yield Segment(text=line[start:i], redactable=not in_code)
-            in_code = not in_code
-            start = i
-            i += 1
-            while i < len(line) and line[i] == "`":
-                i += 1
-            yield Segment(text=line[start:i], redactable=False)
-            start = i
-            continue
-        i += 1
+def _has_irregular_line_breaks(content: str) -> bool:
+    if "\r" in content and content.count("\r") != content.count("\r\n"):
+        return True
+    return any(char in content for char in _IRREGULAR_LINE_BREAKS)
+
 
-    if start < len(line):
-        yield Segment(text=line[start:], redactable=not in_code)
+def _document_ranges(
+    content: str,
+    *,
+    skip_fenced_code_blocks: bool,
+    skip_inline_code: bool,
+) -> Iterator[_Range]:
+    position = 0
+    if skip_fenced_code_blocks:
+        fence_marker = ""
+        fence_start = 0
+        for match in _FENCE_MARKER.finditer(content):
+            line_start = content.rfind("\n", 0, match.start()) + 1
+            indent = content[line_start : match.start()]
+            if indent and not indent.isspace():
+                continue
+            marker = match.group()
+            if not fence_marker:
+                yield from _text_ranges(content, position, line_start, skip_inline_code)
+                fence_marker = marker
+                fence_start = line_start
+            elif marker == fence_marker:
+                position = content.find("\n", match.end()) + 1 or len(content)
+                yield fence_start, position, False
+                fence_marker = ""
+        if fence_marker:
+            yield fence_start, len(content), False
+            return
+    yield from _text_ranges(content, position, len(content), skip_inline_code)
+
+
+def _text_ranges(content: str, start: int, end: int, skip_inline_code: bool) -> Iterator[_Range]:
+    if start >= end:
+        return
+    if skip_inline_code:
+        yield from _inline_code_ranges(content, start, end)
+    else:
+        yield start, end, True
+
+
+def _inline_code_ranges(content: str, start: int, end: int) -> Iterator[_Range]:
+    position = start
+    code_start = -1
+    for match in _BACKTICKS.finditer(content, start, end):
+        run_start, run_end = match.span()
+        if code_start >= 0:
+            line_end = content.find("\n", code_start, run_start)
+            if line_end >= 0:
+                position = line_end + 1
+                yield code_start, position, False
+                code_start = -1
+        if code_start < 0:
+            if run_start > position:
+                yield position, run_start, True
+            code_start = run_start
+        else:
+            yield code_start, run_end, False
+            position = run_end
+            code_start = -1
+
+    if code_start >= 0:
+        line_end = content.find("\n", code_start, end)
+        position = line_end + 1 if line_end >= 0 else end
+        yield code_start, position, False
+    if position < end:
+        yield position, end, True
+
+
+def _coalesce(content: str, ranges: Iterable[_Range], merge_lines: bool) -> Iterator[Segment]:
+    pending_start = pending_end = 0
+    pending_redactable = True
+    for start, end, redactable in ranges:
+        if redactable != pending_redactable and pending_end > pending_start:
+            yield from _segments(
+                content[pending_start:pending_end], pending_redactable, merge_lines
+            )
+            pending_start = start
+        pending_redactable = redactable
+        pending_end = end
+    if pending_end > pending_start:
+        yield from _segments(content[pending_start:pending_end], pending_redactable, merge_lines)
+
+
+def _segments(text: str, redactable: bool, merge_lines: bool) -> Iterator[Segment]:
+    # Without merge_lines, redactable text is passed to rules one line at a time, so
+    # anchored or line-break-matching custom patterns see the same input as per-line
+    # segmentation would give them.
+    if merge_lines or not redactable:
+        yield Segment(text=text, redactable=redactable)
+        return
+    for line in text.splitlines(keepends=True):
+        yield Segment(text=line, redactable=True)
@@ -1,29 +1,273 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from itertools import pairwise
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from spacy.language import Language
+    from spacy.tokens import Doc
 
+from .prefilter import _CLASS_BITS, RulePrefilter
 from .rules import _replacement_value
-from .types import AuditEntry, RedactionConfig, RuleContext, RuleMetadata, _hash_value
+from .spans import apply_spans
+from .types import RedactionConfig, RedactionSpan, RuleContext, RuleMetadata
 
-_NLP_CACHE: dict[str, Language] = {}
+_UNUSED_COMPONENTS = (
+    "attribute_ruler",
+    "entity_linker",
+    "lemmatizer",
+    "morphologizer",
+    "parser",
+    "senter",
+    "spancat",
+    "tagger",
+    "textcat",
+    "textcat_multilabel",
+    "trainable_lemmatizer",
+)
 
+_CAPITALISED_LABELS = frozenset(
+    {
+        "EVENT",
+        "FAC",
+        "GPE",
+        "LANGUAGE",
+        "LAW",
+        "LOC",
+        "NORP",
+        "ORG",
+        "PERSON",
+        "PRODUCT",
+        "WORK_OF_ART",
+    }
+)
+_UPPER_BIT = _CLASS_BITS["upper"]
+_CHUNK_BREAKS: tuple[tuple[str, ...], ...] = (
+    ("\n\n", "\r\n\r\n"),
+    (". ", "! ", "? ", ".\n", "!\n", "?\n"),
+    (" ", "\n", "\t"),
+)
 
-def _get_nlp(model: str) -> Language:
-    if model not in _NLP_CACHE:
-        try:
-            import spacy
-        except ImportError as exc:
-            raise ImportError(
-                "spacy is required for NERRule.\n"
-                "Install it with: pip install 'markdown-redactor[ner]'\n"
-                "Then download a model: python -m spacy download en_core_web_sm"
-            ) from exc
-        _NLP_CACHE[model] = spacy.load(model)
-    return _NLP_CACHE[model]
+ModelLoader = Callable[[str, tuple[str, ...]], "Language"]
+_Entities = tuple[tuple[int, int], ...]
+_EntityKey = tuple[str, frozenset[str], str]
+_Chunk = tuple[int, int, int, int]
+
+
+def _load_spacy(model: str, exclude: tuple[str, ...]) -> Language:
+    try:
+        import spacy
+    except ImportError as exc:
+        raise ImportError(
+            "spacy is required for NERRule.\n"
+            "Install it with: pip install 'markdown-redactor[ner]'\n"
+            "Then download a model: python -m spacy download en_core_web_sm"
+        ) from exc
+    return spacy.load(model, exclude=list(exclude))
+
+
+class NERModelManager:
+    def __init__(
+        self,
+        *,
+        max_models: int = 2,
+        exclude: Iterable[str] = _UNUSED_COMPONENTS,
+        loader: ModelLoader | None = None,
+    ) -> None:
+        if max_models <= 0:
+            raise ValueError("max_models must be positive")
+        self._max_models = max_models
+        self._exclude = tuple(exclude)
+        self._loader = loader if loader is not None else _load_spacy
+        self._models: OrderedDict[str, Language] = OrderedDict()
+        self._loading: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def max_models(self) -> int:
+        return self._max_models
+
+    @property
+    def exclude(self) -> tuple[str, ...]:
+        return self._exclude
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def __contains__(self, model: object) -> bool:
+        return model in self._models
+
+    def get(self, model: str) -> Language:
+        with self._lock:
+            nlp = self._cached(model)
+            if nlp is not None:
+                return nlp
+            loading = self._loading.setdefault(model, threading.Lock())
+        with loading:
+            with self._lock:
+                nlp = self._cached(model)
+            if nlp is not None:
+                return nlp
+            nlp = self._loader(model, self._exclude)
+            with self._lock:
+                self._models[model] = nlp
+                self._loading.pop(model, None)
+                while len(self._models) > self._max_models:
+                    self._models.popitem(last=False)
+        return nlp
+
+    def warm(self, *models: str) -> None:
+        for model in models:
+            self.get(model)
+
+    def evict(self, model: str) -> None:
+        with self._lock:
+            self._models.pop(model, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def __repr__(self) -> str:
+        return f"NERModelManager(max_models={self._max_models}, exclude={self._exclude!r})"
+
+    def __getstate__(self) -> tuple[int, tuple[str, ...], ModelLoader]:
+        return self._max_models, self._exclude, self._loader
+
+    def __setstate__(self, state: tuple[int, tuple[str, ...], ModelLoader]) -> None:
+        max_models, exclude, loader = state
+        self.__init__(max_models=max_models, exclude=exclude, loader=loader)  # type: ignore[misc]
+
+    def _cached(self, model: str) -> Language | None:
+        nlp = self._models.get(model)
+        if nlp is not None:
+            self._models.move_to_end(model)
+        return nlp
+
+
+class EntityCache:
+    def __init__(self, max_entries: int = 1024, *, max_text_chars: int = 2048) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self._max_entries = max_entries
+        self._max_text_chars = max_text_chars
+        self._entries: OrderedDict[_EntityKey, _Entities] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    @property
+    def max_text_chars(self) -> int:
+        return self._max_text_chars
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: _EntityKey) -> _Entities | None:
+        if len(key[2]) > self._max_text_chars:
+            return None
+        with self._lock:
+            entities = self._entries.get(key)
+            if entities is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entities
+
+    def put(self, key: _EntityKey, entities: _Entities) -> None:
+        if len(key[2]) > self._max_text_chars:
+            return
+        with self._lock:
+            self._entries[key] = entities
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"EntityCache(max_entries={self._max_entries}, max_text_chars={self._max_text_chars})"
+        )
+
+    def __getstate__(self) -> tuple[int, int]:
+        return self._max_entries, self._max_text_chars
+
+    def __setstate__(self, state: tuple[int, int]) -> None:
+        max_entries, max_text_chars = state
+        self.__init__(max_entries, max_text_chars=max_text_chars)  # type: ignore[misc]
+
+
+@dataclass(frozen=True, slots=True)
+class _EntityGate(RulePrefilter):
+    min_length: int = 0
+    capitalised: bool = False
+
+    def may_match(self, content: str, features: int) -> bool:
+        if len(content) < self.min_length or content.isspace():
+            return False
+        return not self.capitalised or bool(features & _UPPER_BIT) or not content.isascii()
+
+
+def _chunk_cut(text: str, start: int, limit: int) -> int:
+    floor = start + (limit - start) // 2
+    for separators in _CHUNK_BREAKS:
+        cut = -1
+        for separator in separators:
+            found = text.rfind(separator, floor, limit)
+            if found >= 0:
+                cut = max(cut, found + len(separator))
+        if cut > floor:
+            return cut
+    return limit
+
+
+def _chunk_bounds(text: str, size: int, overlap: int) -> list[_Chunk]:
+    if len(text) <= size:
+        return [(0, len(text), 0, len(text))]
+    cuts = [0]
+    while len(text) - cuts[-1] > size:
+        cuts.append(_chunk_cut(text, cuts[-1], cuts[-1] + size))
+    cuts.append(len(text))
+    return [
+        (max(0, own_start - overlap), min(len(text), own_end + overlap), own_start, own_end)
+        for own_start, own_end in pairwise(cuts)
+    ]
+
+
+def _merge_chunks(chunks: Sequence[_Chunk], found: Sequence[_Entities]) -> _Entities:
+    merged: list[tuple[int, int]] = []
+    for (begin, _, own_start, own_end), entities in zip(chunks, found, strict=True):
+        for start, end in entities:
+            start += begin
+            if own_start <= start < own_end and (not merged or start >= merged[-1][1]):
+                merged.append((start, end + begin))
+    return tuple(merged)
+
+
+_DEFAULT_MODELS = NERModelManager()
+_DEFAULT_ENTITIES = EntityCache()
 
 
 @dataclass(frozen=True, slots=True)
@@ -32,6 +276,31 @@ class NERRule:
     model: str = "en_core_web_sm"
     entity_labels: frozenset[str] = frozenset({"PERSON", "ORG", "GPE", "LOC"})
     metadata: RuleMetadata | None = None
+    batch_size: int = 64
+    n_process: int = 1
+    models: NERModelManager | None = None
+    entity_cache: EntityCache | None = None
+    min_length: int = 2
+    require_capitals: bool = True
+    chunk_chars: int = 100_000
+    chunk_overlap: int = 200
+    prefilter: RulePrefilter | None = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if self.n_process == 0 or self.n_process < -1:
+            raise ValueError("n_process must be a positive number or -1")
+        if self.chunk_overlap < 0 or self.chunk_chars <= 2 * self.chunk_overlap:
+            raise ValueError("chunk_chars must be more than twice chunk_overlap")
+        object.__setattr__(
+            self,
+            "prefilter",
+            _EntityGate(
+                min_length=self.min_length,
+                capitalised=self.require_capitals and self.entity_labels <= _CAPITALISED_LABELS,
+            ),
+        )
 
     def redact(
         self,
@@ -39,32 +308,75 @@ class NERRule:
         config: RedactionConfig,
         context: RuleContext,
     ) -> tuple[str, int]:
-        nlp = _get_nlp(self.model)
-        doc = nlp(content)
-        matches = [
-            (ent.start_char, ent.end_char, ent.text)
-            for ent in doc.ents
-            if ent.label_ in self.entity_labels
+        spans = self.find_spans(content, config, context)
+        return apply_spans(content, spans, context), len(spans)
+
+    def find_spans(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> list[RedactionSpan]:
+        (entities,) = self._entities([content], batched=False)
+        return self._entity_spans(content, entities, config)
+
+    def find_spans_batch(
+        self,
+        contents: Sequence[str],
+        config: RedactionConfig,
+        contexts: Sequence[RuleContext],
+    ) -> list[list[RedactionSpan]]:
+        return [
+            self._entity_spans(content, entities, config)
+            for content, entities in zip(
+                contents, self._entities(contents, batched=True), strict=True
+            )
         ]
-        if not matches:
-            return content, 0
 
-        replacements = [
-            (start, end, orig, _replacement_value(orig, config))
-            for start, end, orig in matches
+    def warm(self) -> None:
+        self._nlp()
+
+    def _nlp(self) -> Language:
+        models = self.models if self.models is not None else _DEFAULT_MODELS
+        return models.get(self.model)
+
+    def _entities(self, contents: Sequence[str], *, batched: bool) -> list[_Entities]:
+        cache = self.entity_cache if self.entity_cache is not None else _DEFAULT_ENTITIES
+        found: list[_Entities | None] = []
+        missing: dict[str, list[int]] = {}
+        for index, content in enumerate(contents):
+            entities = cache.get((self.model, self.entity_labels, content))
+            found.append(entities)
+            if entities is None:
+                missing.setdefault(content, []).append(index)
+        if missing:
+            nlp = self._nlp()
+            chunked = [
+                (text, _chunk_bounds(text, self.chunk_chars, self.chunk_overlap))
+                for text in missing
+            ]
+            texts = (text[begin:end] for text, chunks in chunked for begin, end, _, _ in chunks)
+            docs: Iterator[Doc] = iter(
+                nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process)
+                if batched or len(chunked[0][1]) > 1 or len(chunked) > 1
+                else map(nlp, texts)
+            )
+            for text, chunks in chunked:
+                entities = _merge_chunks(chunks, [self._doc_entities(next(docs)) for _ in chunks])
+                cache.put((self.model, self.entity_labels, text), entities)
+                for index in missing[text]:
+                    found[index] = entities
+        return [entities if entities is not None else () for entities in found]
+
+    def _doc_entities(self, doc: Doc) -> _Entities:
+        return tuple(
+            (ent.start_char, ent.end_char) for ent in doc.ents if ent.label_ in self.entity_labels
+        )
+
+    def _entity_spans(
+        self, content: str, entities: _Entities, config: RedactionConfig
+    ) -> list[RedactionSpan]:
+        return [
+            RedactionSpan(start, end, _replacement_value(content[start:end], config), self.name)
+            for start, end in entities
         ]
-        if context.audit_entries is not None:
-            for start, end, orig, repl in replacements:
-                context.audit_entries.append(
-                    AuditEntry(
-                        rule_name=self.name,
-                        start=context.segment_start + start,
-                        end=context.segment_start + end,
-                        original_hash=_hash_value(orig),
-                        replacement=repl,
-                    )
-                )
-        result = content
-        for start, end, _orig, repl in sorted(replacements, key=lambda x: x[0], reverse=True):
-            result = result[:start] + repl + result[end:]
-        return result, len(replacements)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import re
+
+_NON_DIGITS = re.compile(r"\D+")
+_ASCII_DIGITS = str.maketrans("", "", "0123456789")
+_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+_PHONE_SEPARATORS = re.compile(r"[ .()-]")
+
+
+def digits_of(value: str) -> str:
+    return _NON_DIGITS.sub("", value)
+
+
+def count_digits(value: str) -> int:
+    if value.isascii():
+        return len(value) - len(value.translate(_ASCII_DIGITS))
+    return len(digits_of(value))
+
+
+def luhn_valid(value: str) -> bool:
+    digits = digits_of(value)
+    if len(digits) < 13 or len(digits) > 19:
+        return False
+    doubled = _DOUBLED
+    total = sum(map(int, digits[-1::-2]))
+    total += sum(doubled[int(digit)] for digit in digits[-2::-2])
+    return total % 10 == 0
+
+
+def has_phone_separator(value: str) -> bool:
+    return _PHONE_SEPARATORS.search(value) is not None
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+
+# (start, end) in the text a pass ran on and the length of the text that replaced it.
+Edit = tuple[int, int, int]
+
+
+@dataclass(slots=True)
+class OffsetMap:
+    # Regions of a rewritten text that replaced original text, sorted and disjoint:
+    # (starts[i], ends[i]) in the current text came from (origin_starts[i],
+    # origin_ends[i]). Text between regions is unchanged.
+    starts: list[int] = field(default_factory=list)
+    ends: list[int] = field(default_factory=list)
+    origin_starts: list[int] = field(default_factory=list)
+    origin_ends: list[int] = field(default_factory=list)
+
+    def origin(self, start: int, end: int) -> tuple[int, int]:
+        # A range that starts or ends inside a replaced region is widened to the whole
+        # original text of that region.
+        starts = self.starts
+        if not starts:
+            return start, end
+        index = bisect_right(starts, start) - 1
+        if index < 0:
+            origin_start = start
+        elif start < self.ends[index]:
+            origin_start = self.origin_starts[index]
+        else:
+            origin_start = start - self.ends[index] + self.origin_ends[index]
+        index = bisect_left(starts, end) - 1
+        if index < 0:
+            origin_end = end
+        elif end <= self.ends[index]:
+            origin_end = self.origin_ends[index]
+        else:
+            origin_end = end - self.ends[index] + self.origin_ends[index]
+        return origin_start, origin_end
+
+    def apply(self, edits: Sequence[Edit]) -> None:
+        # Folds in one pass of sorted, disjoint edits made to the current text.
+        if not edits:
+            return
+        starts: list[int] = []
+        ends: list[int] = []
+        origin_starts: list[int] = []
+        origin_ends: list[int] = []
+        count = len(self.starts)
+        index = shift = 0
+
+        def keep(position: int) -> None:
+            starts.append(self.starts[position] + shift)
+            ends.append(self.ends[position] + shift)
+            origin_starts.append(self.origin_starts[position])
+            origin_ends.append(self.origin_ends[position])
+
+        for start, end, length in edits:
+            origin_start, origin_end = self.origin(start, end)
+            while index < count and self.ends[index] <= start and self.starts[index] < end:
+                keep(index)
+                index += 1
+            while index < count and self.starts[index] < end and self.ends[index] > start:
+                index += 1
+            starts.append(start + shift)
+            ends.append(start + shift + length)
+            origin_starts.append(origin_start)
+            origin_ends.append(origin_end)
+            shift += length - (end - start)
+        while index < count:
+            keep(index)
+            index += 1
+        self.starts = starts
+        self.ends = ends
+        self.origin_starts = origin_starts
+        self.origin_ends = origin_ends
+
+
+def net_edits(edits: Sequence[Edit], before: str, after: str) -> list[Edit]:
+    # The disjoint edits that turned `before` into `after`, from the edits a step
+    # reported against its input. Reports that overlap (a later rule matching over an
+    # earlier replacement) are merged into one edit whose length follows from the
+    # text lengths; when the reports cannot explain the output, the changed middle
+    # of the text is one edit.
+    merged: list[list[int]] = []
+    for start, end, length in sorted(edits, key=lambda edit: (edit[0], -edit[1])):
+        if merged and start < merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+            merged[-1][2] = -1
+        else:
+            merged.append([start, end, length])
+    unknown = [index for index, edit in enumerate(merged) if edit[2] < 0]
+    if len(unknown) > 1:
+        first, last = unknown[0], unknown[-1]
+        merged[first : last + 1] = [[merged[first][0], merged[last][1], -1]]
+        unknown = [first]
+    residual = len(after) - len(before)
+    for start, end, length in merged:
+        if length >= 0:
+            residual -= length - (end - start)
+    if unknown:
+        edit = merged[unknown[0]]
+        edit[2] = residual + edit[1] - edit[0]
+        residual = 0
+        if edit[2] < 0:
+            return [_changed_middle(before, after)]
+    if residual:
+        return [_changed_middle(before, after)]
+    return [(start, end, length) for start, end, length in merged]
+
+
+def _changed_middle(before: str, after: str) -> Edit:
+    limit = min(len(before), len(after))
+    prefix = _common_length(lambda size: before[:size] == after[:size], limit)
+    suffix = _common_length(
+        lambda size: before[len(before) - size :] == after[len(after) - size :], limit - prefix
+    )
+    return prefix, len(before) - suffix, len(after) - prefix - suffix
+
+
+def _common_length(matches: Callable[[int], bool], limit: int) -> int:
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if matches(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import re
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import cast
+
+from .allowlist import CompiledAllowlist, compile_allowlist
+from .backends import STDLIB_BACKEND, RegexBackend
+from .prefilter import RulePrefilter
+from .rules import (
+    CredentialUriRule,
+    CreditCardRule,
+    LabelValueRule,
+    PhoneRule,
+    RegexRule,
+    SecretAssignmentRule,
+)
+from .scanner import FusedRegexScanner, fuse_regex_rules
+from .types import RedactionConfig, RedactionRule, RuleContext
+
+
+@dataclass(frozen=True, slots=True)
+class PlannedRegexRule:
+    rule: RegexRule
+    replacer: str | Callable[[re.Match[str]], str]
+
+    @property
+    def name(self) -> str:
+        return self.rule.name
+
+    @property
+    def prefilter(self) -> RulePrefilter | None:
+        return self.rule.prefilter
+
+    def redact(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> tuple[str, int]:
+        if context.audit_entries is not None:
+            return self.rule.redact(content, config, context)
+        return self.rule.pattern.subn(self.replacer, content)
+
+
+PlanStep = RedactionRule | FusedRegexScanner | PlannedRegexRule
+
+_BackendRule = (
+    RegexRule
+    | CreditCardRule
+    | CredentialUriRule
+    | LabelValueRule
+    | PhoneRule
+    | SecretAssignmentRule
+)
+_BACKEND_RULE_TYPES: frozenset[type] = frozenset(
+    {RegexRule, CreditCardRule, CredentialUriRule, LabelValueRule, PhoneRule, SecretAssignmentRule}
+)
+
+
+@dataclass(frozen=True, slots=True)
+class RedactionPlan:
+    config: RedactionConfig
+    rules: tuple[RedactionRule, ...]
+    steps: tuple[PlanStep, ...]
+    priorities: Mapping[str, int]
+    allowlist: CompiledAllowlist | None
+    fingerprint: str = ""
+    batched: bool = False
+    regex_backend: str = STDLIB_BACKEND
+    regex_fallbacks: tuple[str, ...] = ()
+    # The steps as planned before the regex backend recompiled their patterns, one per
+    # step. Built-in pattern safety is looked up on these, by pattern identity.
+    origins: tuple[PlanStep, ...] = ()
+
+
+def _fingerprint_value(value: object) -> str:
+    if isinstance(value, re.Pattern):
+        return f"re({value.pattern!r}, {value.flags})"
+    return repr(value)
+
+
+def _rule_fingerprint(rule: RedactionRule) -> str:
+    kind = f"{type(rule).__module__}.{type(rule).__qualname__}"
+    if not dataclasses.is_dataclass(rule):
+        return f"{kind}:{rule!r}"
+    values = ", ".join(
+        f"{item.name}={_fingerprint_value(getattr(rule, item.name))}"
+        for item in dataclasses.fields(rule)
+    )
+    return f"{kind}({values})"
+
+
+def plan_fingerprint(
+    rules: tuple[RedactionRule, ...],
+    config: RedactionConfig,
+    regex_backend: str = STDLIB_BACKEND,
+) -> str:
+    digest = hashlib.sha256(repr(config).encode("utf-8"))
+    if regex_backend != STDLIB_BACKEND:
+        digest.update(f"\0backend={regex_backend}".encode())
+    for rule in rules:
+        digest.update(b"\0")
+        digest.update(_rule_fingerprint(rule).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _on_backend(step: PlanStep, backend: RegexBackend, fallbacks: list[str]) -> PlanStep:
+    if type(step) not in _BACKEND_RULE_TYPES:
+        return step
+    rule = cast(_BackendRule, step)
+    pattern = backend.compile(rule.pattern)
+    if pattern is None:
+        fallbacks.append(rule.name)
+        return step
+    return cast(RedactionRule, dataclasses.replace(rule, pattern=pattern))
+
+
+def _backend_steps(
+    steps: tuple[PlanStep, ...], backend: RegexBackend, fallbacks: list[str]
+) -> tuple[PlanStep, ...]:
+    compiled: list[PlanStep] = []
+    for step in steps:
+        if isinstance(step, FusedRegexScanner):
+            if step.fallback:
+                fallbacks.extend(rule.name for rule in step.rules)
+            compiled.append(step)
+        else:
+            compiled.append(_on_backend(step, backend, fallbacks))
+    return tuple(compiled)
+
+
+def build_plan(
+    rules: tuple[RedactionRule, ...],
+    config: RedactionConfig,
+    backend: RegexBackend | None = None,
+) -> RedactionPlan:
+    steps: tuple[PlanStep, ...]
+    if config.detection_mode == "spans":
+        steps = rules
+    else:
+        steps = fuse_regex_rules(rules, backend)
+    origins = steps
+    fallbacks: list[str] = []
+    if backend is not None:
+        steps = _backend_steps(steps, backend, fallbacks)
+    if config.detection_mode != "spans":
+        steps = tuple(
+            PlannedRegexRule(rule=step, replacer=step.replacer(config))
+            if isinstance(step, RegexRule)
+            else step
+            for step in steps
+        )
+    regex_backend = backend.name if backend is not None else STDLIB_BACKEND
+    return RedactionPlan(
+        config=config,
+        rules=rules,
+        steps=steps,
+        priorities={rule.name: index for index, rule in enumerate(rules)},
+        allowlist=compile_allowlist(tuple(config.allowlist), tuple(config.allowlist_patterns)),
+        fingerprint=plan_fingerprint(rules, config, regex_backend),
+        batched=any(getattr(rule, "find_spans_batch", None) is not None for rule in rules),
+        regex_backend=regex_backend,
+        regex_fallbacks=tuple(fallbacks),
+        origins=origins,
+    )
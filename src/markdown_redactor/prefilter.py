@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Literal
+
+CharClass = Literal["digit", "upper"]
+
+_CLASS_BITS: dict[str, int] = {"digit": 1, "upper": 2}
+_CLASS_EXPRESSIONS: dict[str, str] = {"digit": r"\d", "upper": "[A-Z]"}
+_CLASS_PATTERNS: tuple[tuple[int, re.Pattern[str]], ...] = tuple(
+    (_CLASS_BITS[name], re.compile(expression)) for name, expression in _CLASS_EXPRESSIONS.items()
+)
+
+
+def segment_features(content: str) -> int:
+    features = 0
+    for bit, pattern in _CLASS_PATTERNS:
+        if pattern.search(content) is not None:
+            features |= bit
+    return features
+
+
+@dataclass(frozen=True, slots=True)
+class RulePrefilter:
+    anchors: tuple[str, ...] = ()
+    required_classes: frozenset[CharClass] = frozenset()
+    leading_class: CharClass | None = None
+    _required_bits: int = field(init=False, compare=False, repr=False)
+    _anchor_pattern: re.Pattern[str] | None = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        bits = 0
+        for name in self.required_classes:
+            if name not in _CLASS_BITS:
+                raise ValueError(f"Unknown character class {name!r}")
+            bits |= _CLASS_BITS[name]
+        if self.leading_class is not None and self.leading_class not in _CLASS_BITS:
+            raise ValueError(f"Unknown character class {self.leading_class!r}")
+        object.__setattr__(self, "_required_bits", bits)
+        object.__setattr__(
+            self,
+            "_anchor_pattern",
+            re.compile("|".join(map(re.escape, self.anchors))) if len(self.anchors) > 1 else None,
+        )
+
+    def may_match(self, content: str, features: int) -> bool:
+        return self.has_classes(features) and self.has_anchor(content)
+
+    def has_classes(self, features: int) -> bool:
+        return not self._required_bits & ~features
+
+    def has_anchor(self, content: str) -> bool:
+        if self._anchor_pattern is not None:
+            return self._anchor_pattern.search(content) is not None
+        return not self.anchors or self.anchors[0] in content
@@ -8,11 +8,17 @@ from .types import RedactionRule
 class RuleRegistry:
     def __init__(self) -> None:
         self._rules: list[RedactionRule] = []
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
 
     def register(self, rule: RedactionRule) -> None:
         if any(r.name == rule.name for r in self._rules):
             raise ValueError(f"Rule {rule.name!r} is already registered")
         self._rules.append(rule)
+        self._version += 1
 
     def extend(self, rules: Iterable[RedactionRule]) -> None:
         for rule in rules:
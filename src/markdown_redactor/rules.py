@@ -5,13 +5,24 @@ from collections.abc import Callable
 from dataclasses import dataclass
 from typing import cast
 
+from .numeric import count_digits, has_phone_separator, luhn_valid
+from .prefilter import RulePrefilter
+from .spans import apply_spans
 from .types import (
-    AuditEntry,
     RedactionConfig,
     RedactionRule,
+    RedactionSpan,
     RuleContext,
     RuleMetadata,
-    _hash_value,
+)
+
+# Whitespace that does not end a line, so these rules never match across lines.
+_INLINE_SPACE = r"\t\x1f \xa0\u1680\u2000-\u200a\u202f\u205f\u3000"
+
+_DIGIT_PREFILTER = RulePrefilter(required_classes=frozenset({"digit"}))
+_DIGIT_LED_PREFILTER = RulePrefilter(required_classes=frozenset({"digit"}), leading_class="digit")
+_UPPER_LED_PREFILTER = RulePrefilter(
+    required_classes=frozenset({"digit", "upper"}), leading_class="upper"
 )
 
 
@@ -39,6 +50,7 @@ class RegexRule:
     pattern: re.Pattern[str]
     replacement: str | Callable[[re.Match[str]], str] | None = None
     metadata: RuleMetadata | None = None
+    prefilter: RulePrefilter | None = None
 
     def redact(
         self,
@@ -47,56 +59,36 @@ class RegexRule:
         context: RuleContext,
     ) -> tuple[str, int]:
         if context.audit_entries is not None:
-            count = 0
-            audit_entries = context.audit_entries
-
-            def _auditing_replace(match: re.Match[str]) -> str:
-                nonlocal count
-                count += 1
-                orig = match.group(0)
-                if self.replacement is None:
-                    repl = _replacement_value(orig, config)
-                elif callable(self.replacement):
-                    repl = self.replacement(match)
-                else:
-                    repl = self.replacement
-                audit_entries.append(
-                    AuditEntry(
-                        rule_name=self.name,
-                        start=context.segment_start + match.start(),
-                        end=context.segment_start + match.end(),
-                        original_hash=_hash_value(orig),
-                        replacement=repl,
-                    )
-                )
-                return repl
+            spans = self.find_spans(content, config, context)
+            return apply_spans(content, spans, context), len(spans)
 
-            updated = self.pattern.sub(_auditing_replace, content)
-            return updated, count
-
-        replacement = (
-            (lambda match: _replacement_value(match.group(0), config))
-            if self.replacement is None
-            else self.replacement
-        )
-        updated, count = self.pattern.subn(replacement, content)
+        updated, count = self.pattern.subn(self.replacer(config), content)
         return updated, count
 
+    def replacer(self, config: RedactionConfig) -> str | Callable[[re.Match[str]], str]:
+        if self.replacement is not None:
+            return self.replacement
+        if config.replacement_mode == "full" and "\\" not in config.mask:
+            return config.mask
+        return lambda match: _replacement_value(match.group(0), config)
 
-def _luhn_valid(number: str) -> bool:
-    digits = [int(ch) for ch in number if ch.isdigit()]
-    if len(digits) < 13 or len(digits) > 19:
-        return False
-
-    total = 0
-    parity = len(digits) % 2
-    for index, digit in enumerate(digits):
-        if index % 2 == parity:
-            digit *= 2
-            if digit > 9:
-                digit -= 9
-        total += digit
-    return total % 10 == 0
+    def find_spans(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> list[RedactionSpan]:
+        replacement = self.replacement
+        spans: list[RedactionSpan] = []
+        for match in self.pattern.finditer(content):
+            if replacement is None:
+                repl = _replacement_value(match.group(0), config)
+            elif callable(replacement):
+                repl = replacement(match)
+            else:
+                repl = match.expand(replacement) if "\\" in replacement else replacement
+            spans.append(RedactionSpan(match.start(), match.end(), repl, self.name))
+        return spans
 
 
 @dataclass(frozen=True, slots=True)
@@ -104,6 +96,7 @@ class CreditCardRule:
     name: str = "credit_card"
     pattern: re.Pattern[str] = re.compile(r"\b(?:\d[ -]*?){13,19}\b")
     metadata: RuleMetadata | None = None
+    prefilter: RulePrefilter | None = _DIGIT_PREFILTER
 
     def redact(
         self,
@@ -111,39 +104,38 @@ class CreditCardRule:
         config: RedactionConfig,
         context: RuleContext,
     ) -> tuple[str, int]:
-        count = 0
+        spans = self.find_spans(content, config, context)
+        return apply_spans(content, spans, context), len(spans)
 
-        def _replace(match: re.Match[str]) -> str:
-            nonlocal count
-            value = match.group(0)
-            if _luhn_valid(value):
-                count += 1
-                repl = _replacement_value(value, config)
-                if context.audit_entries is not None:
-                    context.audit_entries.append(
-                        AuditEntry(
-                            rule_name=self.name,
-                            start=context.segment_start + match.start(),
-                            end=context.segment_start + match.end(),
-                            original_hash=_hash_value(value),
-                            replacement=repl,
-                        )
-                    )
-                return repl
-            return value
-
-        updated = self.pattern.sub(_replace, content)
-        return updated, count
+    def find_spans(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> list[RedactionSpan]:
+        return [
+            RedactionSpan(
+                match.start(),
+                match.end(),
+                _replacement_value(match.group(0), config),
+                self.name,
+            )
+            for match in self.pattern.finditer(content)
+            if luhn_valid(match.group(0))
+        ]
 
 
 @dataclass(frozen=True, slots=True)
 class PhoneRule:
     name: str = "phone"
-    pattern: re.Pattern[str] = re.compile(r"(?<!\w)(?:\+?\d[\d\s().-]{6,22}\d)(?!\w)")
+    pattern: re.Pattern[str] = re.compile(
+        rf"(?<!\w)(?:\+?\d[\d{_INLINE_SPACE}().-]{{6,22}}\d)(?!\w)"
+    )
     ipv4_pattern: re.Pattern[str] = re.compile(
         r"^(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)$"
     )
     metadata: RuleMetadata | None = None
+    prefilter: RulePrefilter | None = _DIGIT_PREFILTER
 
     def redact(
         self,
@@ -151,46 +143,49 @@ class PhoneRule:
         config: RedactionConfig,
         context: RuleContext,
     ) -> tuple[str, int]:
-        count = 0
+        spans = self.find_spans(content, config, context)
+        return apply_spans(content, spans, context), len(spans)
 
-        def _replace(match: re.Match[str]) -> str:
-            nonlocal count
+    def find_spans(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> list[RedactionSpan]:
+        spans: list[RedactionSpan] = []
+        for match in self.pattern.finditer(content):
             value = match.group(0)
-            digit_count = sum(ch.isdigit() for ch in value)
+            digit_count = count_digits(value)
             if digit_count < 7 or digit_count > 15:
-                return value
+                continue
+            if not has_phone_separator(value):
+                continue
             if self.ipv4_pattern.match(value):
-                return value
-            if not any(sep in value for sep in (" ", "-", ".", "(", ")")):
-                return value
-            count += 1
-            repl = _replacement_value(value, config)
-            if context.audit_entries is not None:
-                context.audit_entries.append(
-                    AuditEntry(
-                        rule_name=self.name,
-                        start=context.segment_start + match.start(),
-                        end=context.segment_start + match.end(),
-                        original_hash=_hash_value(value),
-                        replacement=repl,
-                    )
+                continue
+            spans.append(
+                RedactionSpan(
+                    match.start(),
+                    match.end(),
+                    _replacement_value(value, config),
+                    self.name,
                 )
-            return repl
-
-        updated = self.pattern.sub(_replace, content)
-        return updated, count
+            )
+        return spans
 
 
 @dataclass(frozen=True, slots=True)
 class LabelValueRule:
     name: str = "labeled_sensitive_id"
     pattern: re.Pattern[str] = re.compile(
-        r"(?i)(\b(?:tax\s*id|tin|vat(?:\s*id)?|gst(?:in)?|ssn|sin|nino|"
-        r"national\s*id|driver(?:'?s)?\s*licen[cs]e|dl(?:\s*(?:no|num|#))?|"
-        r"passport(?:\s*(?:no|num|#))?|aadhaar|pan|cpf|cnpj)\b\s*[:#-]?\s*)"
-        r"([A-Z0-9][A-Z0-9\-/.\s]{4,30}[A-Z0-9])"
+        rf"(?i)(\b(?:tax[{_INLINE_SPACE}]*id|tin|vat(?:[{_INLINE_SPACE}]*id)?|gst(?:in)?|"
+        rf"ssn|sin|nino|national[{_INLINE_SPACE}]*id|"
+        rf"driver(?:'?s)?[{_INLINE_SPACE}]*licen[cs]e|dl(?:[{_INLINE_SPACE}]*(?:no|num|#))?|"
+        rf"passport(?:[{_INLINE_SPACE}]*(?:no|num|#))?|aadhaar|pan|cpf|cnpj)\b"
+        rf"[{_INLINE_SPACE}]*[:#-]?[{_INLINE_SPACE}]*)"
+        rf"([A-Z0-9][A-Z0-9\-/.{_INLINE_SPACE}]{{4,30}}[A-Z0-9])"
     )
     metadata: RuleMetadata | None = None
+    prefilter: RulePrefilter | None = None
 
     def redact(
         self,
@@ -198,26 +193,24 @@ class LabelValueRule:
         config: RedactionConfig,
         context: RuleContext,
     ) -> tuple[str, int]:
-        count = 0
-
-        def _replace(match: re.Match[str]) -> str:
-            nonlocal count
-            count += 1
-            repl = _replacement_value(match.group(2), config)
-            if context.audit_entries is not None:
-                context.audit_entries.append(
-                    AuditEntry(
-                        rule_name=self.name,
-                        start=context.segment_start + match.start(2),
-                        end=context.segment_start + match.end(2),
-                        original_hash=_hash_value(match.group(2)),
-                        replacement=repl,
-                    )
-                )
-            return f"{match.group(1)}{repl}"
+        spans = self.find_spans(content, config, context)
+        return apply_spans(content, spans, context), len(spans)
 
-        updated = self.pattern.sub(_replace, content)
-        return updated, count
+    def find_spans(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> list[RedactionSpan]:
+        return [
+            RedactionSpan(
+                match.start(2),
+                match.end(2),
+                _replacement_value(match.group(2), config),
+                self.name,
+            )
+            for match in self.pattern.finditer(content)
+        ]
 
 
 @dataclass(frozen=True, slots=True)
@@ -226,9 +219,10 @@ class SecretAssignmentRule:
     pattern: re.Pattern[str] = re.compile(
         r"(?i)(\b(?:password|passwd|pwd|secret|api[_-]?key|access[_-]?token|"
         r"refresh[_-]?token|client[_-]?secret|aws[_-]?secret[_-]?access[_-]?key)"
-        r"\b\s*[:=]\s*)([\"']?)([^\s\"',;]{6,})([\"']?)"
+        rf"\b[{_INLINE_SPACE}]*[:=][{_INLINE_SPACE}]*)([\"']?)([^\s\"',;]{{6,}})([\"']?)"
     )
     metadata: RuleMetadata | None = None
+    prefilter: RulePrefilter | None = RulePrefilter(anchors=(":", "="))
 
     def redact(
         self,
@@ -236,26 +230,24 @@ class SecretAssignmentRule:
         config: RedactionConfig,
         context: RuleContext,
     ) -> tuple[str, int]:
-        count = 0
-
-        def _replace(match: re.Match[str]) -> str:
-            nonlocal count
-            count += 1
-            repl = _replacement_value(match.group(3), config)
-            if context.audit_entries is not None:
-                context.audit_entries.append(
-                    AuditEntry(
-                        rule_name=self.name,
-                        start=context.segment_start + match.start(3),
-                        end=context.segment_start + match.end(3),
-                        original_hash=_hash_value(match.group(3)),
-                        replacement=repl,
-                    )
-                )
-            return f"{match.group(1)}{match.group(2)}{repl}{match.group(4)}"
+        spans = self.find_spans(content, config, context)
+        return apply_spans(content, spans, context), len(spans)
 
-        updated = self.pattern.sub(_replace, content)
-        return updated, count
+    def find_spans(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> list[RedactionSpan]:
+        return [
+            RedactionSpan(
+                match.start(3),
+                match.end(3),
+                _replacement_value(match.group(3), config),
+                self.name,
+            )
+            for match in self.pattern.finditer(content)
+        ]
 
 
 @dataclass(frozen=True, slots=True)
@@ -266,6 +258,7 @@ class CredentialUriRule:
         r"//[^:\s/]+:)([^@\s/]+)(@)"
     )
     metadata: RuleMetadata | None = None
+    prefilter: RulePrefilter | None = RulePrefilter(anchors=("://",))
 
     def redact(
         self,
@@ -273,26 +266,24 @@ class CredentialUriRule:
         config: RedactionConfig,
         context: RuleContext,
     ) -> tuple[str, int]:
-        count = 0
-
-        def _replace(match: re.Match[str]) -> str:
-            nonlocal count
-            count += 1
-            repl = _replacement_value(match.group(2), config)
-            if context.audit_entries is not None:
-                context.audit_entries.append(
-                    AuditEntry(
-                        rule_name=self.name,
-                        start=context.segment_start + match.start(2),
-                        end=context.segment_start + match.end(2),
-                        original_hash=_hash_value(match.group(2)),
-                        replacement=repl,
-                    )
-                )
-            return f"{match.group(1)}{repl}{match.group(3)}"
+        spans = self.find_spans(content, config, context)
+        return apply_spans(content, spans, context), len(spans)
 
-        updated = self.pattern.sub(_replace, content)
-        return updated, count
+    def find_spans(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> list[RedactionSpan]:
+        return [
+            RedactionSpan(
+                match.start(2),
+                match.end(2),
+                _replacement_value(match.group(2), config),
+                self.name,
+            )
+            for match in self.pattern.finditer(content)
+        ]
 
 
 _EMAIL_PATTERN = re.compile(r"(?<!://)\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
@@ -318,7 +309,9 @@ _US_EIN_PATTERN = re.compile(r"\b\d{2}-\d{7}\b")
 _UK_NINO_PATTERN = re.compile(r"\b(?!BG|GB|NK|KN|TN|NT|ZZ)[A-CEGHJ-PR-TW-Z]{2}\d{6}[A-D]?\b")
 _IN_PAN_PATTERN = re.compile(r"\b[A-Z]{5}\d{4}[A-Z]\b")
 _IN_AADHAAR_PATTERN = re.compile(
-    r"(?<!\d{4}\s)(?<!\d)\d{4}\s\d{4}\s\d{4}(?!\s\d{4})(?![\s-]*\d)"
+    rf"(?<!\d{{4}}[{_INLINE_SPACE}])(?<!\d)"
+    rf"\d{{4}}[{_INLINE_SPACE}]\d{{4}}[{_INLINE_SPACE}]\d{{4}}"
+    rf"(?![{_INLINE_SPACE}]\d{{4}})(?![{_INLINE_SPACE}-]*\d)"
 )
 _IN_GSTIN_PATTERN = re.compile(r"\b\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z]\b")
 _BR_CPF_PATTERN = re.compile(r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b")
@@ -341,6 +334,41 @@ _EU_VAT_PATTERN = re.compile(
     r"PL\d{10}|PT\d{9}|RO\d{2,10}|SE\d{12}|SI\d{8}|SK\d{10})\b"
 )
 
+# Built-in patterns whose boundaries and lookarounds treat a line break like the edge
+# of the text: over parts joined with "\n", every match that stays inside one part is
+# exactly the match that part alone would produce.
+_DOCUMENT_SAFE_PATTERNS: frozenset[re.Pattern[str]] = frozenset(
+    {
+        _EMAIL_PATTERN,
+        _IPV4_PATTERN,
+        _IPV6_PATTERN,
+        _AWS_KEY_PATTERN,
+        _GENERIC_TOKEN_PATTERN,
+        _GOOGLE_API_KEY_PATTERN,
+        _JWT_PATTERN,
+        _PRIVATE_KEY_PATTERN,
+        _US_SSN_PATTERN,
+        _US_EIN_PATTERN,
+        _UK_NINO_PATTERN,
+        _IN_PAN_PATTERN,
+        _IN_AADHAAR_PATTERN,
+        _IN_GSTIN_PATTERN,
+        _BR_CPF_PATTERN,
+        _BR_CNPJ_PATTERN,
+        _IBAN_PATTERN,
+        _SWIFT_BIC_PATTERN,
+        _EU_VAT_PATTERN,
+        CreditCardRule().pattern,
+        PhoneRule().pattern,
+        LabelValueRule().pattern,
+        SecretAssignmentRule().pattern,
+        CredentialUriRule().pattern,
+    }
+)
+# Document-safe patterns that never match a line break either, so every line is
+# redacted exactly as it would be on its own.
+_LINE_LOCAL_PATTERNS: frozenset[re.Pattern[str]] = _DOCUMENT_SAFE_PATTERNS - {_PRIVATE_KEY_PATTERN}
+
 
 def default_rules() -> tuple[RedactionRule, ...]:
     return cast(
@@ -356,6 +384,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="email",
                 pattern=_EMAIL_PATTERN,
+                prefilter=RulePrefilter(anchors=("@",)),
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="medium",
@@ -365,6 +394,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="us_ssn",
                 pattern=_US_SSN_PATTERN,
+                prefilter=_DIGIT_LED_PREFILTER,
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="high",
@@ -374,6 +404,9 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="us_ein",
                 pattern=_US_EIN_PATTERN,
+                prefilter=RulePrefilter(
+                    anchors=("-",), required_classes=frozenset({"digit"}), leading_class="digit"
+                ),
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="high",
@@ -383,6 +416,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="uk_nino",
                 pattern=_UK_NINO_PATTERN,
+                prefilter=_UPPER_LED_PREFILTER,
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="high",
@@ -392,6 +426,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="in_pan",
                 pattern=_IN_PAN_PATTERN,
+                prefilter=_UPPER_LED_PREFILTER,
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="high",
@@ -401,6 +436,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="in_aadhaar",
                 pattern=_IN_AADHAAR_PATTERN,
+                prefilter=_DIGIT_LED_PREFILTER,
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="high",
@@ -410,6 +446,9 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="in_gstin",
                 pattern=_IN_GSTIN_PATTERN,
+                prefilter=RulePrefilter(
+                    required_classes=frozenset({"digit", "upper"}), leading_class="digit"
+                ),
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="high",
@@ -419,6 +458,9 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="br_cpf",
                 pattern=_BR_CPF_PATTERN,
+                prefilter=RulePrefilter(
+                    anchors=("-",), required_classes=frozenset({"digit"}), leading_class="digit"
+                ),
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="high",
@@ -428,6 +470,9 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="br_cnpj",
                 pattern=_BR_CNPJ_PATTERN,
+                prefilter=RulePrefilter(
+                    anchors=("/",), required_classes=frozenset({"digit"}), leading_class="digit"
+                ),
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="high",
@@ -437,6 +482,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="iban",
                 pattern=_IBAN_PATTERN,
+                prefilter=_UPPER_LED_PREFILTER,
                 metadata=RuleMetadata(
                     category="financial",
                     risk_level="high",
@@ -446,6 +492,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="swift_bic",
                 pattern=_SWIFT_BIC_PATTERN,
+                prefilter=_UPPER_LED_PREFILTER,
                 metadata=RuleMetadata(
                     category="financial",
                     risk_level="medium",
@@ -455,6 +502,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="eu_vat",
                 pattern=_EU_VAT_PATTERN,
+                prefilter=_UPPER_LED_PREFILTER,
                 metadata=RuleMetadata(
                     category="pii",
                     risk_level="medium",
@@ -485,6 +533,9 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="ipv4",
                 pattern=_IPV4_PATTERN,
+                prefilter=RulePrefilter(
+                    anchors=(".",), required_classes=frozenset({"digit"}), leading_class="digit"
+                ),
                 metadata=RuleMetadata(
                     category="network",
                     risk_level="low",
@@ -494,6 +545,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="ipv6",
                 pattern=_IPV6_PATTERN,
+                prefilter=RulePrefilter(anchors=(":",)),
                 metadata=RuleMetadata(
                     category="network",
                     risk_level="low",
@@ -503,6 +555,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="aws_access_key",
                 pattern=_AWS_KEY_PATTERN,
+                prefilter=RulePrefilter(anchors=("AKIA", "ASIA"), leading_class="upper"),
                 metadata=RuleMetadata(
                     category="credential",
                     risk_level="high",
@@ -512,6 +565,9 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="generic_token",
                 pattern=_GENERIC_TOKEN_PATTERN,
+                prefilter=RulePrefilter(
+                    anchors=("ghp", "gho", "ghu", "ghs", "ghr", "glpat", "sk_", "sk-", "xox")
+                ),
                 metadata=RuleMetadata(
                     category="credential",
                     risk_level="high",
@@ -521,6 +577,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="google_api_key",
                 pattern=_GOOGLE_API_KEY_PATTERN,
+                prefilter=RulePrefilter(anchors=("AIza",), leading_class="upper"),
                 metadata=RuleMetadata(
                     category="credential",
                     risk_level="high",
@@ -530,6 +587,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="jwt",
                 pattern=_JWT_PATTERN,
+                prefilter=RulePrefilter(anchors=("eyJ",)),
                 metadata=RuleMetadata(
                     category="credential",
                     risk_level="high",
@@ -539,6 +597,7 @@ def default_rules() -> tuple[RedactionRule, ...]:
             RegexRule(
                 name="private_key",
                 pattern=_PRIVATE_KEY_PATTERN,
+                prefilter=RulePrefilter(anchors=("-----BEGIN",)),
                 metadata=RuleMetadata(
                     category="credential",
                     risk_level="high",
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from collections.abc import Sequence
+from dataclasses import dataclass, field, replace
+from typing import TypeGuard, cast
+
+from .audit import AuditLog
+from .backends import RegexBackend
+from .offsets import OffsetMap
+from .prefilter import _CLASS_EXPRESSIONS
+from .rules import _LINE_LOCAL_PATTERNS, RegexRule, _replacement_value
+from .spans import apply_spans
+from .types import RedactionConfig, RedactionRule, RedactionSpan, RuleContext
+
+_MAX_SUBSETS = 64
+
+_Hit = tuple[int, int, int, bool]
+
+
+def _fusable(rule: object) -> TypeGuard[RegexRule]:
+    if type(rule) is not RegexRule:
+        return False
+    replacement = rule.replacement
+    if callable(replacement) or (replacement is not None and "\\" in replacement):
+        return False
+    pattern = rule.pattern
+    return pattern.flags == re.UNICODE and pattern.groups == 0 and pattern.fullmatch("") is None
+
+
+def _line_local(rule: RegexRule) -> bool:
+    return rule.pattern in _LINE_LOCAL_PATTERNS
+
+
+def _alternation(rules: Sequence[RegexRule], *, lookaheads: bool = True) -> str:
+    # Branches that must start with a character of one class are grouped behind a
+    # single lookahead for that class. Classes are disjoint, so two such branches of
+    # different classes never match at the same offset and the regrouping keeps the
+    # tie order; rules without a leading class are never moved past. Backends without
+    # lookahead support get the plain alternation.
+    branches: list[str] = []
+    gated: dict[str, list[str]] = {}
+
+    def flush_gated() -> None:
+        for name, members in gated.items():
+            branches.append(f"(?={_CLASS_EXPRESSIONS[name]})(?:{'|'.join(members)})")
+        gated.clear()
+
+    for index, rule in enumerate(rules):
+        branch = f"(?P<r{index}>{rule.pattern.pattern})"
+        leading = rule.prefilter.leading_class if rule.prefilter is not None else None
+        if leading is None or not lookaheads:
+            flush_gated()
+            branches.append(branch)
+        else:
+            gated.setdefault(leading, []).append(branch)
+    flush_gated()
+    return "|".join(branches)
+
+
+@dataclass(frozen=True, slots=True)
+class FusedRegexScanner:
+    rules: tuple[RegexRule, ...]
+    backend: RegexBackend | None = None
+    pattern: re.Pattern[str] = field(init=False, compare=False)
+    fallback: bool = field(init=False, compare=False)
+    line_local: bool = field(init=False, compare=False)
+    _by_group: dict[str | None, int] = field(init=False, compare=False, repr=False)
+    _later_patterns: dict[int, re.Pattern[str] | None] = field(
+        init=False, compare=False, repr=False
+    )
+    _subsets: dict[tuple[int, ...], FusedRegexScanner] = field(
+        init=False, compare=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        pattern = None
+        if self.backend is not None:
+            pattern = self.backend.compile(re.compile(_alternation(self.rules, lookaheads=False)))
+        object.__setattr__(self, "fallback", self.backend is not None and pattern is None)
+        if pattern is None:
+            pattern = re.compile(_alternation(self.rules))
+        object.__setattr__(self, "pattern", pattern)
+        object.__setattr__(self, "line_local", all(_line_local(rule) for rule in self.rules))
+        object.__setattr__(
+            self, "_by_group", {f"r{index}": index for index in range(len(self.rules))}
+        )
+        object.__setattr__(self, "_later_patterns", {})
+        object.__setattr__(self, "_subsets", {})
+
+    def narrow(self, content: str, features: int) -> FusedRegexScanner | None:
+        selected = tuple(
+            index
+            for index, rule in enumerate(self.rules)
+            if rule.prefilter is None or rule.prefilter.may_match(content, features)
+        )
+        if len(selected) == len(self.rules):
+            return self
+        if not selected:
+            return None
+        subset = self._subsets.get(selected)
+        if subset is None:
+            subset = FusedRegexScanner(
+                rules=tuple(self.rules[index] for index in selected),
+                backend=None if self.fallback else self.backend,
+            )
+            if len(self._subsets) < _MAX_SUBSETS:
+                self._subsets[selected] = subset
+        return subset
+
+    def redact(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> tuple[str, dict[str, int]]:
+        spans, nested = self._resolve(content, config)
+        counts: dict[str, int] = {}
+        for span in spans:
+            counts[span.rule_name] = counts.get(span.rule_name, 0) + 1
+        if not nested:
+            return apply_spans(content, spans, context), counts
+
+        # Regions where a later rule matched over an earlier replacement cannot be
+        # written as spans of the input; they are redacted one rule at a time, with
+        # audit offsets mapped back to the region's input.
+        log = context.audit_entries if isinstance(context.audit_entries, AuditLog) else None
+        parts: list[str] = []
+        position = index = 0
+        for start, end in [*nested, (len(content), len(content))]:
+            first = index
+            while index < len(spans) and spans[index].start < start:
+                index += 1
+            parts.append(
+                apply_spans(
+                    content[position:start],
+                    [_shifted(span, -position) for span in spans[first:index]],
+                    replace(context, segment_start=context.segment_start + position),
+                )
+            )
+            region = content[start:end]
+            region_context = replace(context, segment_start=context.segment_start + start)
+            offsets = OffsetMap()
+            for rule in self.rules if region else ():
+                recorded = len(log) if log is not None else 0
+                before = region
+                region, count = rule.redact(region, config, region_context)
+                if log is not None:
+                    log.track(recorded, region_context.segment_start, offsets, before, region)
+                if count:
+                    counts[rule.name] = counts.get(rule.name, 0) + count
+            parts.append(region)
+            position = end
+        return "".join(parts), counts
+
+    def find_spans(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> list[RedactionSpan] | None:
+        spans, nested = self._resolve(content, config)
+        return None if nested else spans
+
+    def _resolve(
+        self, content: str, config: RedactionConfig
+    ) -> tuple[list[RedactionSpan], list[tuple[int, int]]]:
+        # The fused pass is only trusted where it provably equals running the rules one
+        # after another: a region (a line for line-local rules, else the whole text)
+        # whose hits all come from one rule, with no earlier rule matching inside them
+        # and no later rule matching once they are replaced. Other regions are
+        # resolved rule by rule.
+        spans: list[RedactionSpan] = []
+        nested: list[tuple[int, int]] = []
+        unchecked: dict[int, list[tuple[int, int, list[RedactionSpan]]]] = {}
+        redo: list[tuple[int, int]] = []
+        for start, end, hits in self._regions(content, self._hits(content)):
+            index = hits[0][2]
+            if all(hit[2] == index and hit[3] for hit in hits):
+                found = [self._span(content, hit[0], hit[1], index, config) for hit in hits]
+                unchecked.setdefault(index, []).append((start, end, found))
+            else:
+                redo.append((start, end))
+        for index, regions in unchecked.items():
+            flagged = self._flag_later_matches(content, index, regions)
+            for position, (start, end, found) in enumerate(regions):
+                if position in flagged:
+                    redo.append((start, end))
+                else:
+                    spans.extend(found)
+        for start, end in redo:
+            resolved = self._sequential_spans(content, start, end, config)
+            if resolved is None:
+                nested.append((start, end))
+            else:
+                spans.extend(resolved)
+        if redo or len(unchecked) > 1:
+            spans.sort(key=lambda span: span.start)
+            nested.sort()
+        return spans, nested
+
+    def _flag_later_matches(
+        self,
+        content: str,
+        index: int,
+        regions: list[tuple[int, int, list[RedactionSpan]]],
+    ) -> set[int]:
+        # Regions are whole lines for line-local rules, so they can be checked together
+        # joined by line breaks.
+        later = self._later(index)
+        if later is None:
+            return set()
+        offsets: list[int] = []
+        texts: list[str] = []
+        position = 0
+        for start, end, found in regions:
+            offsets.append(position)
+            texts.append(_splice(content[start:end], [_shifted(span, -start) for span in found]))
+            position += len(texts[-1]) + 1
+        return {
+            bisect_right(offsets, match.start()) - 1 for match in later.finditer("\n".join(texts))
+        }
+
+    def _hits(self, content: str) -> list[_Hit]:
+        # After a hit of any rule but the first, the scan resumes one character into
+        # it. A match found there is the first rule matching at that offset, so a hit
+        # is clean when no earlier rule matches inside it; the first match past the
+        # hit is the next hit.
+        search = self.pattern.search
+        by_group = self._by_group
+        hits: list[_Hit] = []
+        match = search(content)
+        while match is not None:
+            start, end = match.span()
+            index = by_group[match.lastgroup]
+            clean = end > start
+            probe = search(content, start + 1 if index or not clean else end)
+            while probe is not None and probe.start() < end:
+                if by_group[probe.lastgroup] < index:
+                    clean = False
+                probe = search(content, probe.start() + 1)
+            hits.append((start, end, index, clean))
+            match = probe
+        return hits
+
+    def _regions(self, content: str, hits: list[_Hit]) -> list[tuple[int, int, list[_Hit]]]:
+        if not hits:
+            return []
+        if not self.line_local:
+            return [(0, len(content), hits)]
+        regions: list[tuple[int, int, list[_Hit]]] = []
+        for hit in hits:
+            if regions and hit[0] < regions[-1][1]:
+                regions[-1][2].append(hit)
+                continue
+            line_end = content.find("\n", hit[1])
+            regions.append(
+                (
+                    content.rfind("\n", 0, hit[0]) + 1,
+                    line_end if line_end >= 0 else len(content),
+                    [hit],
+                )
+            )
+        return regions
+
+    def _later(self, index: int) -> re.Pattern[str] | None:
+        if index not in self._later_patterns:
+            rules = self.rules[index + 1 :]
+            self._later_patterns[index] = re.compile(_alternation(rules)) if rules else None
+        return self._later_patterns[index]
+
+    def _span(
+        self, content: str, start: int, end: int, index: int, config: RedactionConfig
+    ) -> RedactionSpan:
+        rule = self.rules[index]
+        replacement = cast(str | None, rule.replacement)
+        if replacement is None:
+            replacement = _replacement_value(content[start:end], config)
+        return RedactionSpan(start, end, replacement, rule.name)
+
+    def _sequential_spans(
+        self, content: str, start: int, end: int, config: RedactionConfig
+    ) -> list[RedactionSpan] | None:
+        text = content[start:end]
+        applied: list[RedactionSpan] = []
+        current = text
+        for rule_index, rule in enumerate(self.rules):
+            found: list[RedactionSpan] = []
+            index = shift = 0
+            for match in rule.pattern.finditer(current):
+                match_start, match_end = match.span()
+                while index < len(applied):
+                    span = applied[index]
+                    span_start = span.start + shift
+                    if span_start >= match_end:
+                        break
+                    if span_start + len(span.replacement) > match_start:
+                        return None
+                    shift += len(span.replacement) - (span.end - span.start)
+                    index += 1
+                found.append(
+                    self._span(text, match_start - shift, match_end - shift, rule_index, config)
+                )
+            if found:
+                applied = sorted([*applied, *found], key=lambda span: span.start)
+                current = _splice(text, applied)
+        return [_shifted(span, start) for span in applied]
+
+
+def _shifted(span: RedactionSpan, offset: int) -> RedactionSpan:
+    return RedactionSpan(span.start + offset, span.end + offset, span.replacement, span.rule_name)
+
+
+def _splice(content: str, spans: Sequence[RedactionSpan]) -> str:
+    parts: list[str] = []
+    position = 0
+    for span in spans:
+        parts.append(content[position : span.start])
+        parts.append(span.replacement)
+        position = span.end
+    parts.append(content[position:])
+    return "".join(parts)
+
+
+def fuse_regex_rules(
+    rules: Sequence[RedactionRule],
+    backend: RegexBackend | None = None,
+) -> tuple[RedactionRule | FusedRegexScanner, ...]:
+    steps: list[RedactionRule | FusedRegexScanner] = []
+    run: list[RegexRule] = []
+
+    def flush_run() -> None:
+        if len(run) > 1:
+            steps.append(FusedRegexScanner(rules=tuple(run), backend=backend))
+        else:
+            steps.extend(cast(list[RedactionRule], run))
+        run.clear()
+
+    for rule in rules:
+        if _fusable(rule):
+            if run and _line_local(rule) != _line_local(run[0]):
+                flush_run()
+            run.append(rule)
+            continue
+        flush_run()
+        steps.append(rule)
+
+    flush_run()
+    return tuple(steps)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Literal
+
+from .audit import AuditLog
+from .types import AuditEntry, RedactionSpan, RuleContext, _hash_value
+
+
+def resolve_overlaps(
+    spans: Iterable[RedactionSpan],
+    *,
+    policy: Literal["priority", "longest"],
+    priorities: Mapping[str, int],
+) -> list[RedactionSpan]:
+    fallback = len(priorities)
+    if policy == "longest":
+        ordered = sorted(
+            spans,
+            key=lambda span: (
+                span.start - span.end,
+                priorities.get(span.rule_name, fallback),
+                span.start,
+            ),
+        )
+    else:
+        ordered = sorted(
+            spans,
+            key=lambda span: (priorities.get(span.rule_name, fallback), span.start),
+        )
+
+    starts: list[int] = []
+    accepted: list[RedactionSpan] = []
+    for span in ordered:
+        index = bisect_left(starts, span.start)
+        if index > 0 and accepted[index - 1].end > span.start:
+            continue
+        if index < len(accepted) and accepted[index].start < span.end:
+            continue
+        starts.insert(index, span.start)
+        accepted.insert(index, span)
+    return accepted
+
+
+def apply_spans(
+    content: str,
+    spans: Sequence[RedactionSpan],
+    context: RuleContext,
+) -> str:
+    if not spans:
+        return content
+
+    audit_entries = context.audit_entries
+    if isinstance(audit_entries, AuditLog):
+        audit_entries.record_spans(content, spans, context.segment_start)
+        audit_entries = None
+    parts: list[str] = []
+    position = 0
+    for span in spans:
+        if audit_entries is not None:
+            audit_entries.append(
+                AuditEntry(
+                    rule_name=span.rule_name,
+                    start=context.segment_start + span.start,
+                    end=context.segment_start + span.end,
+                    original_hash=_hash_value(content[span.start : span.end]),
+                    replacement=span.replacement,
+                )
+            )
+        parts.append(content[position : span.start])
+        parts.append(span.replacement)
+        position = span.end
+    parts.append(content[position:])
+    return "".join(parts)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import codecs
+import io
+import mmap
+import queue
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator, Sequence
+from pathlib import Path
+from typing import Protocol
+
+from .types import AuditEntry, RedactionStats
+
+_READ_SIZE = 1 << 16
+_MMAP_WINDOW = 1 << 22
+_BRIDGE_PENDING = 16
+_END = object()
+_LINE_BREAKS = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+
+
+class Readable(Protocol):
+    def read(self, size: int = ..., /) -> str: ...
+
+
+class Writable(Protocol):
+    def write(self, text: str, /) -> object: ...
+
+
+def iter_chunks(source: Readable | Iterable[str], *, read_size: int = _READ_SIZE) -> Iterator[str]:
+    read = getattr(source, "read", None)
+    if read is None:
+        yield from source  # type: ignore[misc]
+        return
+    while True:
+        chunk = read(read_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_mapped_chunks(
+    path: str | Path,
+    *,
+    encoding: str = "utf-8",
+    window_size: int = _MMAP_WINDOW,
+) -> Iterator[str]:
+    with open(path, "rb") as handle:
+        if not handle.seek(0, io.SEEK_END):
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(encoding)(), translate=True
+            )
+            for offset in range(0, len(mapped), window_size):
+                text = decoder.decode(mapped[offset : offset + window_size])
+                if text:
+                    yield text
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    pending: list[str] = []
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if pending and pending[-1].endswith("\r"):
+            chunk = "".join(pending) + chunk
+            pending.clear()
+        lines = chunk.splitlines(keepends=True)
+        if len(lines) == 1 and chunk[-1] not in _LINE_BREAKS:
+            pending.append(chunk)
+            continue
+        if pending:
+            lines[0] = "".join(pending) + lines[0]
+            pending.clear()
+        tail = lines[-1]
+        if tail[-1] not in _LINE_BREAKS or tail[-1] == "\r":
+            pending.append(lines.pop())
+        yield from lines
+    if pending:
+        yield from "".join(pending).splitlines(keepends=True)
+
+
+class RedactionStream:
+    def __init__(self, chunks: Iterator[str]) -> None:
+        self._chunks = chunks
+        self.stats: RedactionStats | None = None
+        self.audit_log: Sequence[AuditEntry] = ()
+
+    def __iter__(self) -> Iterator[str]:
+        return self._chunks
+
+    def __next__(self) -> str:
+        return next(self._chunks)
+
+
+class AsyncRedactionStream:
+    def __init__(self, chunks: AsyncIterator[str], stream: RedactionStream) -> None:
+        self._chunks = chunks
+        self._stream = stream
+
+    @property
+    def stats(self) -> RedactionStats | None:
+        return self._stream.stats
+
+    @property
+    def audit_log(self) -> Sequence[AuditEntry]:
+        return self._stream.audit_log
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._chunks
+
+    async def __anext__(self) -> str:
+        return await self._chunks.__anext__()
+
+
+class ChunkBridge:
+    def __init__(self, max_pending: int = _BRIDGE_PENDING) -> None:
+        self._queue: queue.SimpleQueue[object] = queue.SimpleQueue()
+        self._slots = asyncio.Semaphore(max_pending)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._error: BaseException | None = None
+
+    async def pump(self, source: AsyncIterable[str]) -> None:
+        self._loop = asyncio.get_running_loop()
+        try:
+            async for chunk in source:
+                await self._slots.acquire()
+                self._queue.put(chunk)
+        except Exception as exc:
+            self._error = exc
+        finally:
+            self._queue.put(_END)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            chunk = self._queue.get()
+            if chunk is _END:
+                if self._error is not None:
+                    raise self._error
+                return
+            assert self._loop is not None and isinstance(chunk, str)
+            self._loop.call_soon_threadsafe(self._slots.release)
+            yield chunk
+
+
+def take_chunks(stream: Iterable[str], budget: int) -> list[str]:
+    taken: list[str] = []
+    for chunk in stream:
+        taken.append(chunk)
+        budget -= len(chunk)
+        if budget <= 0:
+            break
+    return taken
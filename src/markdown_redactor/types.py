@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import hashlib
-from collections.abc import Mapping
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass, field
-from typing import Literal, Protocol
+from typing import TYPE_CHECKING, Literal, Protocol
+
+if TYPE_CHECKING:
+    from .audit import AuditLog
 
 
 def _hash_value(value: str) -> str:
@@ -36,20 +39,35 @@ class RedactionConfig:
     skip_fenced_code_blocks: bool = True
     skip_inline_code: bool = True
     allowlist: tuple[str, ...] = ()
+    allowlist_patterns: tuple[str, ...] = ()
     enabled_rule_names: tuple[str, ...] | None = None
     disabled_rule_names: tuple[str, ...] = ()
     min_risk_level: Literal["high", "medium", "low"] | None = None
     collect_audit_log: bool = False
+    detection_mode: Literal["sequential", "spans"] = "sequential"
+    overlap_policy: Literal["priority", "longest"] = "priority"
+    collect_rule_timings: bool = False
+    rule_scope: Literal["segment", "document"] = "segment"
 
 
 @dataclass(frozen=True, slots=True)
 class RuleContext:
     file_path: str | None = None
     metadata: Mapping[str, str] = field(default_factory=dict)
-    audit_entries: list[AuditEntry] | None = field(default=None, hash=False, compare=False)
+    audit_entries: list[AuditEntry] | AuditLog | None = field(
+        default=None, hash=False, compare=False
+    )
     segment_start: int = field(default=0, hash=False, compare=False)
 
 
+@dataclass(frozen=True, slots=True)
+class RedactionSpan:
+    start: int
+    end: int
+    replacement: str
+    rule_name: str
+
+
 class RedactionRule(Protocol):
     name: str
     metadata: RuleMetadata | None
@@ -63,6 +81,34 @@ class RedactionRule(Protocol):
         ...
 
 
+class SpanRedactionRule(RedactionRule, Protocol):
+    def find_spans(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> list[RedactionSpan]:
+        ...
+
+
+class BatchSpanRedactionRule(SpanRedactionRule, Protocol):
+    def find_spans_batch(
+        self,
+        contents: Sequence[str],
+        config: RedactionConfig,
+        contexts: Sequence[RuleContext],
+    ) -> list[list[RedactionSpan]]:
+        ...
+
+
+@dataclass(frozen=True, slots=True)
+class RuleTiming:
+    invocations: int
+    elapsed_ms: float
+    chars_scanned: int
+    matches: int
+
+
 @dataclass(frozen=True, slots=True)
 class RedactionStats:
     total_matches: int
@@ -70,10 +116,24 @@ class RedactionStats:
     elapsed_ms: float
     source_bytes: int
     output_bytes: int
+    skipped_rule_invocations: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    rule_timings: Mapping[str, RuleTiming] = field(default_factory=dict)
+    segmentation_ms: float = 0.0
+    allowlist_ms: float = 0.0
+    regex_backend: str = "re"
+    regex_fallbacks: tuple[str, ...] = ()
 
 
 @dataclass(frozen=True, slots=True)
 class RedactionResult:
     content: str
     stats: RedactionStats
-    audit_log: tuple[AuditEntry, ...] = ()
+    audit_log: Sequence[AuditEntry] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class BatchRedactionResult:
+    results: tuple[RedactionResult, ...]
+    stats: RedactionStats
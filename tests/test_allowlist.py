@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from typing import Literal
+
+import pytest
+
+from markdown_redactor import RedactionConfig, create_default_engine
+from markdown_redactor.allowlist import compile_allowlist
+
+
+def test_compile_allowlist_returns_none_when_empty() -> None:
+    assert compile_allowlist(()) is None
+    assert compile_allowlist(("",)) is None
+
+
+def test_compile_allowlist_is_cached_per_config() -> None:
+    first = compile_allowlist(("a@b.com", "c@d.com"))
+
+    assert compile_allowlist(("a@b.com", "c@d.com")) is first
+
+
+def test_protected_ranges_prefer_longest_value_and_merge_patterns() -> None:
+    allowlist = compile_allowlist(
+        ("example.com", "jane@example.com", "ab"),
+        (r"db\d+\.internal",),
+    )
+    assert allowlist is not None
+    content = "jane@example.com and example.com db7.internal"
+
+    ranges = allowlist.protected_ranges(content)
+
+    assert [content[start:end] for start, end in ranges] == [
+        "jane@example.com",
+        "example.com",
+        "db7.internal",
+    ]
+
+
+def test_invalid_allowlist_pattern_raises_value_error() -> None:
+    with pytest.raises(ValueError, match="Invalid allowlist pattern"):
+        compile_allowlist((), ("(unclosed",))
+
+
+def test_allowlist_keeps_audit_offsets_exact() -> None:
+    engine = create_default_engine()
+    content = "keep ops@example.com but redact jane@example.com"
+
+    result = engine.redact(
+        content,
+        config=RedactionConfig(allowlist=("ops@example.com",), collect_audit_log=True),
+    )
+
+    assert result.content == "keep ops@example.com but redact [REDACTED]"
+    assert [content[entry.start : entry.end] for entry in result.audit_log] == ["jane@example.com"]
+
+
+def test_allowlist_patterns_protect_regex_matches() -> None:
+    engine = create_default_engine()
+
+    result = engine.redact(
+        "hosts 10.0.0.1 and 10.9.0.1",
+        config=RedactionConfig(allowlist_patterns=(r"10\.0\.\d+\.\d+",)),
+    )
+
+    assert result.content == "hosts 10.0.0.1 and [REDACTED]"
+    assert result.stats.rule_matches == {"ipv4": 1}
+
+
+@pytest.mark.parametrize("detection_mode", ["sequential", "spans"])
+@pytest.mark.parametrize("rule_scope", ["segment", "document"])
+def test_allowlisted_substring_does_not_split_a_secret(
+    detection_mode: Literal["sequential", "spans"],
+    rule_scope: Literal["segment", "document"],
+) -> None:
+    engine = create_default_engine()
+    content = "api_key=GB82WEST12345698765432"
+
+    result = engine.redact(
+        content,
+        config=RedactionConfig(
+            allowlist=("1234",),
+            detection_mode=detection_mode,
+            rule_scope=rule_scope,
+            collect_audit_log=True,
+        ),
+    )
+
+    assert result.content == "api_key=[REDACTED]1234[REDACTED]"
+    assert [content[entry.start : entry.end] for entry in result.audit_log][:2] == [
+        "GB82WEST",
+        "5698765432",
+    ]
+
+
+def test_match_overlapping_allowlisted_value_is_redacted_around_it() -> None:
+    engine = create_default_engine()
+    content = "mail jane@example.com or ops@example.com"
+
+    partial = engine.redact(
+        content, config=RedactionConfig(allowlist=("example.com",), collect_audit_log=True)
+    )
+    whole = engine.redact(content, config=RedactionConfig(allowlist=("jane@example.com",)))
+
+    assert partial.content == "mail [REDACTED]example.com or [REDACTED]example.com"
+    assert [content[entry.start : entry.end] for entry in partial.audit_log] == ["jane@", "ops@"]
+    assert whole.content == "mail jane@example.com or [REDACTED]"
+
+
+def test_match_inside_allowlisted_value_is_dropped() -> None:
+    engine = create_default_engine()
+
+    result = engine.redact(
+        "ticket ref-4111 1111 1111 1111-end and 4111 1111 1111 1111",
+        config=RedactionConfig(allowlist=("ref-4111 1111 1111 1111-end",)),
+    )
+
+    assert result.content == "ticket ref-4111 1111 1111 1111-end and [REDACTED]"
+    assert result.stats.rule_matches == {"credit_card": 1}
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from markdown_redactor import RedactionConfig, create_default_engine
+
+DOCUMENT = "Contact jane@example.com\n\n```\njane@example.com\n```\n\nServer 10.0.0.1\n" * 50
+
+
+def test_aredact_matches_redact() -> None:
+    engine = create_default_engine()
+    config = RedactionConfig(collect_audit_log=True)
+
+    result = asyncio.run(engine.aredact(DOCUMENT, config=config))
+
+    expected = engine.redact(DOCUMENT, config=config)
+    assert result.content == expected.content
+    assert result.stats.rule_matches == expected.stats.rule_matches
+    assert result.audit_log == expected.audit_log
+
+
+def test_aredact_file_uses_configured_executor(tmp_path: Path) -> None:
+    path = tmp_path / "in.md"
+    path.write_text(DOCUMENT, encoding="utf-8")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        engine = create_default_engine(executor=executor, max_concurrency=1)
+
+        async def run() -> list[str]:
+            results = await asyncio.gather(*(engine.aredact_file(path) for _ in range(3)))
+            return [result.content for result in results]
+
+        contents = asyncio.run(run())
+
+    assert contents == [engine.redact_file(path).content] * 3
+
+
+def test_max_concurrency_works_across_event_loops() -> None:
+    engine = create_default_engine(max_concurrency=1)
+
+    async def run() -> list[str]:
+        results = await asyncio.gather(*(engine.aredact(DOCUMENT) for _ in range(3)))
+        return [result.content for result in results]
+
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+
+    assert first == second == [engine.redact(DOCUMENT).content] * 3
+
+
+def test_aiter_redact_accepts_async_and_sync_sources() -> None:
+    engine = create_default_engine()
+    expected = engine.redact(DOCUMENT)
+
+    async def source() -> AsyncIterator[str]:
+        for index in range(0, len(DOCUMENT), 7):
+            await asyncio.sleep(0)
+            yield DOCUMENT[index : index + 7]
+
+    async def collect(stream_source: object) -> tuple[str, int | None]:
+        stream = engine.aiter_redact(stream_source)  # type: ignore[arg-type]
+        chunks = [chunk async for chunk in stream]
+        return "".join(chunks), stream.stats.total_matches if stream.stats else None
+
+    assert asyncio.run(collect(source())) == (expected.content, expected.stats.total_matches)
+    assert asyncio.run(collect([DOCUMENT])) == (expected.content, expected.stats.total_matches)
+
+
+def test_aiter_redact_propagates_source_errors() -> None:
+    engine = create_default_engine()
+
+    async def source() -> AsyncIterator[str]:
+        yield "jane@example.com\n"
+        raise OSError("connection reset")
+
+    async def consume() -> None:
+        async for _ in engine.aiter_redact(source()):
+            pass
+
+    with pytest.raises(OSError, match="connection reset"):
+        asyncio.run(consume())
+
+
+def test_aredact_can_be_cancelled_between_slices() -> None:
+    engine = create_default_engine()
+    document = "jane@example.com\n" * 50_000
+
+    async def run() -> None:
+        task = asyncio.create_task(engine.aredact(document))
+        await asyncio.sleep(0)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(run())
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import pickle
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from markdown_redactor import (
+    AuditEntry,
+    AuditLog,
+    BinaryAuditSink,
+    JsonlAuditSink,
+    RedactionConfig,
+    RedactionSpan,
+    create_default_engine,
+    read_binary_audit,
+)
+from markdown_redactor import audit as audit_module
+
+
+def _sha(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+def test_audit_log_hashes_each_distinct_value_once_on_first_read(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    hashed: list[str] = []
+    monkeypatch.setattr(
+        audit_module, "_hash_value", lambda value: hashed.append(value) or _sha(value)
+    )
+    engine = create_default_engine()
+    content = "Contact jane@example.com\n" * 50 + "and ops@example.com\n"
+
+    result = engine.redact(content, config=RedactionConfig(collect_audit_log=True))
+
+    assert len(result.audit_log) == 51
+    assert hashed == []
+    assert result.audit_log[0].original_hash == _sha("jane@example.com")
+    assert sorted(hashed) == ["jane@example.com", "ops@example.com"]
+    assert result.audit_log[-1].original_hash == _sha("ops@example.com")
+    assert len(hashed) == 2
+
+
+def test_audit_log_behaves_like_a_sequence_of_entries() -> None:
+    log = AuditLog()
+    log.record_spans("a secret b", [RedactionSpan(2, 8, "[REDACTED]", "word")], offset=10)
+    log.append(AuditEntry("email", 0, 5, "abc", "[REDACTED]"))
+
+    expected = (
+        AuditEntry("word", 12, 18, _sha("secret"), "[REDACTED]"),
+        AuditEntry("email", 0, 5, "abc", "[REDACTED]"),
+    )
+    assert log == expected
+    assert tuple(log) == expected
+    assert log[-1] == expected[-1]
+    assert log[:1] == expected[:1]
+    assert AuditLog() == ()
+
+
+def test_audit_log_merge_rebases_offsets_and_survives_pickling() -> None:
+    first = AuditLog()
+    first.record("email", 0, 5, "a@b.c", "[REDACTED]")
+    second = AuditLog()
+    second.record("email", 1, 6, "a@b.c", "<email>")
+    second.record("phone", 7, 9, "12", "[REDACTED]")
+
+    first.merge(second, offset=100)
+    restored = pickle.loads(pickle.dumps(first))
+
+    assert [(entry.start, entry.end) for entry in restored] == [(0, 5), (101, 106), (107, 109)]
+    assert [entry.replacement for entry in restored] == ["[REDACTED]", "<email>", "[REDACTED]"]
+    assert restored == first
+
+
+def test_pickled_audit_log_holds_hashes_but_no_original_values() -> None:
+    engine = create_default_engine()
+    result = engine.redact(
+        "SSN 123-45-6789 and jane@example.com\n",
+        config=RedactionConfig(collect_audit_log=True),
+    )
+
+    payload = pickle.dumps(result.audit_log)
+    restored = pickle.loads(payload)
+    restored.record("email", 40, 45, "a@b.c", "[REDACTED]")
+
+    assert b"123-45-6789" not in payload
+    assert b"jane@example.com" not in payload
+    assert restored[:2] == tuple(result.audit_log)
+    assert restored[0].original_hash == _sha("123-45-6789")
+    assert restored[-1].original_hash == _sha("a@b.c")
+
+
+@pytest.mark.parametrize("detection_mode", ["sequential", "spans"])
+@pytest.mark.parametrize("rule_scope", ["segment", "document"])
+def test_audit_offsets_refer_to_the_input_text(detection_mode: str, rule_scope: str) -> None:
+    engine = create_default_engine()
+    content = "mail a@b.com phone +1 (415) 555-2671 ssn 123-45-6789 password=hunter22\n" * 2
+
+    result = engine.redact(
+        content,
+        config=RedactionConfig(
+            collect_audit_log=True, detection_mode=detection_mode, rule_scope=rule_scope
+        ),
+    )
+
+    assert sorted(content[entry.start : entry.end] for entry in result.audit_log) == sorted(
+        ["a@b.com", "+1 (415) 555-2671", "123-45-6789", "hunter22"] * 2
+    )
+    for entry in result.audit_log:
+        assert entry.original_hash == _sha(content[entry.start : entry.end])
+
+
+def test_audit_entry_matching_over_a_replacement_covers_its_original_text() -> None:
+    engine = create_default_engine()
+    content = "call +1 (415) 555-2671 10.0.0.1 now\n"
+
+    result = engine.redact(
+        content,
+        config=RedactionConfig(collect_audit_log=True, replacement_mode="preserve_last4"),
+    )
+
+    spans = [(entry.rule_name, content[entry.start : entry.end]) for entry in result.audit_log]
+    assert spans == [
+        ("phone", "+1 (415) 555-2671 10.0.0"),
+        ("ipv4", "+1 (415) 555-2671 10.0.0.1"),
+    ]
+
+
+_SINK_SAMPLE = "Contact jane@example.com\n\n`x` ops@example.com 10.0.0.1\n" * 30
+
+
+def test_jsonl_sink_receives_the_entries_instead_of_the_result(tmp_path: Path) -> None:
+    engine = create_default_engine()
+    config = RedactionConfig(collect_audit_log=True)
+    expected = engine.redact(_SINK_SAMPLE, config=config)
+    path = tmp_path / "audit.jsonl"
+
+    with JsonlAuditSink(path) as sink:
+        result = engine.redact(_SINK_SAMPLE, config=config, audit_sink=sink)
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert result.content == expected.content
+    assert result.audit_log == ()
+    assert records == [asdict(entry) for entry in expected.audit_log]
+
+
+def test_binary_sink_round_trips_streamed_entries_with_source(tmp_path: Path) -> None:
+    engine = create_default_engine()
+    config = RedactionConfig(collect_audit_log=True)
+    source = tmp_path / "input.md"
+    source.write_text(_SINK_SAMPLE, encoding="utf-8")
+    expected = engine.redact(_SINK_SAMPLE, config=config)
+    path = tmp_path / "audit.bin"
+
+    with BinaryAuditSink(path) as sink:
+        engine.redact_file(source, config=config, mmap=True, audit_sink=sink)
+        engine.redact_stream(
+            io.StringIO("ops@example.com"), io.StringIO(), config=config, audit_sink=sink
+        )
+
+    records = list(read_binary_audit(path))
+    assert [entry for _, entry in records[:-1]] == list(expected.audit_log)
+    assert {name for name, _ in records[:-1]} == {str(source)}
+    assert records[-1] == (None, AuditEntry("email", 0, 15, _sha("ops@example.com"), "[REDACTED]"))
+
+
+def test_audit_sink_requires_audit_collection(tmp_path: Path) -> None:
+    engine = create_default_engine()
+
+    with JsonlAuditSink(tmp_path / "audit.jsonl") as sink, pytest.raises(ValueError):
+        engine.redact("jane@example.com", audit_sink=sink)
+
+
+def test_read_binary_audit_rejects_other_files(tmp_path: Path) -> None:
+    path = tmp_path / "audit.bin"
+    path.write_bytes(b"not audit")
+
+    with pytest.raises(ValueError):
+        list(read_binary_audit(path))
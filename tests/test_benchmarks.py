@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from benchmarks import PLANTED_VALUES, CorpusSpec, generate_corpus
+from markdown_redactor import RedactionConfig, create_default_engine, default_rules
+
+
+def test_corpus_is_deterministic_and_sized() -> None:
+    spec = CorpusSpec(size_bytes=20_000, seed=7)
+
+    first = generate_corpus(spec)
+
+    assert first == generate_corpus(spec)
+    assert first != generate_corpus(CorpusSpec(size_bytes=20_000, seed=8))
+    assert len(first) >= 20_000
+
+
+def test_corpus_plants_a_value_for_every_default_rule() -> None:
+    assert set(PLANTED_VALUES) == {rule.name for rule in default_rules()}
+
+    corpus = generate_corpus(CorpusSpec(size_bytes=5_000, pii_density=0.0))
+    result = create_default_engine().redact(corpus, config=RedactionConfig(skip_inline_code=False))
+
+    assert set(result.stats.rule_matches) == set(PLANTED_VALUES)
+
+
+def test_corpus_density_knobs() -> None:
+    plain = generate_corpus(
+        CorpusSpec(size_bytes=20_000, fence_density=0.0, inline_code_density=0.0)
+    )
+    code_heavy = generate_corpus(
+        CorpusSpec(size_bytes=20_000, fence_density=0.5, inline_code_density=1.0)
+    )
+
+    assert plain.count("```") == 0
+    assert code_heavy.count("```") > 20
+    assert code_heavy.count("`") > plain.count("`")
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from markdown_redactor import (
+    RedactionConfig,
+    RegexRule,
+    ResultCache,
+    RuleContext,
+    RuleMetadata,
+    create_default_engine,
+)
+from markdown_redactor.cache import CachedSegment, SegmentCache
+
+FOOTER = "Questions? Mail support@example.com or call +1 (415) 555-2671\n"
+
+
+def test_repeated_segments_hit_the_cache_with_rebased_audit_offsets() -> None:
+    engine = create_default_engine(segment_cache_bytes=1 << 20)
+    uncached = create_default_engine()
+    config = RedactionConfig(collect_audit_log=True, skip_inline_code=False)
+    document = "```\ncode\n```\n".join([FOOTER] * 3)
+
+    result = engine.redact(document, config=config)
+    expected = uncached.redact(document, config=config)
+
+    assert result.content == expected.content
+    assert result.audit_log == expected.audit_log
+    assert result.stats.rule_matches == expected.stats.rule_matches
+    assert (result.stats.cache_hits, result.stats.cache_misses) == (2, 1)
+
+    again = engine.redact(document, config=config)
+    assert (again.stats.cache_hits, again.stats.cache_misses) == (3, 0)
+    assert again.audit_log == expected.audit_log
+
+
+def test_cache_is_keyed_on_the_plan() -> None:
+    engine = create_default_engine(segment_cache_bytes=1 << 20)
+
+    first = engine.redact(FOOTER)
+    masked = engine.redact(FOOTER, config=RedactionConfig(mask="<x>"))
+
+    assert first.content != masked.content
+    assert masked.stats.cache_misses == 1
+
+    engine.registry.register(RegexRule(name="questions", pattern=re.compile(r"Questions")))
+    extended = engine.redact(FOOTER)
+    assert extended.content.startswith("[REDACTED]?")
+    assert extended.stats.cache_misses == 1
+
+
+def test_segment_cache_evicts_least_recently_used_entries_by_size() -> None:
+    entry = CachedSegment(
+        content="x" * 100, rule_counts=(), skipped_rule_invocations=0, audit_log=()
+    )
+    cache = SegmentCache(max_bytes=3 * (entry.size + 100))
+
+    for key in ("a", "b", "c"):
+        cache.put("plan", key * 50, entry)
+    assert cache.get("plan", "a" * 50) is entry
+    cache.put("plan", "d" * 50, entry)
+
+    assert len(cache) == 3
+    assert cache.get("plan", "b" * 50) is None
+    assert cache.get("plan", "a" * 50) is entry
+    assert cache.current_bytes <= cache.max_bytes
+
+    cache.clear()
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+
+def test_segment_cache_rejects_non_positive_size() -> None:
+    with pytest.raises(ValueError, match="max_bytes"):
+        SegmentCache(max_bytes=0)
+
+
+def test_result_cache_reuses_redact_file_output(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "cache")
+    engine = create_default_engine(result_cache=cache)
+    source = tmp_path / "in.md"
+    source.write_text(FOOTER, encoding="utf-8")
+    config = RedactionConfig(collect_audit_log=True)
+
+    first = engine.redact_file(source, config=config)
+    assert len(list(cache.directory.glob("*/*.json"))) == 1
+
+    calls: list[str] = []
+    original = engine.redact
+
+    def counting_redact(*args: object, **kwargs: object) -> object:
+        calls.append("redact")
+        return original(*args, **kwargs)  # type: ignore[arg-type]
+
+    engine.redact = counting_redact  # type: ignore[method-assign]
+    second = engine.redact_file(source, config=config)
+
+    assert calls == []
+    assert second.content == first.content
+    assert second.audit_log == first.audit_log
+    assert second.stats.rule_matches == first.stats.rule_matches
+
+    engine.redact_file(source, config=RedactionConfig(mask="<x>"))
+    source.write_text(FOOTER + "more\n", encoding="utf-8")
+    engine.redact_file(source, config=config)
+    assert calls == ["redact", "redact"]
+
+
+@dataclass(frozen=True)
+class _TenantRule:
+    name: str = "tenant_secret"
+    metadata: RuleMetadata | None = None
+
+    def redact(
+        self, content: str, config: RedactionConfig, context: RuleContext
+    ) -> tuple[str, int]:
+        if context.metadata.get("tenant") != "strict":
+            return content, 0
+        return re.subn(r"\bsecret\b", config.mask, content)
+
+
+def test_result_cache_key_includes_context(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "cache")
+    engine = create_default_engine(result_cache=cache)
+    engine.registry.register(_TenantRule())
+    first = tmp_path / "a.md"
+    second = tmp_path / "b.md"
+    for path in (first, second):
+        path.write_text("the secret plan\n", encoding="utf-8")
+
+    lenient = engine.redact_file(first, context=RuleContext(metadata={"tenant": "open"}))
+    strict = engine.redact_file(first, context=RuleContext(metadata={"tenant": "strict"}))
+    engine.redact_file(second)
+
+    assert lenient.content == "the secret plan\n"
+    assert strict.content == "the [REDACTED] plan\n"
+    assert len(list(cache.directory.glob("*/*.json"))) == 3
+
+
+@dataclass(frozen=True)
+class _MetadataSecretRule:
+    name: str = "metadata_secret"
+    metadata: RuleMetadata | None = None
+
+    def redact(
+        self, content: str, config: RedactionConfig, context: RuleContext
+    ) -> tuple[str, int]:
+        secret = context.metadata.get("secret")
+        if not secret:
+            return content, 0
+        return re.subn(re.escape(secret), config.mask, content)
+
+
+def test_segment_cache_key_includes_context_for_custom_rules() -> None:
+    engine = create_default_engine(segment_cache_bytes=1 << 20)
+    engine.registry.register(_MetadataSecretRule())
+    text = "hello alpha beta\n"
+
+    first = engine.redact(text, context=RuleContext(metadata={"secret": "alpha"}))
+    second = engine.redact(text, context=RuleContext(metadata={"secret": "beta"}))
+    again = engine.redact(text, context=RuleContext(metadata={"secret": "beta"}))
+
+    assert first.content == "hello [REDACTED] beta\n"
+    assert second.content == "hello alpha [REDACTED]\n"
+    assert (second.stats.cache_hits, second.stats.cache_misses) == (0, 1)
+    assert again.content == second.content
+    assert again.stats.cache_hits == 1
+
+
+def test_segment_cache_is_shared_across_files_for_built_in_rules() -> None:
+    engine = create_default_engine(segment_cache_bytes=1 << 20)
+
+    engine.redact(FOOTER, context=RuleContext(file_path="a.md"))
+    result = engine.redact(FOOTER, context=RuleContext(file_path="b.md", metadata={"k": "v"}))
+
+    assert result.stats.cache_misses == 0
+    assert result.stats.cache_hits > 0
+
+
+def test_result_cache_ignores_corrupt_entries_and_evicts_by_size(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path, max_bytes=600)
+    engine = create_default_engine()
+    result = engine.redact(FOOTER)
+
+    keys = [cache.key("plan", str(index).encode()) for index in range(4)]
+    for key in keys:
+        cache.put(key, result)
+
+    stored = list(tmp_path.glob("*/*.json"))
+    assert 0 < len(stored) < 4
+    assert sum(path.stat().st_size for path in stored) <= 600
+    assert cache.get(keys[-1]) == result
+
+    (latest,) = tmp_path.glob(f"*/{keys[-1][2:]}.json")
+    latest.write_text("{not json", encoding="utf-8")
+    assert cache.get(keys[-1]) is None
+
+    cache.clear()
+    assert list(tmp_path.glob("*/*.json")) == []
@@ -4,6 +4,7 @@ import json
 from io import StringIO
 from pathlib import Path
 
+from markdown_redactor import read_binary_audit
 from markdown_redactor.cli import main
 
 
@@ -72,6 +73,20 @@ def test_cli_stats_to_stderr(capsys: object, tmp_path: Path) -> None:
     assert "elapsed_ms" in stats
 
 
+def test_cli_regex_backend_is_reported_in_stats(capsys: object, tmp_path: Path) -> None:
+    input_file = tmp_path / "in.md"
+    input_file.write_text("jane@example.com", encoding="utf-8")
+
+    exit_code = main([str(input_file), "--regex-backend", "re2", "--stats"])
+
+    captured = capsys.readouterr()  # type: ignore[attr-defined]
+    stats = json.loads(captured.err)
+    assert exit_code == 0
+    assert captured.out == "[REDACTED]"
+    assert stats["regex_backend"] == "re2"
+    assert "email" in stats["regex_fallbacks"]
+
+
 def test_cli_returns_error_code_for_missing_file(capsys: object) -> None:
     exit_code = main(["does-not-exist.md"])
 
@@ -103,6 +118,18 @@ def test_cli_allowlist_preserves_exact_value(capsys: object, tmp_path: Path) ->
     assert "10.0.0.1" not in out
 
 
+def test_cli_allowlist_pattern_preserves_matches(capsys: object, tmp_path: Path) -> None:
+    input_file = tmp_path / "in.md"
+    input_file.write_text("hosts 10.0.0.1 and 10.9.0.1", encoding="utf-8")
+
+    exit_code = main([str(input_file), "--allowlist-pattern", r"10\.0\.\d+\.\d+"])
+
+    out = capsys.readouterr().out  # type: ignore[attr-defined]
+    assert exit_code == 0
+    assert "10.0.0.1" in out
+    assert "10.9.0.1" not in out
+
+
 def test_cli_enable_rule_limits_active_rules(capsys: object, tmp_path: Path) -> None:
     input_file = tmp_path / "in.md"
     input_file.write_text("email jane@example.com ip 10.0.0.1", encoding="utf-8")
@@ -125,3 +152,136 @@ def test_cli_disable_rule_skips_selected_rule(capsys: object, tmp_path: Path) ->
     assert exit_code == 0
     assert "jane@example.com" in out
     assert "10.0.0.1" not in out
+
+
+def test_cli_directory_mode_mirrors_tree(capsys: object, tmp_path: Path) -> None:
+    input_dir = tmp_path / "docs"
+    (input_dir / "nested").mkdir(parents=True)
+    (input_dir / "a.md").write_text("email jane@example.com", encoding="utf-8")
+    (input_dir / "nested" / "b.md").write_text("ip 10.0.0.1\nip 10.0.0.2", encoding="utf-8")
+    (input_dir / "notes.txt").write_text("jane@example.com", encoding="utf-8")
+    out_dir = tmp_path / "out"
+
+    exit_code = main([str(input_dir), "--out-dir", str(out_dir), "-j", "2", "--stats"])
+
+    err = capsys.readouterr().err  # type: ignore[attr-defined]
+    payload = json.loads(err)
+    assert exit_code == 0
+    assert (out_dir / "a.md").read_text(encoding="utf-8") == "email [REDACTED]"
+    nested = (out_dir / "nested" / "b.md").read_text(encoding="utf-8")
+    assert nested == "ip [REDACTED]\nip [REDACTED]"
+    assert not (out_dir / "notes.txt").exists()
+    assert sorted(path.name for path in out_dir.rglob("*")) == ["a.md", "b.md", "nested"]
+    assert payload["files"] == 2
+    assert payload["rule_matches"] == {"email": 1, "ipv4": 2}
+    assert payload["file_ms_p50"] <= payload["file_ms_p99"]
+
+
+def test_cli_directory_mode_glob_and_single_job(tmp_path: Path) -> None:
+    input_dir = tmp_path / "docs"
+    input_dir.mkdir()
+    (input_dir / "a.md").write_text("jane@example.com", encoding="utf-8")
+    (input_dir / "b.txt").write_text("jane@example.com", encoding="utf-8")
+    out_dir = tmp_path / "out"
+
+    exit_code = main([str(input_dir), "--out-dir", str(out_dir), "--glob", "*.txt"])
+
+    assert exit_code == 0
+    assert (out_dir / "b.txt").read_text(encoding="utf-8") == "[REDACTED]"
+    assert not (out_dir / "a.md").exists()
+
+
+def test_cli_directory_mode_requires_out_dir(capsys: object, tmp_path: Path) -> None:
+    exit_code = main([str(tmp_path)])
+
+    err = capsys.readouterr().err  # type: ignore[attr-defined]
+    assert exit_code == 2
+    assert "--out-dir" in err
+
+
+def test_cli_directory_mode_rejects_output_file(capsys: object, tmp_path: Path) -> None:
+    input_dir = tmp_path / "docs"
+    input_dir.mkdir()
+    (input_dir / "a.md").write_text("email jane@example.com", encoding="utf-8")
+    output = tmp_path / "out.md"
+
+    exit_code = main([str(input_dir), "--out-dir", str(tmp_path / "out"), "-o", str(output)])
+
+    err = capsys.readouterr().err  # type: ignore[attr-defined]
+    assert exit_code == 2
+    assert "-o/--output" in err
+    assert not output.exists()
+    assert not (tmp_path / "out").exists()
+
+
+def test_cli_out_dir_requires_directory_input(capsys: object, tmp_path: Path) -> None:
+    source = tmp_path / "a.md"
+    source.write_text("email jane@example.com", encoding="utf-8")
+
+    exit_code = main([str(source), "--out-dir", str(tmp_path / "out")])
+
+    captured = capsys.readouterr()  # type: ignore[attr-defined]
+    assert exit_code == 2
+    assert "--out-dir" in captured.err
+    assert captured.out == ""
+
+
+def test_cli_cache_dir_reuses_results(capsys: object, tmp_path: Path) -> None:
+    input_file = tmp_path / "in.md"
+    input_file.write_text("email jane@example.com", encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+
+    first_exit = main([str(input_file), "--cache-dir", str(cache_dir)])
+    first_out = capsys.readouterr().out  # type: ignore[attr-defined]
+    second_exit = main([str(input_file), "--cache-dir", str(cache_dir), "--stats"])
+    captured = capsys.readouterr()  # type: ignore[attr-defined]
+
+    assert first_exit == second_exit == 0
+    assert captured.out == first_out == "email [REDACTED]"
+    assert json.loads(captured.err)["rule_matches"] == {"email": 1}
+    assert len(list(cache_dir.glob("*/*.json"))) == 1
+
+
+def test_cli_audit_out_writes_jsonl_entries(tmp_path: Path) -> None:
+    input_file = tmp_path / "in.md"
+    input_file.write_text("email jane@example.com", encoding="utf-8")
+    audit_file = tmp_path / "audit.jsonl"
+
+    exit_code = main(
+        [str(input_file), "-o", str(tmp_path / "out.md"), "--audit-out", str(audit_file)]
+    )
+
+    records = [json.loads(line) for line in audit_file.read_text(encoding="utf-8").splitlines()]
+    assert exit_code == 0
+    assert [(record["rule_name"], record["start"], record["end"]) for record in records] == [
+        ("email", 6, 22)
+    ]
+    assert records[0]["source"] == str(input_file)
+
+
+def test_cli_directory_mode_writes_binary_audit(tmp_path: Path) -> None:
+    input_dir = tmp_path / "docs"
+    input_dir.mkdir()
+    (input_dir / "a.md").write_text("email jane@example.com", encoding="utf-8")
+    (input_dir / "b.md").write_text("ip 10.0.0.1 and ops@example.com", encoding="utf-8")
+    audit_file = tmp_path / "audit.bin"
+
+    exit_code = main(
+        [
+            str(input_dir),
+            "--out-dir",
+            str(tmp_path / "out"),
+            "--audit-out",
+            str(audit_file),
+            "--audit-format",
+            "binary",
+        ]
+    )
+
+    records = list(read_binary_audit(audit_file))
+    assert exit_code == 0
+    assert sorted((Path(source or "").name, entry.rule_name) for source, entry in records) == [
+        ("a.md", "email"),
+        ("b.md", "email"),
+        ("b.md", "ipv4"),
+    ]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import pytest
+
+from markdown_redactor.markdown import Segment, iter_segments, segment_markdown
+
+
+def _segments(content: str, *, fenced: bool = True, inline: bool = True) -> list[Segment]:
+    return list(segment_markdown(content, skip_fenced_code_blocks=fenced, skip_inline_code=inline))
+
+
+def test_redactable_text_is_merged_across_lines() -> None:
+    assert _segments("one\ntwo `x` three\nfour\n") == [
+        Segment(text="one\ntwo ", redactable=True),
+        Segment(text="`x`", redactable=False),
+        Segment(text=" three\nfour\n", redactable=True),
+    ]
+
+
+def test_redactable_text_stays_per_line_without_merge_lines() -> None:
+    segments = segment_markdown(
+        "one\ntwo `x` three\nfour\n",
+        skip_fenced_code_blocks=True,
+        skip_inline_code=True,
+        merge_lines=False,
+    )
+
+    assert list(segments) == [
+        Segment(text="one\n", redactable=True),
+        Segment(text="two ", redactable=True),
+        Segment(text="`x`", redactable=False),
+        Segment(text=" three\n", redactable=True),
+        Segment(text="four\n", redactable=True),
+    ]
+
+
+def test_unclosed_backtick_hides_rest_of_line_only() -> None:
+    assert _segments("a `b\nc `d` e\n") == [
+        Segment(text="a ", redactable=True),
+        Segment(text="`b\n", redactable=False),
+        Segment(text="c ", redactable=True),
+        Segment(text="`d`", redactable=False),
+        Segment(text=" e\n", redactable=True),
+    ]
+
+
+def test_fenced_block_and_adjacent_code_are_one_segment() -> None:
+    assert _segments("text\n  ```py\nx `y`\n```\n`z` end\n") == [
+        Segment(text="text\n", redactable=True),
+        Segment(text="  ```py\nx `y`\n```\n`z`", redactable=False),
+        Segment(text=" end\n", redactable=True),
+    ]
+
+
+def test_fence_marker_must_match_and_start_the_line() -> None:
+    assert _segments("a ```b```\n~~~\n```\n~~~\nc\n", inline=False) == [
+        Segment(text="a ```b```\n", redactable=True),
+        Segment(text="~~~\n```\n~~~\n", redactable=False),
+        Segment(text="c\n", redactable=True),
+    ]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "a\r\nb `c\r\nd\r\n```\r\ne\r\n```\r\n",
+        "a `b c`\x85```\n`d`\re\n```",
+        "line\x0bbreak `code\x0cafter` tail",
+        "",
+    ],
+)
+@pytest.mark.parametrize("inline", [True, False])
+@pytest.mark.parametrize("merge_lines", [True, False])
+def test_matches_line_by_line_segmentation(content: str, inline: bool, merge_lines: bool) -> None:
+    expected = list(
+        iter_segments(
+            content.splitlines(keepends=True),
+            skip_fenced_code_blocks=True,
+            skip_inline_code=inline,
+            merge_lines=merge_lines,
+        )
+    )
+    segments = segment_markdown(
+        content, skip_fenced_code_blocks=True, skip_inline_code=inline, merge_lines=merge_lines
+    )
+
+    assert list(segments) == expected
+    assert "".join(segment.text for segment in expected) == content
@@ -1,11 +1,72 @@
 from __future__ import annotations
 
+import pickle
+import re
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field, replace
+
 import pytest
 
-from markdown_redactor import NERRule, RedactionConfig, RuleMetadata
+from markdown_redactor import (
+    EntityCache,
+    NERModelManager,
+    NERRule,
+    RedactionConfig,
+    RedactionEngine,
+    RuleMetadata,
+    RuleRegistry,
+    default_rules,
+)
 from markdown_redactor.types import RuleContext
 
 
+@dataclass(frozen=True)
+class _FakeEntity:
+    start_char: int
+    end_char: int
+    label_: str
+    text: str
+
+
+@dataclass(frozen=True)
+class _FakeDoc:
+    ents: tuple[_FakeEntity, ...]
+
+
+@dataclass
+class _FakeNlp:
+    calls: list[str] = field(default_factory=list)
+    batches: list[tuple[list[str], int, int]] = field(default_factory=list)
+
+    def __call__(self, text: str) -> _FakeDoc:
+        self.calls.append(text)
+        return self._doc(text)
+
+    def pipe(self, texts: Iterable[str], *, batch_size: int, n_process: int) -> Iterator[_FakeDoc]:
+        batch = list(texts)
+        self.batches.append((batch, batch_size, n_process))
+        return iter([self._doc(text) for text in batch])
+
+    def _doc(self, text: str) -> _FakeDoc:
+        return _FakeDoc(
+            tuple(
+                _FakeEntity(match.start(), match.end(), "PERSON", match.group())
+                for match in re.finditer(r"[A-Z][a-z]+ [A-Z][a-z]+", text)
+            )
+        )
+
+
+@pytest.fixture
+def fake_nlp() -> _FakeNlp:
+    return _FakeNlp()
+
+
+def _manager_for(nlp: _FakeNlp) -> NERModelManager:
+    return NERModelManager(loader=lambda model, exclude: nlp)
+
+
 def test_ner_rule_instantiates_without_spacy() -> None:
     rule = NERRule()
 
@@ -33,6 +94,213 @@ def test_ner_rule_custom_params() -> None:
     assert rule.metadata.risk_level == "high"
 
 
+def test_ner_rule_rejects_invalid_batch_settings() -> None:
+    with pytest.raises(ValueError):
+        NERRule(batch_size=0)
+    with pytest.raises(ValueError):
+        NERRule(n_process=0)
+    with pytest.raises(ValueError):
+        NERRule(chunk_chars=400, chunk_overlap=200)
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        RedactionConfig(),
+        RedactionConfig(detection_mode="spans"),
+        RedactionConfig(rule_scope="document", allowlist=("Jane Doe",)),
+    ],
+)
+def test_engine_batches_ner_over_all_segments(fake_nlp: _FakeNlp, config: RedactionConfig) -> None:
+    registry = RuleRegistry()
+    rule = NERRule(
+        model="fake",
+        batch_size=8,
+        n_process=2,
+        models=_manager_for(fake_nlp),
+        entity_cache=EntityCache(),
+    )
+    registry.extend((*default_rules(), rule))
+    engine = RedactionEngine(registry=registry)
+    content = (
+        "ask Jane Doe `code` then Mark Lee\n\n```\nBob Ray\n```\nAnn Poe mailed jane@example.com\n"
+    )
+
+    result = engine.redact(content, config=replace(config, collect_audit_log=True))
+
+    assert fake_nlp.calls == []
+    assert len(fake_nlp.batches) == 1
+    texts, batch_size, n_process = fake_nlp.batches[0]
+    assert (batch_size, n_process) == (8, 2)
+    assert len(texts) > 1
+    assert "Bob Ray" in result.content
+    assert "Mark Lee" not in result.content and "Ann Poe" not in result.content
+    for entry in result.audit_log:
+        if entry.rule_name == "ner":
+            assert content[entry.start : entry.end] in {"Jane Doe", "Mark Lee", "Ann Poe"}
+
+
+def _fake_ner_engine(
+    nlp: _FakeNlp, entity_labels: frozenset[str] = frozenset({"PERSON", "ORG", "GPE", "LOC"})
+) -> tuple[RedactionEngine, EntityCache]:
+    cache = EntityCache()
+    registry = RuleRegistry()
+    registry.register(
+        NERRule(
+            model="fake",
+            entity_labels=entity_labels,
+            models=_manager_for(nlp),
+            entity_cache=cache,
+        )
+    )
+    return RedactionEngine(registry=registry), cache
+
+
+def test_ner_gate_skips_text_without_capitals(fake_nlp: _FakeNlp) -> None:
+    engine, _ = _fake_ner_engine(fake_nlp)
+    content = "all lower case `x` a\n\nJane Doe wrote `y` ünïcode jürgen\n"
+
+    result = engine.redact(content)
+
+    ((texts, _, _),) = fake_nlp.batches
+    assert texts == ["Jane Doe wrote ", " ünïcode jürgen\n"]
+    assert result.stats.skipped_rule_invocations == 3
+    assert result.stats.rule_matches == {"ner": 1}
+
+
+def test_ner_gate_keeps_lowercase_text_for_other_labels(fake_nlp: _FakeNlp) -> None:
+    engine, _ = _fake_ner_engine(fake_nlp, entity_labels=frozenset({"PERSON", "DATE"}))
+
+    engine.redact("all lower case `x` \n")
+
+    ((texts, _, _),) = fake_nlp.batches
+    assert texts == ["all lower case "]
+
+
+def test_ner_entity_cache_reuses_results_for_repeated_text(fake_nlp: _FakeNlp) -> None:
+    engine, cache = _fake_ner_engine(fake_nlp)
+    content = "Jane Doe `x` Mark Lee `y`Jane Doe "
+
+    first = engine.redact(content)
+    second = engine.redact(content)
+
+    ((texts, _, _),) = fake_nlp.batches
+    assert texts == ["Jane Doe ", " Mark Lee "]
+    assert second.content == first.content == "[REDACTED] `x` [REDACTED] `y`[REDACTED] "
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert len(cache) == 2
+
+
+def test_entity_cache_is_bounded_and_skips_long_text() -> None:
+    cache = EntityCache(max_entries=2, max_text_chars=8)
+    labels = frozenset({"PERSON"})
+
+    for text in ("one", "two", "three", "a much longer text"):
+        cache.put(("m", labels, text), ((0, 1),))
+
+    assert len(cache) == 2
+    assert cache.get(("m", labels, "one")) is None
+    assert cache.get(("m", labels, "three")) == ((0, 1),)
+    assert cache.get(("m", labels, "a much longer text")) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ner_splits_long_text_into_overlapping_chunks(fake_nlp: _FakeNlp) -> None:
+    rule = NERRule(
+        models=_manager_for(fake_nlp),
+        entity_cache=EntityCache(),
+        n_process=4,
+        chunk_chars=80,
+        chunk_overlap=15,
+    )
+    content = "".join(
+        f"Paragraph {index} mentions Jane Doe and then Mark Lee once.\n\n" for index in range(40)
+    )
+
+    spans = rule.find_spans(content, RedactionConfig(), RuleContext())
+
+    ((texts, _, n_process),) = fake_nlp.batches
+    assert n_process == 4
+    assert len(texts) > 1
+    assert max(map(len, texts)) <= 80 + 2 * 15
+    assert [(span.start, span.end) for span in spans] == [
+        match.span() for match in re.finditer(r"Jane Doe|Mark Lee", content)
+    ]
+
+
+def test_model_manager_loads_trimmed_pipelines_with_lru_eviction() -> None:
+    loads: list[tuple[str, tuple[str, ...]]] = []
+    manager = NERModelManager(
+        max_models=2, loader=lambda model, exclude: loads.append((model, exclude)) or _FakeNlp()
+    )
+
+    first = manager.get("a")
+    manager.get("b")
+    assert manager.get("a") is first
+    manager.get("c")
+
+    assert [model for model, _ in loads] == ["a", "b", "c"]
+    assert all("parser" in exclude and "ner" not in exclude for _, exclude in loads)
+    assert "a" in manager and "c" in manager and "b" not in manager
+    assert len(manager) == 2
+
+
+def test_model_manager_loads_each_model_once_across_threads() -> None:
+    loads: list[str] = []
+
+    def slow_loader(model: str, exclude: tuple[str, ...]) -> _FakeNlp:
+        loads.append(model)
+        time.sleep(0.05)
+        return _FakeNlp()
+
+    manager = NERModelManager(loader=slow_loader)
+    results: list[object] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(manager.get("shared"))) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ["shared"]
+    assert len({id(result) for result in results}) == 1
+
+
+def _fake_loader(model: str, exclude: tuple[str, ...]) -> _FakeNlp:
+    return _FakeNlp()
+
+
+def test_model_manager_pickles_settings_without_models() -> None:
+    manager = NERModelManager(max_models=3, exclude=("parser",), loader=_fake_loader)
+    manager.warm("a", "b")
+
+    restored = pickle.loads(pickle.dumps(manager))
+
+    assert (restored.max_models, restored.exclude) == (3, ("parser",))
+    assert len(manager) == 2
+    assert len(restored) == 0
+    assert repr(restored) == repr(manager)
+    restored.warm("a")
+    assert "a" in restored
+
+
+def test_engine_warm_preloads_ner_models(fake_nlp: _FakeNlp) -> None:
+    manager = _manager_for(fake_nlp)
+    registry = RuleRegistry()
+    registry.extend(
+        (*default_rules(), NERRule(model="fake", models=manager, entity_cache=EntityCache()))
+    )
+    engine = RedactionEngine(registry=registry)
+
+    engine.warm(RedactionConfig(disabled_rule_names=("ner",)))
+    assert "fake" not in manager
+    engine.warm()
+
+    assert "fake" in manager
+    assert fake_nlp.calls == []
+
+
 @pytest.fixture(scope="module")
 def nlp_available() -> None:
     spacy = pytest.importorskip("spacy")
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import re
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from markdown_redactor import (
+    RedactionConfig,
+    RedactionPlan,
+    RegexRule,
+    create_default_engine,
+)
+
+
+def test_compile_returns_reusable_plan() -> None:
+    engine = create_default_engine()
+    config = RedactionConfig(min_risk_level="medium", allowlist=("ops@example.com",))
+
+    plan = engine.compile(config)
+
+    assert isinstance(plan, RedactionPlan)
+    assert plan.config == config
+    assert "ipv4" not in [rule.name for rule in plan.rules]
+    assert plan.allowlist is not None
+    with pytest.raises(FrozenInstanceError):
+        plan.config = RedactionConfig()  # type: ignore[misc]
+
+    first = engine.redact("ops@example.com jane@example.com 10.0.0.1", plan=plan)
+    second = engine.redact("ops@example.com jane@example.com 10.0.0.1", config=config)
+
+    assert first.content == second.content == "ops@example.com [REDACTED] 10.0.0.1"
+
+
+def test_redact_rejects_plan_with_different_config() -> None:
+    engine = create_default_engine()
+    plan = engine.compile(RedactionConfig(mask="<x>"))
+
+    with pytest.raises(ValueError, match="does not match"):
+        engine.redact("jane@example.com", config=RedactionConfig(), plan=plan)
+
+
+def test_cached_plans_are_invalidated_when_registry_changes() -> None:
+    engine = create_default_engine()
+    assert engine.redact("ref TICKET-42").content == "ref TICKET-42"
+
+    engine.registry.register(RegexRule(name="ticket", pattern=re.compile(r"\bTICKET-\d+\b")))
+
+    assert engine.redact("ref TICKET-42").content == "ref [REDACTED]"
+
+
+def test_unhashable_config_values_still_redact() -> None:
+    engine = create_default_engine()
+    config = RedactionConfig(allowlist=["ops@example.com"])  # type: ignore[arg-type]
+
+    result = engine.redact("ops@example.com jane@example.com", config=config)
+
+    assert result.content == "ops@example.com [REDACTED]"
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from markdown_redactor import (
+    RedactionConfig,
+    RedactionEngine,
+    RedactionSpan,
+    RegexRule,
+    RuleContext,
+    RuleMetadata,
+    RuleRegistry,
+    create_default_engine,
+)
+from markdown_redactor.spans import resolve_overlaps
+
+
+@dataclass(frozen=True, slots=True)
+class UpperWordRule:
+    name: str = "upper_word"
+    metadata: RuleMetadata | None = None
+
+    def redact(
+        self,
+        content: str,
+        config: RedactionConfig,
+        context: RuleContext,
+    ) -> tuple[str, int]:
+        return re.subn(r"\bSECRET\b", config.mask, content)
+
+
+def test_resolve_overlaps_priority_prefers_earlier_rule() -> None:
+    spans = [
+        RedactionSpan(0, 10, "A", "first"),
+        RedactionSpan(5, 20, "B", "second"),
+        RedactionSpan(20, 25, "C", "second"),
+    ]
+
+    resolved = resolve_overlaps(spans, policy="priority", priorities={"first": 0, "second": 1})
+
+    assert [(span.start, span.rule_name) for span in resolved] == [(0, "first"), (20, "second")]
+
+
+def test_resolve_overlaps_longest_prefers_longer_span() -> None:
+    spans = [
+        RedactionSpan(0, 10, "A", "first"),
+        RedactionSpan(5, 20, "B", "second"),
+    ]
+
+    resolved = resolve_overlaps(spans, policy="longest", priorities={"first": 0, "second": 1})
+
+    assert [(span.start, span.end) for span in resolved] == [(5, 20)]
+
+
+def test_span_mode_audit_offsets_are_exact() -> None:
+    engine = create_default_engine()
+    content = "Mail jane@example.com, ssn 123-45-6789, ip 10.0.0.1, card 4111 1111 1111 1111"
+
+    result = engine.redact(
+        content,
+        config=RedactionConfig(detection_mode="spans", collect_audit_log=True),
+    )
+
+    assert [content[entry.start : entry.end] for entry in result.audit_log] == [
+        "jane@example.com",
+        "123-45-6789",
+        "10.0.0.1",
+        "4111 1111 1111 1111",
+    ]
+    assert result.content == ("Mail [REDACTED], ssn [REDACTED], ip [REDACTED], card [REDACTED]")
+
+
+def test_span_mode_matches_sequential_output_for_default_rules() -> None:
+    engine = create_default_engine()
+    content = "email jane@example.com\nip 10.0.0.1 and `ghp_ABCDEF1234567890`\n"
+
+    sequential = engine.redact(content)
+    spans = engine.redact(content, config=RedactionConfig(detection_mode="spans"))
+
+    assert spans.content == sequential.content
+    assert spans.stats.rule_matches == sequential.stats.rule_matches
+
+
+def test_span_mode_runs_rules_without_find_spans_on_spliced_text() -> None:
+    registry = RuleRegistry()
+    registry.register(RegexRule(name="email", pattern=re.compile(r"\b\w+@\w+\.com\b")))
+    registry.register(UpperWordRule())
+    engine = RedactionEngine(registry=registry)
+
+    result = engine.redact(
+        "SECRET jane@example.com",
+        config=RedactionConfig(detection_mode="spans"),
+    )
+
+    assert result.content == "[REDACTED] [REDACTED]"
+    assert result.stats.rule_matches == {"email": 1, "upper_word": 1}
+
+
+def test_span_mode_priority_policy_uses_registration_order() -> None:
+    registry = RuleRegistry()
+    registry.register(RegexRule(name="short", pattern=re.compile(r"ID-\d{3}"), replacement="<S>"))
+    registry.register(
+        RegexRule(name="long", pattern=re.compile(r"ID-\d{3}-[A-Z]+"), replacement="<L>")
+    )
+    engine = RedactionEngine(registry=registry)
+    content = "ref ID-123-ABC"
+
+    priority = engine.redact(content, config=RedactionConfig(detection_mode="spans"))
+    longest = engine.redact(
+        content,
+        config=RedactionConfig(detection_mode="spans", overlap_policy="longest"),
+    )
+
+    assert priority.content == "ref <S>-ABC"
+    assert longest.content == "ref <L>"